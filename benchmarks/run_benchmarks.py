@@ -0,0 +1,488 @@
+"""
+Offline benchmarks for the assessment workflow, run against the deterministic
+FakeChatModel so no Bedrock credentials are needed.
+
+    python benchmarks/run_benchmarks.py                 # run everything
+    python benchmarks/run_benchmarks.py --only batch    # one suite
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<older>.json
+
+Results are written to benchmarks/results/<timestamp>-<commit>.json so runs can
+be compared across commits.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+WORK_DIR = tempfile.mkdtemp(prefix="lywo-bench-")
+
+# Must be set before lywo reads its settings
+os.environ.update({
+    "LYWO_LLM": "fake",
+    "STYLE_SELECTION": "auto",
+    "LYWO_LOG_LEVEL": "WARNING",
+    "LLM_CACHE_PATH": os.path.join(WORK_DIR, "llm_cache.sqlite"),
+    "CHECKPOINT_DIR": os.path.join(WORK_DIR, "checkpoints"),
+    "FEEDBACK_DIR": os.path.join(WORK_DIR, "feedback"),
+    "MODEL_ROUTING_PATH": os.path.join(ROOT, "model_routing.json"),
+})
+
+from lywo.llm import get_llm  # noqa: E402
+from lywo.samples import SAMPLE_JOB_DESCRIPTION  # noqa: E402
+from lywo.telemetry import configure_logging  # noqa: E402
+
+
+def configure_llm(latency_s: float, tokens_per_second: float, bypass_cache: bool = True) -> None:
+    os.environ["FAKE_LLM_LATENCY_S"] = str(latency_s)
+    os.environ["FAKE_LLM_TOKENS_PER_S"] = str(tokens_per_second)
+    os.environ["LLM_CACHE_BYPASS"] = "1" if bypass_cache else ""
+    get_llm.cache_clear()
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_s": statistics.fmean(ordered),
+        "p50_s": ordered[len(ordered) // 2],
+        "p95_s": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "min_s": ordered[0],
+    }
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_end_to_end(args):
+    from lywo.graph import run_workflow
+
+    configure_llm(args.latency, args.tokens_per_second)
+    results = {}
+    for mode, flag in (("linear", ""), ("parallel", "1")):
+        os.environ["PARALLEL_DAG"] = flag
+        results[mode] = timed(lambda: run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION}), args.repeat)
+    os.environ["PARALLEL_DAG"] = ""
+    return results
+
+
+def bench_node_overhead(args):
+    """
+    Per-node time with a zero-latency model, i.e. prompt formatting, parsing and
+    JSON (de)serialisation only, plus parse_structured on canned responses.
+    """
+    from lywo.fake_llm import FakeChatModel
+    from lywo.graph import NODE_FUNCTIONS, run_workflow
+    from lywo.models import DifficultyCategories, QuestionSet, QuestionStyleSet, TopicPairSet, TopicSet, dump_state
+    from lywo.nodes import pairs_view, styles_view, topics_view
+    from lywo.structured import parse_structured
+
+    configure_llm(0, 0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        state = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+
+    results = {}
+    for name, node_fn in NODE_FUNCTIONS.items():
+        results[f"node:{name}"] = timed(lambda: node_fn(dict(state)), args.repeat * 5)
+
+    fake = FakeChatModel(latency_s=0, tokens_per_second=0)
+    topics = topics_view(state["topics"])
+    canned = {
+        TopicSet: "identify exactly 2 broader topics and exactly 20 subtopics",
+        DifficultyCategories: "categorizing technical topics " + topics,
+        QuestionStyleSet: "Assessment Style Generator " + topics,
+        TopicPairSet: "topicPairs " + topics,
+        QuestionSet: "Multiple Choice " + pairs_view(state["interlinking_questions"].topicPairs),
+    }
+    for model, prompt in canned.items():
+        text = fake.invoke(prompt.replace("identify exactly", "broader topics and exactly")).content
+        results[f"parse:{model.__name__}"] = timed(lambda: parse_structured(text, model), args.repeat * 20)
+        fenced = f"Here you go:\n```json\n{text}\n```"
+        results[f"parse_fenced:{model.__name__}"] = timed(lambda: parse_structured(fenced, model), args.repeat * 20)
+
+    liked = state["liked_question_styles"]
+    results["render:liked_question_styles"] = timed(lambda: styles_view(liked), args.repeat * 20)
+    results["dump_state"] = timed(lambda: json.dumps(dump_state(state)), args.repeat * 20)
+    return results
+
+
+def bench_batch(args):
+    from lywo.batch import run_batch
+    from lywo.checkpoint import get_checkpoint_store
+
+    configure_llm(args.latency, args.tokens_per_second)
+    input_path = os.path.join(WORK_DIR, "batch_input.jsonl")
+    with open(input_path, "w") as f:
+        for i in range(args.batch_size):
+            f.write(json.dumps({"id": f"jd-{i}", "job_description": f"{SAMPLE_JOB_DESCRIPTION}\nPosting {i}"}) + "\n")
+
+    results = {}
+    for concurrency in args.concurrency:
+        output_path = os.path.join(WORK_DIR, f"batch_output_{concurrency}.jsonl")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        # Batch runs checkpoint under their record ids; start each level from scratch
+        os.environ["CHECKPOINT_DIR"] = os.path.join(WORK_DIR, f"checkpoints_{concurrency}")
+        get_checkpoint_store.cache_clear()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts = run_batch(input_path, output_path, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+        results[f"concurrency={concurrency}"] = {
+            "jobs": args.batch_size,
+            "completed": counts["completed"],
+            "elapsed_s": elapsed,
+            "jobs_per_s": counts["completed"] / elapsed if elapsed else 0.0,
+        }
+    return results
+
+
+def bench_cache(args):
+    configure_llm(args.latency, args.tokens_per_second, bypass_cache=False)
+    llm = get_llm()
+    prompt = "Analyze this job description and extract key responsibilities and skills: " + SAMPLE_JOB_DESCRIPTION
+    miss = timed(lambda: llm.invoke(prompt + str(time.perf_counter_ns())), args.repeat)
+    llm.invoke(prompt)
+    hit = timed(lambda: llm.invoke(prompt), args.repeat * 20)
+    return {"miss": miss, "hit": hit, "stats": llm.stats()}
+
+
+def bench_routing(args):
+    """
+    One run per routing profile in model_routing.json, reporting each node's
+    wall time, LLM time, tokens and estimated cost so the profiles can be
+    compared side by side.
+    """
+    from lywo.graph import run_workflow
+    from lywo.llm import load_routing
+    from lywo.telemetry import node_llm_report, reset_metrics
+
+    with open(os.environ["MODEL_ROUTING_PATH"]) as f:
+        profiles = list(json.load(f)["profiles"])
+
+    results = {}
+    for profile in profiles:
+        os.environ["MODEL_PROFILE"] = profile
+        load_routing.cache_clear()
+        configure_llm(args.latency, args.tokens_per_second)
+        reset_metrics()
+        with contextlib.redirect_stdout(io.StringIO()):
+            state = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+        nodes = node_llm_report()
+        for name, elapsed in state["node_timings"].items():
+            nodes.setdefault(name, {})["wall_s"] = elapsed
+        results[profile] = {
+            "nodes": nodes,
+            "wall_s": state["wall_time"] if "wall_time" in state else sum(state["node_timings"].values()),
+            "cost_usd": sum(node.get("cost_usd", 0) for node in nodes.values()),
+        }
+    os.environ.pop("MODEL_PROFILE")
+    load_routing.cache_clear()
+
+    print(f"\n{'node':<35}" + "".join(f"{profile:>28}" for profile in profiles))
+    for name in results[profiles[0]]["nodes"]:
+        cells = [results[profile]["nodes"].get(name, {}) for profile in profiles]
+        print(f"{name:<35}" + "".join(
+            f"{cell.get('wall_s', 0):>10.2f}s {cell.get('cost_usd', 0):>14.5f}$ " for cell in cells
+        ))
+    print(f"{'total':<35}" + "".join(
+        f"{results[profile]['wall_s']:>10.2f}s {results[profile]['cost_usd']:>14.5f}$ " for profile in profiles
+    ) + "\n")
+    return results
+
+
+def bench_throttling(args):
+    """
+    Batch throughput against a fake model that throttles calls beyond
+    --fake-capacity concurrent requests, with the AIMD concurrency limit and
+    with the limit pinned at the batch's full concurrency.
+    """
+    from lywo.batch import run_batch
+    from lywo.checkpoint import get_checkpoint_store
+    from lywo.resilience import rate_limit_stats, reset_rate_limits
+
+    input_path = os.path.join(WORK_DIR, "throttle_input.jsonl")
+    with open(input_path, "w") as f:
+        for i in range(args.batch_size):
+            f.write(json.dumps({"id": f"jd-{i}", "job_description": f"{SAMPLE_JOB_DESCRIPTION}\nPosting {i}"}) + "\n")
+
+    concurrency = max(args.concurrency)
+    settings = {
+        "FAKE_LLM_CAPACITY": str(args.fake_capacity),
+        "FAKE_LLM_LATENCY_JITTER_S": str(args.latency),
+        "LLM_BACKOFF_BASE_S": "0.05",
+        "LLM_BACKOFF_MAX_S": "1",
+    }
+    limits = {
+        "aimd": {"LLM_INITIAL_CONCURRENCY": str(concurrency * 2), "LLM_MIN_CONCURRENCY": "1"},
+        "fixed": {"LLM_INITIAL_CONCURRENCY": str(concurrency * 2), "LLM_MIN_CONCURRENCY": str(concurrency * 2)},
+    }
+    results = {}
+    for mode, mode_settings in limits.items():
+        os.environ.update({**settings, **mode_settings})
+        os.environ["CHECKPOINT_DIR"] = os.path.join(WORK_DIR, f"checkpoints_throttle_{mode}")
+        get_checkpoint_store.cache_clear()
+        reset_rate_limits()
+        configure_llm(args.latency, args.tokens_per_second)
+        output_path = os.path.join(WORK_DIR, f"throttle_output_{mode}.jsonl")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts = run_batch(input_path, output_path, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+        results[mode] = {
+            **counts,
+            "elapsed_s": elapsed,
+            "jobs_per_s": counts["completed"] / elapsed if elapsed else 0.0,
+            "rate_limits": rate_limit_stats(),
+        }
+    for name in {**settings, **limits["aimd"]}:
+        os.environ.pop(name, None)
+    reset_rate_limits()
+    return results
+
+
+def bench_prompts(args):
+    """
+    Tokens sent per node against the uncompacted prompts, per prompt section,
+    without and with prompt caching, and the prompt tokens served from and
+    written to the (simulated) prompt cache.
+    """
+    from lywo.graph import run_workflow
+    from lywo.prompts import prompt_stats, reset_prompt_stats
+    from lywo.telemetry import metrics_snapshot, reset_metrics
+
+    results = {}
+    for mode, flag in (("uncached", ""), ("prompt_caching", "1")):
+        os.environ["PROMPT_CACHING"] = flag
+        configure_llm(args.latency, args.tokens_per_second)
+        reset_prompt_stats()
+        reset_metrics()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+        metrics = metrics_snapshot()
+        results[mode] = {
+            "nodes": prompt_stats(),
+            "cache_read_tokens": sum(value for key, value in metrics.items()
+                                     if key.startswith("lywo_llm_prompt_cache_read_tokens_total")),
+            "cache_write_tokens": sum(value for key, value in metrics.items()
+                                      if key.startswith("lywo_llm_prompt_cache_write_tokens_total")),
+        }
+    os.environ.pop("PROMPT_CACHING")
+    return results
+
+
+def bench_coalescing(args):
+    """
+    A batch of --batch-size copies of the same job description at full
+    concurrency, with and without single-flight coalescing of identical
+    concurrent LLM calls.
+    """
+    from lywo.batch import run_batch
+    from lywo.checkpoint import get_checkpoint_store
+    from lywo.telemetry import metrics_snapshot, reset_metrics
+
+    input_path = os.path.join(WORK_DIR, "coalescing_input.jsonl")
+    with open(input_path, "w") as f:
+        for i in range(args.batch_size):
+            f.write(json.dumps({"id": f"jd-{i}", "job_description": SAMPLE_JOB_DESCRIPTION}) + "\n")
+
+    results = {}
+    for mode, flag in (("coalesced", "1"), ("uncoalesced", "0")):
+        os.environ["LLM_COALESCE"] = flag
+        os.environ["CHECKPOINT_DIR"] = os.path.join(WORK_DIR, f"checkpoints_coalescing_{mode}")
+        get_checkpoint_store.cache_clear()
+        configure_llm(args.latency, args.tokens_per_second)
+        reset_metrics()
+        output_path = os.path.join(WORK_DIR, f"coalescing_output_{mode}.jsonl")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts = run_batch(input_path, output_path, concurrency=max(args.concurrency))
+        elapsed = time.perf_counter() - start
+        requests = {key: value for key, value in metrics_snapshot().items() if key.startswith("lywo_llm_requests_total")}
+        results[mode] = {
+            **counts,
+            "elapsed_s": elapsed,
+            "jobs_per_s": counts["completed"] / elapsed if elapsed else 0.0,
+            "model_calls": sum(value for key, value in requests.items() if "cache=miss" in key),
+            "coalesced_calls": get_llm().stats()["coalesced"],
+        }
+    os.environ.pop("LLM_COALESCE")
+    return results
+
+
+def _http(method: str, url: str, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def _wait_for_jobs(base_url: str, job_ids, statuses, poll_s: float = 0.05):
+    jobs = {}
+    while len(jobs) < len(job_ids):
+        for job_id in job_ids:
+            if job_id not in jobs:
+                job = _http("GET", f"{base_url}/jobs/{job_id}")
+                if job["status"] in statuses:
+                    jobs[job_id] = job
+        time.sleep(poll_s)
+    return [jobs[job_id] for job_id in job_ids]
+
+
+def bench_service(args):
+    """
+    Load test of the HTTP job service: --batch-size job descriptions posted at
+    once to a local server with each --concurrency worker count and polled
+    until done, reporting throughput and submit-to-result latency. One more job
+    goes through the feedback endpoint to time how long it takes to finish
+    once feedback is posted.
+    """
+    from lywo.checkpoint import get_checkpoint_store
+    from lywo.service import JobQueue, make_server
+
+    configure_llm(args.latency, args.tokens_per_second)
+    results = {}
+    for workers in args.concurrency:
+        os.environ["CHECKPOINT_DIR"] = os.path.join(WORK_DIR, f"checkpoints_service_{workers}")
+        get_checkpoint_store.cache_clear()
+        job_queue = JobQueue(os.path.join(WORK_DIR, f"jobs_{workers}.sqlite"))
+        server = make_server(port=0, workers=workers, job_queue=job_queue)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                job_ids = [
+                    _http("POST", f"{base_url}/jobs", {
+                        "job_description": f"{SAMPLE_JOB_DESCRIPTION}\nPosting {i}", "style_selection": "auto",
+                    })["id"]
+                    for i in range(args.batch_size)
+                ]
+                jobs = _wait_for_jobs(base_url, job_ids, {"completed", "failed"})
+                elapsed = time.perf_counter() - start
+
+                feedback_id = _http("POST", f"{base_url}/jobs", {
+                    "job_description": f"{SAMPLE_JOB_DESCRIPTION}\nPosting with feedback", "style_selection": "queue",
+                })["id"]
+                _wait_for_jobs(base_url, [feedback_id], {"awaiting_feedback", "failed"})
+                styles = _http("GET", f"{base_url}/jobs/{feedback_id}/feedback")["question_styles"]
+                resume_start = time.perf_counter()
+                _http("POST", f"{base_url}/jobs/{feedback_id}/feedback", {"liked": [styles[0]["style_name"]]})
+                resumed = _wait_for_jobs(base_url, [feedback_id], {"completed", "failed"})[0]
+                resume_s = time.perf_counter() - resume_start
+        finally:
+            server.shutdown()
+            server.server_close()
+            server.pool.stop()
+
+        completed = [job for job in jobs if job["status"] == "completed"]
+        results[f"workers={workers}"] = {
+            "jobs": args.batch_size,
+            "completed": len(completed),
+            "elapsed_s": elapsed,
+            "jobs_per_s": len(completed) / elapsed if elapsed else 0.0,
+            "latency": summarize([job["metrics"]["total_s"] for job in completed]),
+            "queue_wait": summarize([job["metrics"]["queue_wait_s"] for job in completed]),
+            "feedback_resume_s": resume_s,
+            "feedback_status": resumed["status"],
+        }
+    return results
+
+
+SUITES = {
+    "end_to_end": bench_end_to_end,
+    "node_overhead": bench_node_overhead,
+    "batch": bench_batch,
+    "cache": bench_cache,
+    "routing": bench_routing,
+    "throttling": bench_throttling,
+    "service": bench_service,
+    "coalescing": bench_coalescing,
+    "prompts": bench_prompts,
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=ROOT
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(current, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    now, before = _flatten(current["results"]), _flatten(previous["results"])
+    print(f"\n### Compared with {previous.get('commit')} ({previous_path}) ###\n")
+    for key in sorted(now):
+        if key in before and key.endswith(("mean_s", "p95_s", "jobs_per_s")) and before[key]:
+            change = (now[key] - before[key]) / before[key] * 100
+            print(f"{key:<70} {before[key]:10.4f} -> {now[key]:10.4f} ({change:+6.1f}%)")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Offline benchmarks with the fake LLM.")
+    arg_parser.add_argument("--only", choices=list(SUITES), action="append", help="Run only these suites")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM base latency per call (s)")
+    arg_parser.add_argument("--tokens-per-second", type=float, default=2000.0, help="Fake LLM output throughput")
+    arg_parser.add_argument("--batch-size", type=int, default=16, help="Job descriptions in the batch suite")
+    arg_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    arg_parser.add_argument("--fake-capacity", type=int, default=4,
+                            help="Concurrent calls the fake model accepts before throttling (throttling suite)")
+    arg_parser.add_argument("--compare", metavar="RESULT_JSON", help="Print changes against an earlier result file")
+    args = arg_parser.parse_args()
+
+    configure_logging("WARNING")
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("only", "compare")},
+        "results": {},
+    }
+    for name in args.only or SUITES:
+        print(f"Running {name}...")
+        report["results"][name] = SUITES[name](args)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['commit']}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"\nSaved to {path}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Generates job-specific assessments from a job description with a LangGraph
+workflow on Amazon Bedrock.
+
+Importing the package has no side effects: the Bedrock client and the compiled
+graph are built on first use. Run `python -m lywo` for the command line.
+"""
+
+# Public names, resolved lazily so that `import lywo` does not load langchain
+_EXPORTS = {
+    "get_app": "lywo.graph",
+    "run_workflow": "lywo.graph",
+    "run_parallel": "lywo.graph",
+    "run_batch": "lywo.batch",
+    "get_llm": "lywo.llm",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module 'lywo' has no attribute '{name}'")
@@ -0,0 +1,3 @@
+from lywo.cli import main
+
+main()
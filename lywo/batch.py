@@ -0,0 +1,110 @@
+import contextvars
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict
+
+from lywo.feedback import FeedbackPending
+from lywo.graph import run_workflow
+from lywo.models import dump_state
+
+
+def _completed_ids(output_path: str) -> set:
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partially written last line from an interrupted run
+            if "final_state" in record:
+                completed.add(record["id"])
+    return completed
+
+
+def _read_jobs(input_path: str, skip_ids: set):
+    """
+    Yields (record id, job description, error) per input line. A line that is
+    not JSON or has no job_description yields an error, keyed by its line
+    number when it has no id, instead of stopping the batch.
+    """
+    with open(input_path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            error = None
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                record, error = {}, f"Invalid JSON on line {line_number}: {e}"
+            if not isinstance(record, dict):
+                record, error = {}, f"Expected a JSON object on line {line_number}"
+            elif error is None and "job_description" not in record:
+                error = f"No job_description on line {line_number}"
+            record_id = str(record.get("id", line_number))
+            if record_id not in skip_ids:
+                yield record_id, record.get("job_description"), error
+
+
+def run_batch(input_path: str, output_path: str, concurrency: int = 4, style_selection: str = None) -> Dict[str, int]:
+    """
+    Streams job descriptions from a JSONL file ({"id": ..., "job_description": ...}
+    per line) through the workflow with at most `concurrency` runs in flight.
+
+    Each result is appended to output_path as soon as its run finishes, so memory
+    does not grow with the input size. IDs that already have a final_state in the
+    output file are skipped, which makes an interrupted batch resumable; failed
+    runs are recorded with an "error" field and retried on the next resume, where
+    the record id doubles as the checkpoint run_id so finished nodes are reused.
+    Malformed input lines are recorded with an "error" too and skipped.
+    Runs suspended by the "queue" style selection are recorded with status
+    "awaiting_feedback" and finish on the first resume after feedback arrives.
+    """
+    skip_ids = _completed_ids(output_path)
+    jobs = _read_jobs(input_path, skip_ids)
+    counts = {"completed": 0, "failed": 0, "awaiting_feedback": 0, "skipped": len(skip_ids)}
+    in_flight = {}
+
+    with open(output_path, "a") as out, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def write(record) -> None:
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+
+        def submit_next() -> bool:
+            while True:
+                job = next(jobs, None)
+                if job is None:
+                    return False
+                record_id, jd, error = job
+                if error is None:
+                    break
+                write({"id": record_id, "error": error})
+                counts["failed"] += 1
+            initial_state = {"job_description": jd, "run_id": record_id}
+            if style_selection:
+                initial_state["style_selection"] = style_selection
+            in_flight[executor.submit(contextvars.copy_context().run, run_workflow, initial_state)] = record_id
+            return True
+
+        while len(in_flight) < concurrency and submit_next():
+            pass
+
+        while in_flight:
+            finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in finished:
+                record_id = in_flight.pop(future)
+                try:
+                    record = {"id": record_id, "final_state": dump_state(future.result())}
+                    counts["completed"] += 1
+                except FeedbackPending:
+                    record = {"id": record_id, "status": "awaiting_feedback"}
+                    counts["awaiting_feedback"] += 1
+                except Exception as e:
+                    record = {"id": record_id, "error": repr(e)}
+                    counts["failed"] += 1
+                write(record)
+                submit_next()
+
+    return counts
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict
+
+from lywo.telemetry import current_node, inc
+
+
+class _Flight:
+    """
+    One in-progress model call that identical concurrent calls wait on.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class CachedLLM:
+    """
+    Wraps a chat model with a persistent SQLite response cache.
+
+    Entries are keyed by a SHA-256 of the formatted prompt plus the model id,
+    temperature and max_tokens. Entries older than ttl_seconds are dropped and
+    the least recently used entries are evicted once more than max_entries are
+    stored. Setting bypass skips cache lookups for a run while still refreshing
+    the stored responses.
+
+    With coalesce, concurrent invokes with the same key share one call to the
+    model (single flight): the first caller makes it and the others wait for
+    its response, or its error, instead of repeating it. Coalescing does not
+    depend on the cache, so it also applies under bypass.
+    """
+
+    def __init__(self, llm, path: str = ".llm_cache.sqlite", max_entries: int = 5000,
+                 ttl_seconds: float = 7 * 24 * 3600, bypass: bool = False, coalesce: bool = True):
+        self.llm = llm
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.bypass = bypass
+        self.coalesce = coalesce
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def cache_key(self, prompt) -> str:
+        payload = json.dumps(
+            {
+                "prompt": str(prompt),
+                "model_id": getattr(self.llm, "model_id", None),
+                "temperature": getattr(self.llm, "temperature", None),
+                "max_tokens": getattr(self.llm, "max_tokens", None),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str):
+        if self.bypass:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+        return None
+
+    def _store(self, key: str, content: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, content, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def invoke(self, prompt):
+        key = self.cache_key(prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            from langchain_core.messages import AIMessage
+
+            return AIMessage(content=cached, response_metadata={"cache_hit": True})
+
+        if not self.coalesce:
+            response = self.llm.invoke(prompt)
+            self._store(key, response.content)
+            return response
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            return self._follow(flight)
+
+        try:
+            flight.response = self.llm.invoke(prompt)
+            self._store(key, flight.response.content)
+            return flight.response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _follow(self, flight: _Flight):
+        flight.done.wait()
+        with self._lock:
+            self.coalesced += 1
+        inc("lywo_llm_coalesced_total", node=current_node.get(), model=getattr(self.llm, "model_id", None))
+        if flight.error is not None:
+            raise flight.error
+        metadata = {**(getattr(flight.response, "response_metadata", None) or {}), "coalesced": True}
+        return flight.response.model_copy(update={"response_metadata": metadata})
+
+    def stream(self, prompt):
+        """
+        Yields a cached response as a single chunk, or streams a fresh one and
+        stores it once it is complete.
+        """
+        key = self.cache_key(prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            from langchain_core.messages import AIMessageChunk
+
+            yield AIMessageChunk(content=cached, response_metadata={"cache_hit": True})
+            return
+
+        parts = []
+        for chunk in self.llm.stream(prompt):
+            parts.append(chunk.content)
+            yield chunk
+        self._store(key, "".join(parts))
+
+    def _evict(self) -> None:
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "entries": entries,
+            "bypass": self.bypass,
+        }
+
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from lywo.config import env_str
+from lywo.memo import memoized
+from lywo.models import StateType, dump_state, load_state
+from lywo.nodes import NODE_DEPENDENCIES, SPECULATIVE_DEPENDENCIES, SPECULATIVE_NODE_FUNCTIONS
+
+logger = logging.getLogger("lywo")
+
+
+def downstream_nodes(name: str) -> List[str]:
+    """
+    Returns `name` and every node that depends on it, directly or transitively,
+    in either the regular or the speculative graph.
+    """
+    if name not in SPECULATIVE_NODE_FUNCTIONS:
+        raise ValueError(f"Unknown node '{name}'. Expected one of: {', '.join(SPECULATIVE_NODE_FUNCTIONS)}")
+    nodes = [name]
+    changed = True
+    while changed:
+        changed = False
+        for dependencies in (NODE_DEPENDENCIES, SPECULATIVE_DEPENDENCIES):
+            for node, deps in dependencies.items():
+                if node not in nodes and any(dep in nodes for dep in deps):
+                    nodes.append(node)
+                    changed = True
+    return nodes
+
+
+class CheckpointStore:
+    """
+    Persists the state keys written by each node to <directory>/<run_id>.json so
+    that a rerun with the same run_id skips every node that already completed.
+    """
+
+    def __init__(self, directory: str = ".checkpoints"):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, run_id: str) -> str:
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in str(run_id))
+        return os.path.join(self.directory, f"{safe_id}.json")
+
+    def load(self, run_id: str) -> Dict[str, Any]:
+        path = self._path(run_id)
+        if not os.path.exists(path):
+            return {"run_id": run_id, "job_description": None, "outputs": {}}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write(self, checkpoint: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(checkpoint["run_id"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f, default=str)
+        os.replace(tmp_path, path)
+
+    def save_node(self, run_id: str, job_description: str, name: str, outputs: Dict[str, Any]) -> None:
+        with self._lock:
+            checkpoint = self.load(run_id)
+            checkpoint["job_description"] = job_description
+            checkpoint["outputs"][name] = dump_state(outputs)
+            self._write(checkpoint)
+
+    def prepare(self, run_id: str, job_description: str, recompute_from: str = None) -> List[str]:
+        """
+        Drops checkpoints that must not be reused for this run and returns the
+        nodes that will be resumed. A changed job description invalidates the
+        whole run; recompute_from invalidates that node and everything downstream.
+        """
+        with self._lock:
+            checkpoint = self.load(run_id)
+            if checkpoint["job_description"] not in (None, job_description):
+                logger.info("Job description changed for run '%s', discarding its checkpoints.", run_id)
+                checkpoint["outputs"] = {}
+            if recompute_from:
+                for node in downstream_nodes(recompute_from):
+                    checkpoint["outputs"].pop(node, None)
+            checkpoint["job_description"] = job_description
+            self._write(checkpoint)
+            return list(checkpoint["outputs"])
+
+
+@lru_cache(maxsize=None)
+def get_checkpoint_store() -> CheckpointStore:
+    return CheckpointStore(env_str("CHECKPOINT_DIR", ".checkpoints"))
+
+
+def checkpointed(name, node_fn):
+    """
+    Wraps a node so that, when the state carries a run_id, its outputs are
+    restored from the checkpoint store instead of being recomputed, and are
+    saved to it after a successful run.
+    """
+    def wrapper(state: StateType) -> StateType:
+        run_id = state.get("run_id")
+        if run_id is None:
+            return node_fn(state)
+
+        saved = get_checkpoint_store().load(run_id)["outputs"]
+        if name in saved:
+            logger.info("Resuming '%s' from checkpoint for run '%s'", name, run_id)
+            state.update(load_state(saved[name]))
+            state.setdefault("node_sources", {})[name] = "checkpoint"
+            return state
+
+        before = dict(state)
+        state = node_fn(state)
+        outputs = {
+            key: value for key, value in state.items()
+            if key not in before or before[key] is not value
+        }
+        outputs.pop("node_sources", None)
+        get_checkpoint_store().save_node(run_id, state["job_description"], name, outputs)
+        return state
+    return wrapper
+
+
+# Node functions with memoization and checkpoint/resume support, used by all execution modes
+CHECKPOINTED_NODES = {
+    name: checkpointed(name, memoized(name, node_fn)) for name, node_fn in SPECULATIVE_NODE_FUNCTIONS.items()
+}
@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Snippets timed in a fresh interpreter by --import-time
+IMPORT_TIME_CHECKS = {
+    "import lywo": "import lywo",
+    "import lywo.graph": "import lywo.graph",
+    "import lywo.batch": "import lywo.batch",
+    "get_app() (loads langgraph)": "from lywo.graph import get_app; get_app()",
+}
+
+
+def measure_import_time(snippet: str) -> float:
+    """
+    Runs `snippet` in a fresh interpreter and returns how long it took in seconds.
+    """
+    code = f"import time; start = time.perf_counter(); {snippet}; print(time.perf_counter() - start)"
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=project_root
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def report_import_times(max_import_ms: float = None) -> int:
+    print("\n### Import Times ###\n")
+    timings = {label: measure_import_time(snippet) * 1000 for label, snippet in IMPORT_TIME_CHECKS.items()}
+    for label, elapsed_ms in timings.items():
+        print(f"{label:<35} {elapsed_ms:8.1f}ms")
+    if max_import_ms is not None and timings["import lywo"] > max_import_ms:
+        print(f"\n'import lywo' took {timings['import lywo']:.1f}ms, over the {max_import_ms:.1f}ms budget")
+        return 1
+    return 0
+
+
+def print_stream_event(event) -> None:
+    item = event["item"]
+    text = item.style_name if event["kind"] == "question_style" else item.question
+    print(f"[{event['node']}] {event['kind']}: {text}", flush=True)
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(description="Generate an assessment from a job description.")
+    arg_parser.add_argument("--batch", metavar="INPUT_JSONL", help="Run every job description in a JSONL file")
+    arg_parser.add_argument("--output", default="assessments.jsonl", help="Output JSONL file for batch mode")
+    arg_parser.add_argument("--concurrency", type=int, default=4, help="Maximum concurrent runs in batch mode")
+    arg_parser.add_argument("--serve", action="store_true", help="Run the HTTP job service (see lywo.service)")
+    arg_parser.add_argument("--host", default="127.0.0.1", help="Address the job service listens on")
+    arg_parser.add_argument("--port", type=int, default=8080, help="Port the job service listens on")
+    arg_parser.add_argument("--workers", type=int, help="Job service workers (default: SERVICE_WORKERS or 4)")
+    arg_parser.add_argument("--jd", metavar="PATH", help="Job description file (default: the bundled sample)")
+    arg_parser.add_argument("--cosmetic-edit", action="store_true",
+                            help="With --run-id, treat --jd as a cosmetic edit and reuse the previous analysis")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="Print question styles and questions as soon as each one is generated")
+    arg_parser.add_argument("--run-id", help="Checkpoint node outputs under this id and resume from them")
+    arg_parser.add_argument("--recompute-from", metavar="NODE", help="Recompute this node and everything after it")
+    arg_parser.add_argument(
+        "--style-selection", choices=["interactive", "auto", "preferences", "queue"],
+        help="How liked question styles are chosen (default: STYLE_SELECTION or interactive)",
+    )
+    arg_parser.add_argument("--pending-feedback", action="store_true", help="List runs waiting for style feedback")
+    arg_parser.add_argument("--submit-feedback", metavar="RUN_ID", help="Submit style feedback for a suspended run and resume it")
+    arg_parser.add_argument("--like", action="append", default=[], metavar="STYLE", help="Liked style name (repeatable)")
+    arg_parser.add_argument("--dislike", action="append", default=[], metavar="STYLE", help="Disliked style name (repeatable)")
+    arg_parser.add_argument("--metrics-out", metavar="PATH", help="Write Prometheus text metrics to PATH after the run")
+    arg_parser.add_argument("--metrics-json", metavar="PATH", help="Write a JSON metrics snapshot to PATH after the run")
+    arg_parser.add_argument("--import-time", action="store_true", help="Report module import and startup times")
+    arg_parser.add_argument("--max-import-ms", type=float, help="With --import-time, fail if 'import lywo' is slower")
+    args = arg_parser.parse_args(argv)
+
+    if args.import_time:
+        sys.exit(report_import_times(args.max_import_ms))
+
+    from lywo.telemetry import configure_logging, metrics_snapshot, render_prometheus
+
+    configure_logging()
+
+    from lywo.graph import print_timing_report, run_workflow
+    from lywo.llm import get_llm
+    from lywo.memo import memo_enabled
+    from lywo.models import dump_state
+    from lywo.prompts import prompt_stats
+    from lywo.resilience import rate_limit_stats
+    from lywo.structured import structured_stats
+
+    from lywo.checkpoint import get_checkpoint_store
+    from lywo.feedback import FeedbackPending, pending_feedback, submit_feedback
+
+    if args.pending_feedback:
+        print("\n".join(pending_feedback()) or "No runs are waiting for feedback.")
+        return
+
+    if args.serve:
+        from lywo.service import serve
+
+        serve(args.host, args.port, args.workers)
+        return
+
+    if args.batch:
+        from lywo.batch import run_batch
+
+        print(run_batch(args.batch, args.output, concurrency=args.concurrency, style_selection=args.style_selection))
+    else:
+        from lywo.samples import SAMPLE_JOB_DESCRIPTION
+
+        job_description = SAMPLE_JOB_DESCRIPTION
+        if args.jd:
+            with open(args.jd) as f:
+                job_description = f.read()
+        initial_state = {"job_description": job_description}
+        if args.submit_feedback:
+            if not args.like:
+                arg_parser.error("--submit-feedback needs at least one --like")
+            submit_feedback(args.submit_feedback, args.like, args.dislike)
+            job_description = get_checkpoint_store().load(args.submit_feedback)["job_description"]
+            if job_description is None:
+                arg_parser.error(f"No checkpoint found for run '{args.submit_feedback}'")
+            initial_state = {"job_description": job_description, "run_id": args.submit_feedback,
+                             "style_selection": "queue"}
+        elif args.run_id:
+            initial_state["run_id"] = args.run_id
+            initial_state["recompute_from"] = args.recompute_from
+            initial_state["cosmetic_edit"] = args.cosmetic_edit
+        elif args.recompute_from or args.cosmetic_edit:
+            arg_parser.error("--recompute-from and --cosmetic-edit require --run-id")
+        if args.cosmetic_edit and not memo_enabled():
+            arg_parser.error("--cosmetic-edit reuses memoized node outputs, which NODE_MEMO=0 and LLM_CACHE_BYPASS=1 turn off")
+        if args.style_selection and not args.submit_feedback:
+            initial_state["style_selection"] = args.style_selection
+
+        try:
+            if args.stream:
+                from lywo.streaming import streaming_to
+
+                with streaming_to(print_stream_event):
+                    final_state = run_workflow(initial_state)
+            else:
+                final_state = run_workflow(initial_state)
+        except FeedbackPending as e:
+            print(f"{e}\nResume with: python -m lywo --submit-feedback {e.run_id} --like <style name> ...")
+            return
+        print(dump_state(final_state))
+        print_timing_report(final_state)
+
+    if get_llm.cache_info().currsize:
+        print(f"LLM cache: {get_llm().stats()}")
+        print(f"LLM rate limits: {rate_limit_stats()}")
+    print(f"Structured output: {structured_stats()}")
+    for node, stats in prompt_stats().items():
+        print(f"Prompt tokens {node}: {stats['tokens']} sent, {stats['saved_tokens']} saved "
+              f"({stats['reduction']:.0%}), {stats['static_prefix_tokens']} in static prefixes "
+              f"({stats['cached_calls']}/{stats['calls']} calls cached), "
+              f"{stats['trimmed']} inputs trimmed, by section {stats['sections']}")
+
+    if args.metrics_out:
+        with open(args.metrics_out, "w") as f:
+            f.write(render_prometheus())
+    if args.metrics_json:
+        with open(args.metrics_json, "w") as f:
+            json.dump(metrics_snapshot(), f, indent=2)
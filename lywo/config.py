@@ -0,0 +1,29 @@
+import os
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def load_env() -> None:
+    """
+    Loads the .env file once, the first time any setting is read.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def env_str(name: str, default: str = None) -> str:
+    load_env()
+    return os.getenv(name, default)
+
+
+def env_int(name: str, default: int) -> int:
+    return int(env_str(name, str(default)))
+
+
+def env_float(name: str, default: float) -> float:
+    return float(env_str(name, str(default)))
+
+
+def env_flag(name: str) -> bool:
+    return env_str(name, "").lower() in ("1", "true", "yes")
@@ -0,0 +1,308 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+from lywo.prompts import PROMPT_CACHE_MIN_TOKENS
+from lywo.tokens import estimate_tokens
+
+PRIORITIES = ["high", "medium", "low"]
+SCENARIOS = [
+    "scaling up from pilot plant to production",
+    "a batch deviates from its specification",
+    "a new safety review is due",
+    "raw material quality changes",
+    "energy costs must be cut",
+    "commissioning a new unit",
+]
+SUBTOPIC_NAMES = [
+    "Reactor Design", "Heat Exchanger Sizing", "Distillation Columns", "Material Balance", "Energy Balance",
+    "Process Flow Diagrams", "P&ID Review", "HAZOP Studies", "Pressure Relief Systems", "Pump Selection",
+    "Piping Hydraulics", "Batch Scheduling", "Crystallization", "Filtration", "Drying Operations",
+    "Solvent Recovery", "Scale-Up Methodology", "Pilot Plant Trials", "Reaction Kinetics", "Catalyst Handling",
+    "Process Control Loops", "Instrumentation", "Cost Estimation", "Equipment Specification", "GMP Compliance",
+    "Effluent Treatment", "Utility Systems", "Cooling Towers", "Steam Systems", "Vacuum Systems",
+    "Agitator Design", "Mass Transfer", "Thermodynamics", "Root Cause Analysis", "Change Management",
+    "Vendor Coordination", "Commissioning", "Technology Transfer", "Yield Optimization", "Team Leadership",
+]
+# Question stems, so that questions on the same topics read differently
+QUESTION_STEMS = [
+    "Which adjustment to {0} best protects {1} when {2}?",
+    "An engineer reviewing {0} finds a problem with {1} while {2}. What is the most likely root cause?",
+    "What should be checked first in {0} and {1} when {2}?",
+    "Which measurement most reliably links {0} to {1} when {2}?",
+    "How would you prioritise changes to {0} against {1} when {2}?",
+    "Which design margin in {0} matters most for {1} when {2}?",
+    "What documentation connecting {0} with {1} must be updated when {2}?",
+    "Which failure of {0} would most affect {1} when {2}?",
+]
+
+
+class ThrottlingException(Exception):
+    """
+    Raised by FakeChatModel in place of Bedrock's ThrottlingException.
+    """
+
+
+# Calls in flight per model id, shared by every FakeChatModel so that a pool
+# of clients sees the same simulated server capacity
+_in_flight: Dict[str, int] = {}
+_in_flight_lock = threading.Lock()
+# Throttles and latency jitter are drawn per call, unlike the responses
+_chaos = random.Random(0)
+# Hashes of the prompt prefixes each model id has cached
+_prompt_cache: Dict[str, Set[str]] = {}
+
+
+# Size of the chunks FakeChatModel.stream yields
+STREAM_CHUNK_TOKENS = 16
+
+
+# How much faster than the default model a fake model answers, by model id
+# substring, so that routing profiles can be compared offline
+MODEL_SPEEDUPS = {"haiku": 3.0}
+
+
+def model_speedup(model_id: str) -> float:
+    return next((speedup for name, speedup in MODEL_SPEEDUPS.items() if name in model_id), 1.0)
+
+
+def _exactly(prompt: str, what: str, default: int) -> int:
+    match = re.search(rf"exactly (\d+) {what}", prompt)
+    return int(match.group(1)) if match else default
+
+
+def _unique(values: List[str]) -> List[str]:
+    return list(dict.fromkeys(values))
+
+
+def _subtopic_names(prompt: str) -> List[str]:
+    # Subtopics come as {"name": ...} objects or grouped by priority: {"high": [...], ...}
+    names = re.findall(r'"name":\s*"([^"]+)"', prompt)
+    for group in re.findall(r'"(?:high|medium|low)":\[([^\]]*)\]', prompt):
+        names += re.findall(r'"([^"]+)"', group)
+    return _unique(names)
+
+
+def _prompt_parts(prompt) -> Tuple[str, str]:
+    """
+    (prefix marked with cache_control, rest) of a prompt. Message lists, as
+    sent by lywo.llm.PromptCachingChatModel, are flattened to their text.
+    """
+    if isinstance(prompt, str):
+        return "", prompt
+    prefix, rest = [], []
+    for message in prompt:
+        content = getattr(message, "content", message)
+        for block in content if isinstance(content, list) else [content]:
+            if isinstance(block, dict):
+                (prefix if "cache_control" in block else rest).append(block.get("text", ""))
+            else:
+                rest.append(str(block))
+    return "".join(prefix), "".join(rest)
+
+
+class FakeChatModel:
+    """
+    Deterministic stand-in for ChatBedrock that answers every node prompt with a
+    schema-valid canned response, for offline runs and benchmarks.
+
+    Each call sleeps for latency_s plus completion_tokens / tokens_per_second
+    (a tokens_per_second of 0 disables the throughput delay) plus up to
+    latency_jitter_s, and responses longer than max_tokens are truncated.
+    Responses depend only on the prompt and the seed.
+
+    Prompt caching is simulated for message lists with a block marked with
+    cache_control: the response is the same as for the flattened text, and a
+    marked prefix of at least PROMPT_CACHE_MIN_TOKENS is reported in the usage
+    as cache_creation the first time a model id sees it and cache_read after.
+
+    To exercise retries and rate limiting, a call raises ThrottlingException
+    with probability throttle_rate, and whenever more than `capacity` calls
+    to the same model id are in flight (0 = unlimited).
+    """
+
+    def __init__(self, model_id: str = "fake-chat-model", temperature: float = 0.4, max_tokens: int = 16000,
+                 latency_s: float = 0.05, tokens_per_second: float = 200.0, seed: int = 0,
+                 latency_jitter_s: float = 0.0, throttle_rate: float = 0.0, capacity: int = 0):
+        self.model_id = model_id
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.latency_s = latency_s
+        self.tokens_per_second = tokens_per_second
+        self.seed = seed
+        self.latency_jitter_s = latency_jitter_s
+        self.throttle_rate = throttle_rate
+        self.capacity = capacity
+        self.calls = 0
+        self.throttled = 0
+
+    def invoke(self, prompt):
+        from langchain_core.messages import AIMessage
+
+        content = "".join(chunk.content for chunk in self.stream(prompt))
+        prefix, text = _prompt_parts(prompt)
+        usage = {"input_tokens": estimate_tokens(prefix + text), "output_tokens": estimate_tokens(content)}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        if prefix:
+            usage["input_token_details"] = self._cache_usage(prefix)
+        return AIMessage(content=content, usage_metadata=usage)
+
+    def _cache_usage(self, prefix: str) -> Dict[str, int]:
+        tokens = estimate_tokens(prefix)
+        if tokens < PROMPT_CACHE_MIN_TOKENS:
+            return {}
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with _in_flight_lock:
+            cached = _prompt_cache.setdefault(self.model_id, set())
+            if key in cached:
+                return {"cache_read": tokens}
+            cached.add(key)
+        return {"cache_creation": tokens}
+
+    def stream(self, prompt):
+        """
+        Yields the response as AIMessageChunks of about STREAM_CHUNK_TOKENS
+        tokens. The base latency passes before the first chunk and the
+        throughput delay is spread over the chunks.
+        """
+        from langchain_core.messages import AIMessageChunk
+
+        with _in_flight_lock:
+            in_flight = _in_flight.get(self.model_id, 0)
+            throttled = bool(self.capacity and in_flight >= self.capacity) or _chaos.random() < self.throttle_rate
+            if not throttled:
+                _in_flight[self.model_id] = in_flight + 1
+        if throttled:
+            self.throttled += 1
+            raise ThrottlingException("Too many requests, please wait before trying again.")
+
+        try:
+            prompt = "".join(_prompt_parts(prompt))
+            digest = hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).hexdigest()
+            rng = random.Random(int(digest[:16], 16))
+            content = self.respond(prompt, rng)
+            if self.max_tokens and estimate_tokens(content) > self.max_tokens:
+                # Like a real model hitting max_tokens, the response is cut off
+                content = content[:self.max_tokens * 4]
+
+            latency = self.latency_s
+            if self.latency_jitter_s:
+                with _in_flight_lock:
+                    latency += _chaos.uniform(0, self.latency_jitter_s)
+            if latency > 0:
+                time.sleep(latency)
+            step = STREAM_CHUNK_TOKENS * 4
+            for start in range(0, len(content), step):
+                piece = content[start:start + step]
+                if self.tokens_per_second:
+                    time.sleep(estimate_tokens(piece) / self.tokens_per_second)
+                yield AIMessageChunk(content=piece)
+            self.calls += 1
+        finally:
+            with _in_flight_lock:
+                _in_flight[self.model_id] -= 1
+
+    def respond(self, prompt: str, rng: random.Random) -> str:
+        if "extract key responsibilities" in prompt:
+            return self._key_responsibilities(prompt)
+        if "subtopics of the broader topic" in prompt:
+            broader = re.search(r'broader topic "([^"]+)"', prompt).group(1)
+            return json.dumps({"subtopics": self._subtopics(broader, _exactly(prompt, "subtopics", 20), rng)})
+        if "broader topics and exactly" in prompt:
+            return json.dumps(self._topic_set(prompt, rng))
+        if "broader topics that should be assessed" in prompt:
+            count = _exactly(prompt, "broader topics", 2)
+            return json.dumps({"broaderTopics": [f"Broader Topic {i + 1}" for i in range(count)]})
+        if "categorizing technical topics" in prompt:
+            return json.dumps(self._difficulty(prompt, rng))
+        if "Multiple Choice" in prompt:
+            return json.dumps(self._questions(prompt, rng))
+        if "Assessment Style Generator" in prompt:
+            return json.dumps(self._styles(prompt, rng))
+        if "topicPairs" in prompt:
+            return json.dumps(self._topic_pairs(prompt, rng))
+        return "{}"
+
+    def _key_responsibilities(self, prompt: str) -> str:
+        lines = [line.strip() for line in prompt.splitlines() if line.strip()][1:11]
+        skills = "\n".join(f"- {line}" for line in lines)
+        return f"Key responsibilities and skills:\n{skills}"
+
+    def _subtopics(self, broader: str, count: int, rng: random.Random) -> List[Dict[str, str]]:
+        # Broader topics are named "Broader Topic N"; each gets its own slice of the names
+        number = re.search(r"(\d+)$", broader)
+        offset = (int(number.group(1)) - 1) * count if number else 0
+        names = []
+        for i in range(offset, offset + count):
+            name = SUBTOPIC_NAMES[i % len(SUBTOPIC_NAMES)]
+            names.append(name if i < len(SUBTOPIC_NAMES) else f"{name} {i // len(SUBTOPIC_NAMES) + 1}")
+        return [{"name": name, "priority": rng.choice(PRIORITIES)} for name in names]
+
+    def _topic_set(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        num_subtopics = _exactly(prompt, "subtopics", 20)
+        return {"broaderTopics": [
+            {"broaderTopic": f"Broader Topic {i + 1}",
+             "subtopics": self._subtopics(f"Broader Topic {i + 1}", num_subtopics, rng)}
+            for i in range(_exactly(prompt, "broader topics", 2))
+        ]}
+
+    def _difficulty(self, prompt: str, rng: random.Random) -> Dict[str, List[str]]:
+        categories = {"veryHard": [], "hard": [], "medium": [], "easy": []}
+        for topic in _unique(re.findall(r'"broaderTopic":\s*"([^"]+)"', prompt)):
+            categories[rng.choice(list(categories))].append(topic)
+        return categories
+
+    def _styles(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        subtopics = _subtopic_names(prompt) or ["General"]
+        return {"question_styles": [
+            {
+                "style_name": f"Scenario Analysis - Focus Area {i + 1}",
+                "definition": "Candidates analyse a realistic plant scenario and choose the best course of action.",
+                "example": f"Given the data for {subtopics[i % len(subtopics)]}, which change improves yield most?",
+                "assessment_goal": "Applied technical judgement",
+                "suitable_for_topics": rng.sample(subtopics, min(3, len(subtopics))),
+            }
+            for i in range(15)
+        ]}
+
+    def _topic_pairs(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        subtopics = _subtopic_names(prompt) or ["Topic A", "Topic B"]
+        return {"topicPairs": [
+            {
+                "topics": rng.sample(subtopics, min(2, len(subtopics))),
+                "rationale": "Tests integration of related competencies",
+                "assessmentExample": "Design and justify a solution that combines both topics",
+                "jobRelevance": "Relates to the core responsibilities",
+                "priority": rng.choice(PRIORITIES),
+            }
+            for _ in range(min(10, max(1, len(subtopics) // 2)))
+        ]}
+
+    def _questions(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        styles = _unique(re.findall(r'"style_name":\s*"([^"]+)"', prompt)) or ["General"]
+        pairs = re.findall(r'"topics":\s*\[\s*"([^"]+)",\s*"([^"]+)"', prompt) or [("Topic A", "Topic B")]
+        match = re.search(r"set of (\d+) questions", prompt)
+        count = int(match.group(1)) if match else 10
+        # Explicit cells: `count` questions on each cell's topics in its style
+        cells = re.search(r"\*\*Question Cells\*\*[^:]*: (\[.*\])", prompt)
+        plan = [
+            (cell["topics"], cell["style"])
+            for cell in (json.loads(cells.group(1)) if cells else [])
+            for _ in range(cell["count"])
+        ]
+        questions = []
+        for i in range(count):
+            pair = list(plan[i % len(plan)][0] if plan else pairs[i % len(pairs)])
+            options = [f"Option {letter}" for letter in "ABCD"]
+            questions.append({
+                "question": rng.choice(QUESTION_STEMS).format(pair[0], pair[-1], rng.choice(SCENARIOS)),
+                "options": options,
+                "correct_answer": rng.choice(options),
+                "style": plan[i % len(plan)][1] if plan else styles[i % len(styles)],
+                "topics": pair,
+            })
+        return {"questions": questions}
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+from lywo.config import env_str
+from lywo.models import StateType
+from lywo.telemetry import log_event
+
+Style = Dict[str, Any]
+Selection = Tuple[List[Style], List[Style]]
+
+# Only one run at a time can prompt the reviewer when runs are executed concurrently
+feedback_lock = threading.Lock()
+
+
+class FeedbackPending(Exception):
+    """
+    Raised by the queue selector when a run has to wait for reviewer feedback.
+    Upstream nodes are already checkpointed, so rerunning the same run_id after
+    submit_feedback() resumes at collect_style_feedback.
+    """
+
+    def __init__(self, run_id: str, request_path: str):
+        super().__init__(f"Run '{run_id}' is waiting for style feedback ({request_path})")
+        self.run_id = run_id
+        self.request_path = request_path
+
+
+def _normalize(name: str) -> str:
+    return " ".join(str(name).casefold().split())
+
+
+def select_interactive(question_styles: List[Style], state: StateType) -> Selection:
+    """
+    Asks the reviewer on stdin to like or dislike each style.
+    """
+    liked_styles = []
+    disliked_styles = []
+
+    with feedback_lock:
+        print("\n### Please provide feedback on the generated question styles ###\n")
+
+        for idx, style in enumerate(question_styles, start=1):
+            print(f"Style {idx}:")
+            print(f"  - **Name:** {style['style_name']}")
+            print(f"  - **Definition:** {style['definition']}")
+            print(f"  - **Example:** {style['example']}")
+            print(f"  - **Assessment Goal:** {style['assessment_goal']}")
+            print(f"  - **Suitable Topics:** {', '.join(style['suitable_for_topics'])}\n")
+
+            while True:
+                feedback = input("Do you **like** this style? (enter 'like' or 'dislike'): ").strip().lower()
+                if feedback in ['like', 'dislike']:
+                    break
+                else:
+                    print("Invalid input. Please enter 'like' or 'dislike'.")
+
+            if feedback == 'like':
+                liked_styles.append(style)
+            else:
+                disliked_styles.append(style)
+            print()  # Add a newline for better readability
+
+    preferences_path = env_str("STYLE_PREFERENCES_PATH")
+    if preferences_path:
+        save_preferences(preferences_path, liked_styles, disliked_styles)
+    return liked_styles, disliked_styles
+
+
+def select_auto(question_styles: List[Style], state: StateType) -> Selection:
+    """
+    Keeps the styles whose suitable_for_topics overlap the high-priority
+    subtopics. Falls back to styles overlapping any subtopic, and then to every
+    style, so that at least one style is always kept.
+    """
+    topics = state["topics"]
+    subtopics = [subtopic for broader in topics.broaderTopics for subtopic in broader.subtopics]
+    high_priority = {_normalize(s.name) for s in subtopics if _normalize(s.priority) == "high"}
+    all_names = {_normalize(s.name) for s in subtopics}
+
+    for wanted in (high_priority, all_names):
+        liked = [
+            style for style in question_styles
+            if wanted & {_normalize(topic) for topic in style.get("suitable_for_topics", [])}
+        ]
+        if liked:
+            return liked, [style for style in question_styles if style not in liked]
+    return list(question_styles), []
+
+
+def load_preferences(path: str) -> Dict[str, List[str]]:
+    if not os.path.exists(path):
+        return {"liked": [], "disliked": []}
+    with open(path) as f:
+        preferences = json.load(f)
+    return {"liked": preferences.get("liked", []), "disliked": preferences.get("disliked", [])}
+
+
+def save_preferences(path: str, liked_styles: List[Style], disliked_styles: List[Style]) -> None:
+    """
+    Merges the reviewer's choices into the preferences file; a style's latest
+    verdict wins.
+    """
+    preferences = load_preferences(path)
+    liked = {_normalize(name): name for name in preferences["liked"]}
+    disliked = {_normalize(name): name for name in preferences["disliked"]}
+    for style in liked_styles:
+        disliked.pop(_normalize(style["style_name"]), None)
+        liked[_normalize(style["style_name"])] = style["style_name"]
+    for style in disliked_styles:
+        liked.pop(_normalize(style["style_name"]), None)
+        disliked[_normalize(style["style_name"])] = style["style_name"]
+    with open(path, "w") as f:
+        json.dump({"liked": sorted(liked.values()), "disliked": sorted(disliked.values())}, f, indent=2)
+
+
+def select_preferences(question_styles: List[Style], state: StateType) -> Selection:
+    """
+    Applies the liked/disliked style names from STYLE_PREFERENCES_PATH (default
+    style_preferences.json). Styles the file does not mention are decided by the
+    STYLE_PREFERENCES_FALLBACK selector (default "auto").
+    """
+    preferences = load_preferences(env_str("STYLE_PREFERENCES_PATH", "style_preferences.json"))
+    liked_names = {_normalize(name) for name in preferences["liked"]}
+    disliked_names = {_normalize(name) for name in preferences["disliked"]}
+
+    liked, disliked, undecided = [], [], []
+    for style in question_styles:
+        name = _normalize(style["style_name"])
+        if name in liked_names:
+            liked.append(style)
+        elif name in disliked_names:
+            disliked.append(style)
+        else:
+            undecided.append(style)
+
+    if undecided:
+        fallback = get_style_selector(env_str("STYLE_PREFERENCES_FALLBACK", "auto"))
+        more_liked, more_disliked = fallback(undecided, state)
+        liked += more_liked
+        disliked += more_disliked
+    return liked, disliked
+
+
+def _feedback_dir() -> str:
+    return env_str("FEEDBACK_DIR", ".feedback")
+
+
+def _feedback_paths(run_id: str) -> Tuple[str, str]:
+    safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in str(run_id))
+    base = os.path.join(_feedback_dir(), safe_id)
+    return f"{base}.request.json", f"{base}.response.json"
+
+
+def pending_feedback() -> List[str]:
+    """
+    Returns the run ids that are waiting for reviewer feedback.
+    """
+    if not os.path.isdir(_feedback_dir()):
+        return []
+    pending = []
+    for filename in sorted(os.listdir(_feedback_dir())):
+        if filename.endswith(".request.json"):
+            with open(os.path.join(_feedback_dir(), filename)) as f:
+                run_id = json.load(f)["run_id"]
+            if not os.path.exists(_feedback_paths(run_id)[1]):
+                pending.append(run_id)
+    return pending
+
+
+def styles_hash(question_styles: List[Style]) -> str:
+    """
+    Identifies the styles a feedback request was written for, so that feedback
+    on an earlier set of styles is not applied to regenerated ones.
+    """
+    return hashlib.sha256(json.dumps(question_styles, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_feedback_request(run_id: str) -> Dict[str, Any]:
+    with open(_feedback_paths(run_id)[0]) as f:
+        return json.load(f)
+
+
+def submit_feedback(run_id: str, liked: List[str], disliked: List[str] = ()) -> None:
+    """
+    Records the reviewer's liked/disliked style names for a suspended run,
+    tagged with the styles hash of the request they answer (none when the run
+    has no pending request, so the run asks again).
+    """
+    request_path, response_path = _feedback_paths(run_id)
+    request_hash = load_feedback_request(run_id).get("styles_hash") if os.path.exists(request_path) else None
+    os.makedirs(os.path.dirname(response_path), exist_ok=True)
+    tmp_path = f"{response_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"run_id": run_id, "styles_hash": request_hash, "liked": list(liked), "disliked": list(disliked)},
+                  f, indent=2)
+    os.replace(tmp_path, response_path)
+
+
+def select_queue(question_styles: List[Style], state: StateType) -> Selection:
+    """
+    Uses feedback submitted for this run if there is any for these styles.
+    Otherwise writes a feedback request to FEEDBACK_DIR and suspends the run
+    with FeedbackPending. Feedback on other styles, e.g. ones regenerated with
+    --recompute-from, is deleted and asked for again.
+    """
+    run_id = state.get("run_id")
+    if run_id is None:
+        raise ValueError("The 'queue' style selection needs a run_id so the run can be resumed.")
+
+    request_path, response_path = _feedback_paths(run_id)
+    current_hash = styles_hash(question_styles)
+    if os.path.exists(response_path):
+        with open(response_path) as f:
+            response = json.load(f)
+        if response.get("styles_hash") == current_hash:
+            liked_names = {_normalize(name) for name in response.get("liked", [])}
+            liked = [style for style in question_styles if _normalize(style["style_name"]) in liked_names]
+            return liked, [style for style in question_styles if style not in liked]
+        log_event("stale_style_feedback", level=logging.WARNING, run_id=run_id)
+        os.remove(response_path)
+
+    os.makedirs(os.path.dirname(request_path), exist_ok=True)
+    with open(request_path, "w") as f:
+        json.dump({"run_id": run_id, "styles_hash": current_hash, "question_styles": question_styles}, f, indent=2)
+    raise FeedbackPending(run_id, request_path)
+
+
+STYLE_SELECTORS: Dict[str, Callable[[List[Style], StateType], Selection]] = {
+    "interactive": select_interactive,
+    "auto": select_auto,
+    "preferences": select_preferences,
+    "queue": select_queue,
+}
+
+
+def get_style_selector(name: str) -> Callable[[List[Style], StateType], Selection]:
+    if name not in STYLE_SELECTORS:
+        raise ValueError(f"Unknown style selection '{name}'. Expected one of: {', '.join(STYLE_SELECTORS)}")
+    return STYLE_SELECTORS[name]
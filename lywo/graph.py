@@ -0,0 +1,185 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+
+from lywo.checkpoint import CHECKPOINTED_NODES, get_checkpoint_store
+from lywo.config import env_flag
+from lywo.models import StateType
+from lywo.nodes import NODE_DEPENDENCIES, NODE_FUNCTIONS, SPECULATIVE_DEPENDENCIES
+from lywo.telemetry import log_event, traced_node
+
+logger = logging.getLogger("lywo")
+
+# Checkpointed nodes with tracing, used by both execution modes
+INSTRUMENTED_NODES = {name: traced_node(name, node_fn) for name, node_fn in CHECKPOINTED_NODES.items()}
+
+
+def timed_node(name, node_fn):
+    """
+    Wraps a node so its wall time is recorded under state["node_timings"][name].
+    """
+    def wrapper(state: StateType) -> StateType:
+        start = time.perf_counter()
+        state = node_fn(state)
+        state.setdefault("node_timings", {})[name] = time.perf_counter() - start
+        return state
+    return wrapper
+
+
+def _run_node(name: str, state: StateType):
+    start = time.perf_counter()
+    result = INSTRUMENTED_NODES[name](state)
+    return result, time.perf_counter() - start
+
+
+def run_parallel(initial_state: StateType, max_workers: int = 3, dependencies=NODE_DEPENDENCIES) -> StateType:
+    """
+    Runs the workflow as a DAG, starting every node as soon as its dependencies
+    (NODE_DEPENDENCIES by default) have finished. Each node works on its own copy
+    of the state and only the keys it added or replaced are merged back.
+    """
+    state = dict(initial_state)
+    timings = {}
+    finish_times = {}
+    done = set()
+    running = {}
+    run_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while len(done) < len(dependencies):
+            for name, deps in dependencies.items():
+                if name not in done and name not in running and all(dep in done for dep in deps):
+                    snapshot = dict(state)
+                    # copy_context carries the tracing and streaming context into the worker
+                    future = executor.submit(contextvars.copy_context().run, _run_node, name, dict(snapshot))
+                    running[name] = (future, snapshot)
+
+            finished, _ = wait([future for future, _ in running.values()], return_when=FIRST_COMPLETED)
+            for name, (future, snapshot) in list(running.items()):
+                if future not in finished:
+                    continue
+                node_state, elapsed = future.result()
+                state.update({
+                    key: value for key, value in node_state.items()
+                    if key not in snapshot or snapshot[key] is not value
+                })
+                timings[name] = elapsed
+                finish_times[name] = time.perf_counter() - run_start
+                done.add(name)
+                del running[name]
+
+    state["node_timings"] = timings
+    state["node_finish_times"] = finish_times
+    state["wall_time"] = time.perf_counter() - run_start
+    return state
+
+
+def run_speculative(initial_state: StateType, max_workers: int = 4) -> StateType:
+    """
+    Runs the speculative DAG, which generates candidate questions for every style
+    while the reviewer is choosing, and reports how long the assessment took to
+    appear after the feedback was complete.
+    """
+    state = run_parallel(initial_state, max_workers=max_workers, dependencies=SPECULATIVE_DEPENDENCIES)
+    report = state.get("speculation_report")
+    if report is not None:
+        report["post_feedback_latency_s"] = state["wall_time"] - state["node_finish_times"]["collect_style_feedback"]
+        log_event("speculation", **report)
+    return state
+
+
+def print_timing_report(state: StateType) -> None:
+    timings = state.get("node_timings", {})
+    if not timings:
+        return
+    serial_time = sum(timings.values())
+    wall_time = state.get("wall_time", serial_time)
+    print("\n### Node Timings ###\n")
+    sources = state.get("node_sources", {})
+    for name, elapsed in timings.items():
+        print(f"{name:<35} {elapsed:8.2f}s  {sources.get(name, '')}")
+    print(f"{'sum of node times':<35} {serial_time:8.2f}s")
+    print(f"{'wall time':<35} {wall_time:8.2f}s")
+    # Only the parallel and speculative runners (which record node_finish_times) overlap nodes
+    if "node_finish_times" in state and wall_time > 0:
+        print(f"{'speedup':<35} {serial_time / wall_time:8.2f}x")
+    print()
+    if "speculation_report" in state:
+        print(f"Speculation: {state['speculation_report']}\n")
+    if "question_bank_report" in state:
+        print(f"Question bank: {state['question_bank_report']}\n")
+    if "compilation_report" in state:
+        print(f"Chunked compilation: {state['compilation_report']}\n")
+    for name, report in state.get("streaming_report", {}).items():
+        first_item = f"{report['first_item_s']:.2f}s" if report["first_item_s"] is not None else "-"
+        print(f"Streaming {name}: {report['items']} items, first after {first_item}, "
+              f"total {report['total_s']:.2f}s\n")
+
+
+@lru_cache(maxsize=None)
+def get_app():
+    """
+    Builds and compiles the linear workflow graph once per process.
+    """
+    from langgraph.graph import Graph
+
+    # Create the graph
+    workflow = Graph()
+
+    # Add nodes to the graph
+    for name in NODE_FUNCTIONS:
+        workflow.add_node(name, timed_node(name, INSTRUMENTED_NODES[name]))
+
+    # Add edges to the graph
+    workflow.add_edge("job_description", "topic_generation")
+    workflow.add_edge("topic_generation", "topic_categorization")
+    workflow.add_edge("topic_categorization", "question_style_diversification")
+    workflow.add_edge("question_style_diversification", "collect_style_feedback")
+    workflow.add_edge("collect_style_feedback", "interlinking_question_creation")
+    workflow.add_edge("interlinking_question_creation", "assessment_compilation")
+
+    # Set the entry point
+    workflow.set_entry_point("job_description")
+    workflow.set_finish_point("assessment_compilation")
+
+    # Compile the graph
+    return workflow.compile()
+
+
+def run_workflow(initial_state: StateType) -> StateType:
+    """
+    Runs the workflow once: speculatively when SPECULATIVE=1, as a parallel DAG
+    when PARALLEL_DAG=1 and through the compiled linear graph otherwise.
+
+    When initial_state has a "run_id", node outputs are checkpointed under that
+    id and a rerun resumes from the first node that has not completed. Setting
+    "recompute_from" to a node name forces that node and everything downstream
+    of it to run again.
+
+    Setting "cosmetic_edit" with a run_id marks the job description as a
+    cosmetic edit of the one that run used, so its key_responsibilities analysis
+    is reused from the node memo ("cosmetic_edit_of" can also name the original
+    job description directly). state["node_sources"] reports for each node
+    whether it was computed or served from the memo or a checkpoint.
+    """
+    initial_state = {**initial_state, "node_sources": {}}
+    if initial_state.get("cosmetic_edit") and initial_state.get("run_id") is not None:
+        previous = get_checkpoint_store().load(initial_state["run_id"])["job_description"]
+        if previous and previous != initial_state["job_description"]:
+            initial_state["cosmetic_edit_of"] = previous
+    if initial_state.get("run_id") is not None:
+        resumed = get_checkpoint_store().prepare(
+            initial_state["run_id"], initial_state["job_description"], initial_state.get("recompute_from")
+        )
+        if resumed:
+            logger.info("Run '%s' has checkpoints for: %s", initial_state["run_id"], ", ".join(resumed))
+    if env_flag("SPECULATIVE"):
+        return run_speculative(initial_state)
+    if env_flag("PARALLEL_DAG"):
+        return run_parallel(initial_state)
+    run_start = time.perf_counter()
+    final_state = get_app().invoke(dict(initial_state))
+    final_state["wall_time"] = time.perf_counter() - run_start
+    return final_state
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict
+
+from lywo.cache import CachedLLM
+from lywo.config import env_flag, env_float, env_int, env_str
+from lywo.prompts import cache_marked, prompt_caching_enabled
+from lywo.resilience import ResilientLLM
+from lywo.telemetry import TracedLLM, current_node, inc, log_event
+
+
+# Default model settings shared by the Bedrock client and the fake stand-in
+MODEL_SETTINGS = {
+    "model_id": "anthropic.claude-3-5-sonnet-20240620-v1:0",  # Replace with your model ID
+    "temperature": 0.4,
+    "max_tokens": 16000,
+}
+
+
+def build_chat_model(settings: Dict[str, Any] = None):
+    """
+    Returns the underlying chat model for the given settings (MODEL_SETTINGS by
+    default): Bedrock, or the deterministic FakeChatModel when LYWO_LLM=fake
+    (latency from FAKE_LLM_LATENCY_S, FAKE_LLM_TOKENS_PER_S and
+    FAKE_LLM_LATENCY_JITTER_S; injected throttling from FAKE_LLM_THROTTLE_RATE
+    and FAKE_LLM_CAPACITY). PROMPT_CACHING=1 marks prompt prefixes for
+    prompt caching, which the fake model simulates.
+    """
+    settings = settings or MODEL_SETTINGS
+    if env_str("LYWO_LLM", "bedrock") == "fake":
+        from lywo.fake_llm import FakeChatModel, model_speedup
+
+        speedup = model_speedup(settings["model_id"])
+        model = FakeChatModel(
+            latency_s=env_float("FAKE_LLM_LATENCY_S", 0.05) / speedup,
+            tokens_per_second=env_float("FAKE_LLM_TOKENS_PER_S", 200.0) * speedup,
+            latency_jitter_s=env_float("FAKE_LLM_LATENCY_JITTER_S", 0.0),
+            throttle_rate=env_float("FAKE_LLM_THROTTLE_RATE", 0.0),
+            capacity=env_int("FAKE_LLM_CAPACITY", 0),
+            **settings,
+        )
+    else:
+        from langchain_aws import ChatBedrock
+
+        # AWS credentials are picked up from the environment (or .env) by boto3
+        model = ChatBedrock(region_name="ap-northeast-1", **settings)
+    return PromptCachingChatModel(model) if prompt_caching_enabled() else model
+
+
+class PromptCachingChatModel:
+    """
+    Sends the static instruction prefix of each lywo.prompts.Prompt as a
+    content block marked for prompt caching, so that repeated calls reuse it.
+    Enabled by PROMPT_CACHING=1 for models that support prompt caching;
+    prefixes shorter than lywo.prompts.PROMPT_CACHE_MIN_TOKENS are sent
+    unmarked, since they would not be cached.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def invoke(self, prompt):
+        return self.model.invoke(cache_marked(prompt))
+
+    def stream(self, prompt):
+        return self.model.stream(cache_marked(prompt))
+
+
+@lru_cache(maxsize=None)
+def load_routing(path: str = None, profile: str = None) -> Dict[str, Any]:
+    """
+    Returns the routing profile named by `profile` (MODEL_PROFILE, or the file's
+    "default_profile") from the JSON file at `path` (MODEL_ROUTING_PATH, default
+    model_routing.json). A profile has optional "default" and per-node "nodes"
+    settings, layered over MODEL_SETTINGS, and an optional "fallback" model used
+    when a call fails. Without a routing file every node uses MODEL_SETTINGS.
+    """
+    path = path or env_str("MODEL_ROUTING_PATH", "model_routing.json")
+    if not os.path.exists(path):
+        if profile or env_str("MODEL_PROFILE"):
+            raise ValueError(f"Routing file '{path}' not found")
+        return {}
+    with open(path) as f:
+        routing = json.load(f)
+    profile = profile or env_str("MODEL_PROFILE") or routing.get("default_profile", "baseline")
+    if profile not in routing.get("profiles", {}):
+        raise ValueError(f"Unknown model profile '{profile}'. Known profiles: {', '.join(routing.get('profiles', {}))}")
+    return routing["profiles"][profile]
+
+
+def node_model_settings(node: str = None, routing: Dict[str, Any] = None) -> Dict[str, Any]:
+    routing = load_routing() if routing is None else routing
+    return {**MODEL_SETTINGS, **routing.get("default", {}), **routing.get("nodes", {}).get(node, {})}
+
+
+class RoutedChatModel:
+    """
+    Chat model that sends each call to the model configured for the node making
+    it (see load_routing), retrying once on the profile's fallback model. Its
+    model_id, temperature and max_tokens reflect the calling node, so the
+    response cache and the traces see the routed model.
+    """
+
+    def __init__(self, routing: Dict[str, Any]):
+        self.routing = routing
+        self._models = {}
+        self._lock = threading.Lock()
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        return node_model_settings(current_node.get(), self.routing)
+
+    @property
+    def model_id(self) -> str:
+        return self.settings["model_id"]
+
+    @property
+    def temperature(self) -> float:
+        return self.settings["temperature"]
+
+    @property
+    def max_tokens(self) -> int:
+        return self.settings["max_tokens"]
+
+    def _model(self, settings: Dict[str, Any]):
+        key = json.dumps(settings, sort_keys=True)
+        with self._lock:
+            if key not in self._models:
+                # Rate limited and retried (see lywo.resilience)
+                self._models[key] = ResilientLLM(
+                    lambda: build_chat_model(settings),
+                    settings["model_id"],
+                    max_retries=env_int("LLM_MAX_RETRIES", 5),
+                    backoff_base_s=env_float("LLM_BACKOFF_BASE_S", 0.5),
+                    backoff_max_s=env_float("LLM_BACKOFF_MAX_S", 20.0),
+                )
+            return self._models[key]
+
+    def _fallback(self, settings: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        fallback = {**settings, **self.routing["fallback"]}
+        log_event("llm_fallback", level=logging.WARNING, model=settings["model_id"],
+                  fallback=fallback["model_id"], error=repr(error))
+        inc("lywo_llm_fallbacks_total", node=current_node.get(), model=settings["model_id"])
+        return fallback
+
+    def invoke(self, prompt):
+        settings = self.settings
+        try:
+            return self._model(settings).invoke(prompt)
+        except Exception as e:
+            if not self.routing.get("fallback"):
+                raise
+            return self._model(self._fallback(settings, e)).invoke(prompt)
+
+    def stream(self, prompt):
+        """
+        Yields the response chunk by chunk. The fallback model is only used when
+        the call fails before any chunk was yielded.
+        """
+        settings = self.settings
+        started = False
+        try:
+            for chunk in self._model(settings).stream(prompt):
+                started = True
+                yield chunk
+        except Exception as e:
+            if started or not self.routing.get("fallback"):
+                raise
+            yield from self._model(self._fallback(settings, e)).stream(prompt)
+
+
+@lru_cache(maxsize=None)
+def get_llm() -> TracedLLM:
+    """
+    Builds the chat client on first use, routed per node, behind the response
+    cache and the per-call tracing. LLM_CACHE_BYPASS=1 forces fresh responses
+    for this run; LLM_COALESCE=0 stops identical concurrent calls from sharing
+    one model call.
+    """
+    return TracedLLM(CachedLLM(
+        RoutedChatModel(load_routing()),
+        path=env_str("LLM_CACHE_PATH", ".llm_cache.sqlite"),
+        max_entries=env_int("LLM_CACHE_MAX_ENTRIES", 5000),
+        ttl_seconds=env_float("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600),
+        bypass=env_flag("LLM_CACHE_BYPASS"),
+        coalesce=env_str("LLM_COALESCE", "1") != "0",
+    ))
@@ -0,0 +1,207 @@
+import hashlib
+import importlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from lywo.config import env_flag, env_float, env_int, env_str
+from lywo.models import StateType, dump_state, load_state
+
+# State fields each node reads. A node whose fields (and settings) are unchanged
+# is served from the memo instead of being recomputed. collect_style_feedback is
+# left out on purpose: it is a reviewer decision, not a function of the state.
+NODE_INPUTS = {
+    "job_description": ["job_description"],
+    "topic_generation": ["key_responsibilities", "num_broader_topics", "num_subtopics"],
+    "topic_categorization": ["topics"],
+    "question_style_diversification": ["topics", "job_description"],
+    "interlinking_question_creation": ["topics", "job_description"],
+    "speculative_question_generation": ["diversified_questions", "interlinking_questions", "job_description"],
+    "assessment_compilation": [
+        "liked_question_styles",
+        "interlinking_questions",
+        "job_description",
+        "num_questions",
+        "speculative_questions",
+        "speculative_tokens",
+    ],
+}
+
+# How this run produced its outputs rather than the outputs themselves: never
+# memoized, so a memo hit does not replay another run's reports
+RUN_REPORT_FIELDS = (
+    "node_sources",
+    "speculation_report",
+    "question_bank_report",
+    "compilation_report",
+    "streaming_report",
+)
+
+# Settings that change a node's output without appearing in the state
+NODE_SETTINGS = {
+    "topic_generation": ["TOPIC_GEN_MODE", "NUM_BROADER_TOPICS", "NUM_SUBTOPICS"],
+    "question_style_diversification": ["PROMPT_TOKEN_BUDGET_QUESTION_STYLE_DIVERSIFICATION"],
+    "interlinking_question_creation": ["PROMPT_TOKEN_BUDGET_INTERLINKING_QUESTION_CREATION"],
+    "speculative_question_generation": [
+        "SPECULATIVE_QUESTIONS_PER_STYLE",
+        "PROMPT_TOKEN_BUDGET_SPECULATIVE_QUESTION_GENERATION",
+    ],
+    "assessment_compilation": [
+        "PROMPT_TOKEN_BUDGET_ASSESSMENT_COMPILATION",
+        "ASSESSMENT_NUM_QUESTIONS",
+        "QUESTION_BANK",
+        "ASSESSMENT_MODE",
+        "ASSESSMENT_CHUNK_SIZE",
+        "ASSESSMENT_DEDUP_SIMILARITY",
+    ],
+}
+
+
+# Modules holding the node prompts and the parsing of their outputs: editing
+# any of them invalidates the memo, as does bumping MEMO_VERSION
+MEMO_CODE_MODULES = ("lywo.nodes", "lywo.prompts", "lywo.structured", "lywo.models")
+MEMO_VERSION = 1
+
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    digest = hashlib.sha256(str(MEMO_VERSION).encode("utf-8"))
+    for module in MEMO_CODE_MODULES:
+        digest.update(inspect.getsource(importlib.import_module(module)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def memo_key(name: str, state: StateType) -> str:
+    from lywo.llm import node_model_settings
+
+    inputs = dump_state({field: state.get(field) for field in NODE_INPUTS[name]})
+    if name == "job_description" and state.get("cosmetic_edit_of"):
+        # A cosmetic edit reuses the analysis of the job description it was made to
+        inputs["job_description"] = state["cosmetic_edit_of"]
+    payload = {
+        "node": name,
+        "inputs": inputs,
+        "settings": {setting: env_str(setting) for setting in NODE_SETTINGS.get(name, [])},
+        "model": node_model_settings(name),
+        "llm": env_str("LYWO_LLM", "bedrock"),
+        "code": code_version(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class NodeMemo:
+    """
+    SQLite store of node outputs keyed by memo_key. Like the LLM response
+    cache, entries older than ttl_seconds are dropped and the least recently
+    used entries are evicted once more than max_entries are stored.
+    """
+
+    def __init__(self, path: str = ".node_memo.sqlite", max_entries: int = 2000,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS node_memo (
+                key TEXT PRIMARY KEY,
+                node TEXT NOT NULL,
+                outputs TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(node_memo)")}
+        if "last_access" not in columns:
+            # Memo files written before entries were evicted
+            self._conn.execute("ALTER TABLE node_memo ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS node_memo_last_access ON node_memo (last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT outputs, created_at FROM node_memo WHERE key = ?", (key,)).fetchone()
+            if not row or now - row[1] > self.ttl_seconds:
+                return None
+            self._conn.execute("UPDATE node_memo SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return load_state(json.loads(row[0]))
+
+    def put(self, key: str, node: str, outputs: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO node_memo (key, node, outputs, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, node, json.dumps(dump_state(outputs), default=str), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        self._conn.execute("DELETE FROM node_memo WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM node_memo").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM node_memo WHERE key IN (SELECT key FROM node_memo ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+
+@lru_cache(maxsize=None)
+def get_node_memo() -> NodeMemo:
+    return NodeMemo(
+        env_str("NODE_MEMO_PATH", ".node_memo.sqlite"),
+        max_entries=env_int("NODE_MEMO_MAX_ENTRIES", 2000),
+        ttl_seconds=env_float("NODE_MEMO_TTL_SECONDS", 7 * 24 * 3600),
+    )
+
+
+def memo_enabled() -> bool:
+    # LLM_CACHE_BYPASS asks for fresh responses, so it skips the memo as well
+    return env_str("NODE_MEMO", "1") != "0" and not env_flag("LLM_CACHE_BYPASS")
+
+
+def memoized(name, node_fn):
+    """
+    Wraps a node so that its outputs are reused whenever the state fields it
+    reads (NODE_INPUTS) are unchanged. Records "memo" or "computed" under
+    state["node_sources"][name].
+    """
+    if name not in NODE_INPUTS:
+        def unmemoized(state: StateType) -> StateType:
+            state = node_fn(state)
+            state.setdefault("node_sources", {})[name] = "computed"
+            return state
+        return unmemoized
+
+    def wrapper(state: StateType) -> StateType:
+        if not memo_enabled():
+            state = node_fn(state)
+            state.setdefault("node_sources", {})[name] = "computed"
+            return state
+
+        key = memo_key(name, state)
+        outputs = get_node_memo().get(key)
+        if outputs is not None:
+            state.update(outputs)
+            state.setdefault("node_sources", {})[name] = "memo"
+            return state
+
+        before = dict(state)
+        state = node_fn(state)
+        outputs = {
+            field: value for field, value in state.items()
+            if field not in before or before[field] is not value
+        }
+        for field in RUN_REPORT_FIELDS:
+            outputs.pop(field, None)
+        get_node_memo().put(key, name, outputs)
+        state.setdefault("node_sources", {})[name] = "computed"
+        return state
+    return wrapper
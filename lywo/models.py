@@ -0,0 +1,131 @@
+from typing import Any, Dict, List, Optional, TypedDict, Union
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+
+class Subtopic(BaseModel):
+    name: str = Field(description="Name of the subtopic")
+    priority: str = Field(description="Priority level of the subtopic (high/medium/low)")
+
+class BroaderTopic(BaseModel):
+    broaderTopic: str = Field(description="Name of the broader topic category")
+    subtopics: List[Subtopic] = Field(description="List of subtopics under this broader topic")
+
+class TopicSet(BaseModel):
+    broaderTopics: List[BroaderTopic] = Field(description="List of all broader topics with their subtopics")
+
+# Shapes used by sharded topic generation before the shards are merged into a TopicSet
+class BroaderTopicNames(BaseModel):
+    broaderTopics: List[str] = Field(description="Names of the broader topic categories")
+
+class SubtopicList(BaseModel):
+    subtopics: List[Subtopic] = Field(description="List of subtopics under one broader topic")
+
+
+class DifficultyCategories(BaseModel):
+    veryHard: List[str] = Field(description="List of topics that are very difficult to master")
+    hard: List[str] = Field(description="List of topics that are hard but not extremely difficult")
+    medium: List[str] = Field(description="List of topics of moderate difficulty")
+    easy: List[str] = Field(description="List of topics that are relatively easier to grasp")
+
+
+class QuestionStyle(BaseModel):
+    style_name: str = Field(description="Explicit and specific name of the assessment style")
+    definition: str = Field(description="Clear description of what this style entails")
+    example: str = Field(description="Concrete example question in this style")
+    assessment_goal: str = Field(description="Specific skills or knowledge being evaluated")
+    suitable_for_topics: List[str] = Field(default_factory=list, description="Relevant sub-topics from the input")
+
+class QuestionStyleSet(BaseModel):
+    question_styles: List[QuestionStyle] = Field(description="List of generated assessment styles")
+
+
+class TopicPair(BaseModel):
+    topics: Union[List[str], str] = Field(description="Two or more related topics")
+    rationale: str = Field(default="", description="Rationale for pairing")
+    assessmentExample: str = Field(default="", description="Brief example of an assessment scenario")
+    jobRelevance: str = Field(default="", description="Relevance to job responsibilities")
+    priority: str = Field(default="medium", description="Priority of the pair (high/medium/low)")
+
+class TopicPairSet(BaseModel):
+    topicPairs: List[TopicPair] = Field(description="List of interlinked topic pairs")
+
+
+class Question(BaseModel):
+    question: str = Field(description="Question text without the options")
+    options: Union[List[str], Dict[str, str], str] = Field(description="Options for the question")
+    correct_answer: str = Field(description="Correct answer for the question")
+    style: str = Field(default="", description="Name of the question style used")
+    topics: Union[List[str], str] = Field(default_factory=list, description="Topics covered by the question")
+
+class QuestionSet(BaseModel):
+    questions: List[Question] = Field(description="List of assessment questions")
+
+
+class WorkflowState(TypedDict, total=False):
+    """
+    State passed between the nodes. Intermediate results are kept as parsed
+    models; prompts render the compact view they need from them.
+    """
+    job_description: str
+    key_responsibilities: str
+    num_broader_topics: int
+    num_subtopics: int
+    num_questions: int
+    topics: TopicSet
+    categorized_topics: DifficultyCategories
+    diversified_questions: QuestionStyleSet
+    liked_question_styles: List[QuestionStyle]
+    disliked_question_styles: List[QuestionStyle]
+    interlinking_questions: TopicPairSet
+    speculative_questions: QuestionSet
+    speculative_tokens: Dict[str, int]
+    final_assessment: QuestionSet
+    style_selection: str
+    run_id: Optional[str]
+    recompute_from: Optional[str]
+    cosmetic_edit: bool
+    cosmetic_edit_of: str
+    node_sources: Dict[str, str]
+    node_timings: Dict[str, float]
+    node_finish_times: Dict[str, float]
+    wall_time: float
+    speculation_report: Dict[str, Any]
+    question_bank_report: Dict[str, int]
+    compilation_report: Dict[str, Any]
+    streaming_report: Dict[str, Dict[str, Any]]
+
+
+# Define the state type
+StateType = WorkflowState
+
+# State fields that hold models, converted to and from plain JSON data by
+# dump_state/load_state for checkpoints, the node memo and output files
+MODEL_FIELDS = {
+    "topics": TypeAdapter(TopicSet),
+    "categorized_topics": TypeAdapter(DifficultyCategories),
+    "diversified_questions": TypeAdapter(QuestionStyleSet),
+    "liked_question_styles": TypeAdapter(List[QuestionStyle]),
+    "disliked_question_styles": TypeAdapter(List[QuestionStyle]),
+    "interlinking_questions": TypeAdapter(TopicPairSet),
+    "speculative_questions": TypeAdapter(QuestionSet),
+    "final_assessment": TypeAdapter(QuestionSet),
+}
+
+
+def dump_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: MODEL_FIELDS[key].dump_python(value, mode="json") if key in MODEL_FIELDS and value is not None else value
+        for key, value in state.items()
+    }
+
+
+def load_state(data: Dict[str, Any]) -> Dict[str, Any]:
+    state = {}
+    for key, value in data.items():
+        if key in MODEL_FIELDS and value is not None:
+            # Older checkpoints stored these fields as JSON strings
+            adapter = MODEL_FIELDS[key]
+            value = adapter.validate_json(value) if isinstance(value, str) else adapter.validate_python(value)
+        state[key] = value
+    return state
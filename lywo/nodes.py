@@ -0,0 +1,980 @@
+import contextvars
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from lywo.config import env_flag, env_float, env_int, env_str
+from lywo.feedback import get_style_selector
+from lywo.llm import get_llm
+from lywo.models import (
+    BroaderTopic,
+    BroaderTopicNames,
+    DifficultyCategories,
+    Question,
+    QuestionSet,
+    QuestionStyle,
+    QuestionStyleSet,
+    StateType,
+    Subtopic,
+    SubtopicList,
+    TopicPair,
+    TopicPairSet,
+    TopicSet,
+)
+from lywo.prompts import PromptBuilder, flat_subtopics, priority_rank, subtopics_view
+from lywo.question_bank import get_question_bank, pair_topics, similarity, terms
+from lywo.streaming import stream_structured, stream_timer, streaming_enabled
+from lywo.structured import parse_structured
+from lywo.telemetry import inc, log_event
+from lywo.tokens import estimate_tokens
+
+
+# langchain is imported on first use so that importing lywo stays cheap
+def from_template(template: str, partial_variables: Dict[str, Any] = None):
+    from langchain_core.prompts import PromptTemplate
+
+    return PromptTemplate.from_template(template, partial_variables=partial_variables or {})
+
+
+@lru_cache(maxsize=None)
+def get_parser(model):
+    from langchain_core.output_parsers import PydanticOutputParser
+
+    return PydanticOutputParser(pydantic_object=model)
+
+
+# Compact prompt views of the parsed state. Nodes keep the models in the state
+# and render only the fields a prompt uses, without indentation.
+def topics_view(topics: TopicSet) -> str:
+    return topics.model_dump_json()
+
+
+def styles_view(styles: List[QuestionStyle]) -> str:
+    # suitable_for_topics is left out: the topic combinations are passed separately
+    return json.dumps(
+        [style.model_dump(exclude={"suitable_for_topics"}) for style in styles], separators=(",", ":")
+    )
+
+
+def pairs_view(pairs: List[TopicPair]) -> str:
+    return json.dumps(
+        [pair.model_dump(include={"topics", "rationale", "jobRelevance"}) for pair in pairs], separators=(",", ":")
+    )
+
+
+def cells_view(cells: List[Tuple[TopicPair, QuestionStyle, int]]) -> str:
+    return json.dumps(
+        [{"topics": pair_topics(pair), "style": style.style_name, "count": count} for pair, style, count in cells],
+        separators=(",", ":"),
+    )
+
+
+def subtopics_section(builder: PromptBuilder, topics: TopicSet, heading: str) -> None:
+    """
+    Adds the subtopics to a prompt in the compact subtopics_view, dropping
+    low-priority ones first when the prompt is over the node's token budget.
+    """
+    builder.fit(
+        "subtopics",
+        flat_subtopics(topics),
+        lambda kept: f"{heading} {subtopics_view(kept)}",
+        lambda item: priority_rank(item[1].priority),
+        full_text=f"{heading} {topics.model_dump_json(indent=2)}",
+    )
+
+
+# Define tools (nodes) as functions
+def job_description_analysis(state: StateType) -> StateType:
+    prompt_template = from_template(
+        "Analyze this job description and extract key responsibilities and skills: {job_description}"
+    )
+    prompt = prompt_template.format(job_description=state["job_description"])
+    result = get_llm().invoke(prompt).content
+    state["key_responsibilities"] = result
+    return state
+
+def topic_generation(state: StateType) -> StateType:
+    prompt_template = from_template(
+        '''You are an expert in analyzing job descriptions and identifying key topics and subtopics that would be important for assessment.
+        Given the following job description, identify exactly {num_broader_topics} broader topics and exactly {num_subtopics} subtopics per broader topic that should be assessed during evaluation.
+
+        Job Description:
+        {job_description}
+
+        Guidelines:
+        1. Generate exactly {num_broader_topics} broader topics
+        2. For each broader topic, identify exactly {num_subtopics} subtopics
+        3. Assign priority levels (high/medium/low) based on importance in the job description
+        4. Include both technical and soft skills where applicable
+        5. Consider both explicit and implicit skill requirements
+        6. Ensure topics are distinct and non-overlapping
+        7. Cover the most important aspects first
+
+        {format_instructions}
+
+        ### Important Notes:
+        1. Respond **only in the JSON format**.
+        2. Do not include additional text, comments, or explanations.
+        3. Ensure the JSON is well-formed and adheres strictly to the schema provided.
+
+        Ensure the output:
+        - Contains exactly {num_broader_topics} broader topics
+        - Each broader topic has exactly {num_subtopics} subtopics
+        - Follows the exact schema provided
+        - Has properly assigned priorities based on job requirements
+        ''',
+        partial_variables= {"format_instructions": get_parser(TopicSet).get_format_instructions()}
+    )
+    num_broader_topics, num_subtopics = topic_counts(state)
+    if env_str("TOPIC_GEN_MODE", "single") == "sharded":
+        state["topics"] = generate_topics_sharded(state["key_responsibilities"], num_broader_topics, num_subtopics)
+        return state
+
+    prompt = prompt_template.format(job_description=state["key_responsibilities"], num_broader_topics=num_broader_topics, num_subtopics=num_subtopics)
+
+    result = get_llm().invoke(prompt).content
+
+    # Parse the response into a Pydantic model and keep it parsed in the state
+    state["topics"] = parse_structured(result, TopicSet, prompt)
+    return state
+
+
+def topic_counts(state: StateType):
+    """
+    Returns (num_broader_topics, num_subtopics), taken from the state when set
+    and from NUM_BROADER_TOPICS / NUM_SUBTOPICS otherwise.
+    """
+    return (
+        int(state.get("num_broader_topics") or env_int("NUM_BROADER_TOPICS", 2)),
+        int(state.get("num_subtopics") or env_int("NUM_SUBTOPICS", 20)),
+    )
+
+
+def _normalize_name(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+def generate_topics_sharded(job_description: str, num_broader_topics: int, num_subtopics: int) -> TopicSet:
+    """
+    Generates a TopicSet in shards: one short call proposes the broader topics,
+    then the subtopics of each broader topic are generated in parallel calls.
+    Subtopics repeated across broader topics are kept only under the first one.
+    """
+    broader_prompt = from_template(
+        '''You are an expert in analyzing job descriptions and identifying key topics that would be important for assessment.
+        Given the following job description, identify exactly {num_broader_topics} broader topics that should be assessed during evaluation.
+
+        Job Description:
+        {job_description}
+
+        Guidelines:
+        1. Generate exactly {num_broader_topics} broader topics
+        2. Include both technical and soft skills where applicable
+        3. Ensure topics are distinct and non-overlapping
+        4. Cover the most important aspects first
+
+        {format_instructions}
+
+        Respond **only in the JSON format**, with no additional text, comments, or explanations.
+        ''',
+        partial_variables= {"format_instructions": get_parser(BroaderTopicNames).get_format_instructions()}
+    ).format(job_description=job_description, num_broader_topics=num_broader_topics)
+
+    result = get_llm().invoke(broader_prompt).content
+    broader_topics = parse_structured(result, BroaderTopicNames, broader_prompt).broaderTopics[:num_broader_topics]
+
+    subtopic_template = from_template(
+        '''You are an expert in analyzing job descriptions and identifying subtopics that would be important for assessment.
+        Given the following job description, identify exactly {num_subtopics} subtopics of the broader topic "{broader_topic}".
+
+        Job Description:
+        {job_description}
+
+        The other broader topics are covered separately, so do not repeat their subtopics: {other_topics}
+
+        Guidelines:
+        1. Generate exactly {num_subtopics} subtopics
+        2. Assign priority levels (high/medium/low) based on importance in the job description
+        3. Consider both explicit and implicit skill requirements
+        4. Ensure subtopics are distinct and non-overlapping
+        5. Cover the most important aspects first
+
+        {format_instructions}
+
+        Respond **only in the JSON format**, with no additional text, comments, or explanations.
+        ''',
+        partial_variables= {"format_instructions": get_parser(SubtopicList).get_format_instructions()}
+    )
+
+    def generate_subtopics(broader_topic: str) -> List[Subtopic]:
+        prompt = subtopic_template.format(
+            job_description=job_description,
+            broader_topic=broader_topic,
+            num_subtopics=num_subtopics,
+            other_topics=", ".join(t for t in broader_topics if t != broader_topic) or "none",
+        )
+        result = get_llm().invoke(prompt).content
+        return parse_structured(result, SubtopicList, prompt).subtopics
+
+    max_workers = max(1, min(len(broader_topics), env_int("TOPIC_GEN_MAX_WORKERS", 8)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # copy_context keeps the calls attributed to this node in the traces
+        futures = [
+            executor.submit(contextvars.copy_context().run, generate_subtopics, broader_topic)
+            for broader_topic in broader_topics
+        ]
+        subtopic_lists = [future.result() for future in futures]
+
+    seen = set()
+    merged = []
+    for broader_topic, subtopics in zip(broader_topics, subtopic_lists):
+        unique = []
+        for subtopic in subtopics:
+            key = _normalize_name(subtopic.name)
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(subtopic)
+        merged.append(BroaderTopic(broaderTopic=broader_topic, subtopics=unique[:num_subtopics]))
+    return TopicSet(broaderTopics=merged)
+
+
+
+def topic_categorization(state: StateType) -> StateType:
+    prompt_template = from_template(
+        """
+        You are an expert in categorizing technical topics by their difficulty level.
+        Given the following list of broader topics and their subtopics from a job description, categorize ONLY the broader topics into difficulty levels.
+
+        Input Topics:
+        {topics}
+
+        Guidelines for categorization:
+
+        Very Hard:
+        - Topics requiring deep theoretical knowledge and extensive practical experience
+        - Topics involving complex mathematical or engineering principles
+        - Topics requiring integration of multiple complex technical domains
+
+        Hard:
+        - Topics requiring significant technical expertise
+        - Topics involving detailed understanding of processes and systems
+        - Topics requiring several years of experience to master
+
+        Medium:
+        - Topics requiring moderate technical knowledge
+        - Topics that can be learned through standard industry experience
+        - Topics involving standard tools and methodologies
+
+        Easy:
+        - Topics that can be learned through basic training
+        - Topics focused on general skills or standard procedures
+        - Topics involving common industry practices or soft skills
+
+        Analyze each broader topic considering:
+        1. The complexity of its subtopics
+        2. The required depth of knowledge
+        3. The learning curve involved
+        4. The interdependencies with other topics
+
+        {format_instructions}
+
+        Important:
+        - Only output the json as in the specified format and no other information
+        - Categorize ONLY the broader topics, not the subtopics
+        - Each topic should appear in exactly one difficulty category
+        - Consider the overall complexity of each topic, not just individual subtopics
+        - Base the classification on industry standards and typical learning curves
+        """,
+        partial_variables= {"format_instructions": get_parser(DifficultyCategories).get_format_instructions()}
+    )
+    prompt= prompt_template.format(topics=topics_view(state["topics"]))
+    result = get_llm().invoke(prompt).content
+    state["categorized_topics"] = parse_structured(result, DifficultyCategories, prompt)
+    return state
+
+
+STYLE_INSTRUCTIONS = '''# Chemical Engineering Assessment Style Generator 
+
+        Generate assessment styles for the job description and sub-topics given under "Input" at the end.
+
+        ## Output Format - Only JSON and no other information.
+        - Sample Output format: 
+        
+        {
+        "question_styles": [
+            {
+            "style_name": "[Explicit and specific name of the assessment style]",
+            "definition": "[Clear description of what this style entails]",
+            "example": "[Concrete example question in this style]",
+            "assessment_goal": "[Specific skills or knowledge being evaluated]",
+            "suitable_for_topics": ["Array of relevant sub-topics from input"]
+            }
+        ]
+        }
+
+        ## Style Naming Conventions: 
+        - Use explicit, descriptive names 
+        - Include the primary assessment method in the name 
+        - Format: [Assessment Type] - [Focus Area] 
+
+        ## Evaluation Guidelines: 
+        1. **Style Names Should:** 
+            - Be self-explanatory and specific 
+            - Indicate both method and content area 
+            - Reflect the complexity level 
+            - Align with job requirements 
+        2. **Definitions Should:** 
+            - Clearly state what the style involves 
+            - Indicate the type of response expected 
+            - Specify any special conditions or requirements 
+            - Be concise yet comprehensive 
+        3. **Examples Should:** 
+            - Be directly related to the style 
+            - Be specific enough to demonstrate the style 
+            - Be realistic and industry-relevant 
+            - Match the job level requirements 
+        4. **Assessment Goals Should:** 
+            - Specify clear evaluation criteria 
+            - Link to job requirements 
+            - Cover both technical and soft skills where relevant 
+            - Be measurable or observable 
+        5. **Topic Matching Should:** 
+            - Only include relevant sub-topics from input 
+            - Be specific rather than general 
+            - Consider prerequisite knowledge 
+            - Align with job requirements 
+
+        ### Important Notes:
+        1. Respond **only in the JSON format**.
+        2. Do not include additional text, comments, or explanations.
+        3. Ensure the JSON is well-formed and adheres strictly to the schema provided.
+        
+        ## Usage Notes: 
+        1. Generate at least one style for each major job requirement and there should be a total 15 different styles generated.
+        2. Ensure styles cover both technical and practical aspects 
+        3. Match complexity to job level 
+        4. Include styles that assess both specific knowledge and broader capabilities 
+        5. Consider company/industry context when creating examples
+'''
+
+
+def question_style_diversification(state: StateType) -> StateType:
+    if "topics" not in state or "job_description" not in state:
+        raise ValueError("Missing 'topics' or 'job_description' in state")
+
+    builder = PromptBuilder("question_style_diversification").static("instructions", STYLE_INSTRUCTIONS)
+    builder.dynamic("job_description", f"## Input\n\n1. **Job Description (JD):** {state['job_description']}")
+    subtopics_section(builder, state["topics"], "2. **Sub-Topics by broader topic and priority** [pick one or few per style]:")
+    prompt = builder.build()
+
+    if streaming_enabled():
+        # Reviewers see each style as soon as it is complete
+        with stream_timer() as timer:
+            state["diversified_questions"] = stream_structured(
+                prompt, QuestionStyleSet, "question_styles", QuestionStyle, "question_style"
+            )
+        state.setdefault("streaming_report", {})["question_style_diversification"] = timer.report()
+        return state
+
+    result = get_llm().invoke(prompt).content
+    state["diversified_questions"] = parse_structured(result, QuestionStyleSet, prompt)
+    return state
+
+def collect_style_feedback(state: StateType) -> StateType:
+    """
+    Splits the generated question styles into liked and disliked ones with the
+    selector named by state["style_selection"] or STYLE_SELECTION (default
+    "interactive"; see lywo.feedback.STYLE_SELECTORS) and stores both in the state.
+    """
+    diversified_questions = state.get("diversified_questions")
+    if not diversified_questions:
+        raise ValueError("No 'diversified_questions' found in the state.")
+
+    # Selectors work on plain dicts, which are also what the preference and queue files store
+    question_styles = [style.model_dump() for style in diversified_questions.question_styles]
+
+    selector = get_style_selector(state.get("style_selection") or env_str("STYLE_SELECTION", "interactive"))
+    liked_styles, disliked_styles = selector(question_styles, state)
+
+    if not liked_styles:
+        raise ValueError("No styles were liked. Please ensure at least one style is liked.")
+
+    # Update the state with liked and disliked styles
+    state["liked_question_styles"] = [QuestionStyle.model_validate(style) for style in liked_styles]
+    state["disliked_question_styles"] = [QuestionStyle.model_validate(style) for style in disliked_styles]
+
+    log_event("style_feedback_collected", liked=len(liked_styles), disliked=len(disliked_styles))
+
+    return state
+
+
+TOPIC_PAIR_INSTRUCTIONS = '''## Task Instructions
+            1. Analyze the subtopics and job description given under "Input" at the end
+            2. Create logical pairs of topics that:
+            - Demonstrate practical knowledge application
+            - Test multiple competencies simultaneously
+            - Reflect real-world problem-solving scenarios
+            - Align with job responsibilities
+            3. For each pair, provide:
+            - Array of two or more related topics
+            - Rationale for pairing
+            - Brief example of assessment scenario
+            - Relevance to job responsibilities
+
+
+             ## Output Format - Only JSON and no other information.
+            - Sample output format:
+
+            {
+            "topicPairs": [{
+            "topics": "",
+            "rationale": "",
+            "assessmentExample": "",
+            "jobRelevance": "",
+            "priority": "high/medium/low"
+            }]
+            }
+            
+
+            ## Example Valid Response Excerpt
+            
+            {
+            "topicPairs": [
+            {
+            "topics": ["Reactor Design", "Heat Exchanger Design"],
+            "rationale": "Tests understanding of thermal management in reaction systems",
+            "assessmentExample": "Design cooling system for exothermic batch reactor including heat exchanger specifications",
+            "jobRelevance": "Directly relates to responsibilities #2, #4, and #6",
+            "priority": "high"
+            },
+            {
+            "topics": ["Process Flow Diagrams", "Material Balance"],
+            "rationale": "Tests ability to develop and analyze complete process systems",
+            "assessmentExample": "Develop PFD and material balance for a multi-step reaction process",
+            "jobRelevance": "Addresses responsibilities #1, #2, and #10",
+            "priority": "high"
+            }
+            ]
+            }
+            
+            ### Important Notes:
+            1. Respond **only in the JSON format**.
+            2. Do not include additional text, comments, or explanations.
+            3. Ensure the JSON is well-formed and adheres strictly to the schema provided.
+
+            ## Constraints
+            - Maximum 10 topic pairs to maintain focus
+            - Each topic should appear in at least one combination
+            - High-priority topics should appear in multiple combinations
+            - Safety-related topics must be included in at least one combination
+
+            ## Expected Topic Coverage
+            The output should ensure:
+            1. All high-priority topics appear in multiple combinations
+            2. Each medium-priority topic appears at least once
+            3. Low-priority topics are included where relevant to job responsibilities
+            4. Safety considerations are integrated into appropriate combinations
+        '''
+
+
+def interlinking_question_creation(state: StateType) -> StateType:
+    builder = PromptBuilder("interlinking_question_creation").static("instructions", TOPIC_PAIR_INSTRUCTIONS)
+    builder.dynamic("job_description", f"## Input\n\n**Job Description:** {state['job_description']}")
+    subtopics_section(builder, state["topics"], "**Sub-Topics by broader topic and priority:**")
+    prompt = builder.build()
+    result = get_llm().invoke(prompt).content
+    state["interlinking_questions"] = parse_structured(result, TopicPairSet, prompt)
+    return state
+
+def num_assessment_questions(state: StateType) -> int:
+    return int(state.get("num_questions") or env_int("ASSESSMENT_NUM_QUESTIONS", 10))
+
+
+def relevant_styles(styles: List[QuestionStyle], pairs: List[TopicPair]) -> List[QuestionStyle]:
+    """
+    The styles suited to at least one topic of the pairs, or every style when
+    none of them lists a matching topic.
+    """
+    pair_names = {_normalize_name(topic) for pair in pairs for topic in pair_topics(pair)}
+    relevant = [
+        style for style in styles
+        if pair_names & {_normalize_name(topic) for topic in style.suitable_for_topics}
+    ]
+    return relevant or list(styles)
+
+
+QUESTION_INSTRUCTIONS = '''## Purpose
+        Purpose: Generate specific assessment Multiple Choice questions based on chosen question styles and topic combinations. 
+        
+        ## Instructions
+        1. Using the question styles and topic combinations given under "Input Parameters" at the end, generate the requested number of questions that:
+            - Follow each question style's approach.
+            - Integrate both topics from the combination.
+            - Align with the job level.
+            - Reflect the industry context.
+            - Map to specific job responsibilities.
+        
+        ## Output Format - Only JSON and no other information.
+        - Sample Output format:
+        {
+            "questions": [
+                {
+                    "question": "[question without options catering to the instructions and input provided]",
+                    "options": "[options for the question]",
+                    "correct_answer": "[correct answer for the question]",
+                    "style": "[style_name]",
+                    "topics": [<topics>]
+                },
+                ...
+            ]
+        }
+        
+        
+        ## Usage Guidelines
+        1. Questions should require integration of both topics.
+        2. Maintain consistency with the selected question styles.
+        3. Include relevant industry context.
+        4. Match complexity to job level.
+        5. Align with rationale provided for topic combinations.
+        
+        ## Validation Criteria
+        1. Question reflects the style definition.
+        2. Both topics are meaningfully incorporated.
+        3. Complexity matches job requirements.
+        4. Context matches industry setting.
+        5. Clear connection to job responsibilities.
+        '''
+
+
+def generate_questions(styles: List[QuestionStyle], pairs: List[TopicPair], job_description: str,
+                       num_questions: int, cells: List[Tuple[TopicPair, QuestionStyle, int]] = None
+                       ) -> Tuple[QuestionSet, int]:
+    """
+    Asks for `num_questions` multiple choice questions in the given styles and
+    returns them with the estimated number of tokens the call used. Only the
+    styles relevant to the pairs are sent, and low-priority pairs are dropped
+    first when the prompt is over the calling node's token budget.
+
+    With `cells`, (pair, style, count) triples over the given pairs and styles,
+    the prompt asks for exactly those combinations instead, and every style and
+    pair is sent.
+    """
+    builder = PromptBuilder().static("instructions", QUESTION_INSTRUCTIONS)
+    builder.dynamic("task", f"## Input Parameters\n\nGenerate a set of {num_questions} questions.")
+    styles_full = json.dumps([style.model_dump() for style in styles], indent=2)
+    if cells is None:
+        styles = relevant_styles(styles, pairs)
+    builder.dynamic("styles", f"**Liked Question Styles:** {styles_view(styles)}",
+                    full_text=f"**Liked Question Styles:** {styles_full}")
+    builder.dynamic("job_description", f"**Job Description:** {job_description}")
+    pairs_full = f"**Topic Combinations:** {json.dumps([pair.model_dump() for pair in pairs], indent=2)}"
+    if cells is None:
+        builder.fit(
+            "topic_pairs",
+            list(pairs),
+            lambda kept: f"**Topic Combinations:** {pairs_view(kept)}",
+            lambda pair: priority_rank(pair.priority),
+            full_text=pairs_full,
+        )
+    else:
+        builder.dynamic("topic_pairs", f"**Topic Combinations:** {pairs_view(pairs)}", full_text=pairs_full)
+        builder.dynamic("cells", f"**Question Cells** (write `count` questions on the topics in the style): {cells_view(cells)}")
+    prompt = builder.build()
+
+    if streaming_enabled():
+        parsed = stream_structured(prompt, QuestionSet, "questions", Question, "question")
+        return parsed, estimate_tokens(prompt) + estimate_tokens(parsed.model_dump_json())
+
+    result = get_llm().invoke(prompt).content
+    return parse_structured(result, QuestionSet, prompt), estimate_tokens(prompt) + estimate_tokens(result)
+
+
+def assessment_compilation(state: StateType) -> StateType:
+    """
+    Generates the final assessment questions based on liked question styles and interlinking topic pairs.
+    When speculative questions were generated during the style review, the
+    questions of the liked styles are used instead of a new LLM call.
+    """
+    # Ensure 'liked_question_styles' exists in the state
+    if "liked_question_styles" not in state:
+        raise ValueError("Missing 'liked_question_styles' in state.")
+
+    with stream_timer() as timer:
+        compile_assessment(state)
+    if streaming_enabled():
+        state.setdefault("streaming_report", {})["assessment_compilation"] = timer.report()
+    return state
+
+
+def compile_assessment(state: StateType) -> None:
+    if state.get("speculative_questions"):
+        state["final_assessment"], state["speculation_report"] = select_speculative_questions(state)
+    elif env_flag("QUESTION_BANK"):
+        state["final_assessment"], state["question_bank_report"] = compile_with_question_bank(state)
+    elif env_str("ASSESSMENT_MODE", "single") == "chunked":
+        state["final_assessment"], state["compilation_report"] = compile_chunked(state)
+    else:
+        state["final_assessment"], _ = generate_questions(
+            state["liked_question_styles"],
+            state["interlinking_questions"].topicPairs,
+            state["job_description"],
+            num_assessment_questions(state),
+        )
+
+    if env_flag("QUESTION_BANK"):
+        get_question_bank().add_questions(
+            state["final_assessment"].questions,
+            state["job_description"],
+            state["topics"],
+            state.get("categorized_topics"),
+        )
+
+
+PAIR_PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+
+def compile_with_question_bank(state: StateType) -> Tuple[QuestionSet, Dict[str, int]]:
+    """
+    Fills the assessment from the question bank first, one question per
+    topic-pair x liked-style cell per pass (high-priority pairs first), and
+    reuses questions under the liked style they matched. Only the cells the
+    bank has no more questions for are sent to the LLM, one call for all of
+    them, and none when every cell is still covered.
+    """
+    bank = get_question_bank()
+    num_questions = num_assessment_questions(state)
+    pairs = sorted(
+        state["interlinking_questions"].topicPairs,
+        key=lambda pair: PAIR_PRIORITY_ORDER.get(_normalize_name(pair.priority), 1),
+    )
+    cells = [(pair, style) for pair in pairs for style in state["liked_question_styles"]]
+
+    reused = []
+    used_ids = set()
+    checked = set()
+    covered = set()
+    uncovered = []
+    open_cells = list(range(len(cells)))
+    while open_cells and len(reused) < num_questions:
+        still_open = []
+        for index in open_cells:
+            if len(reused) >= num_questions:
+                break
+            pair, style = cells[index]
+            checked.add(index)
+            matches = bank.find(pair_topics(pair), style.style_name, limit=1, exclude_ids=used_ids)
+            if not matches:
+                uncovered.append(cells[index])
+                continue
+            match = matches[0]
+            used_ids.add(match["id"])
+            covered.add(index)
+            still_open.append(index)
+            reused.append(Question(
+                question=match["question"],
+                options=match["options"],
+                correct_answer=match["correct_answer"],
+                style=style.style_name,
+                topics=match["topics"],
+            ))
+        open_cells = still_open
+
+    generated = []
+    missing = num_questions - len(reused)
+    if missing > 0 and uncovered:
+        # The missing questions are spread over the uncovered cells
+        counts = [missing // len(uncovered) + (index < missing % len(uncovered)) for index in range(len(uncovered))]
+        question_cells = [(pair, style, count) for (pair, style), count in zip(uncovered, counts) if count]
+        parsed_response, _ = generate_questions(
+            list({style.style_name: style for _, style, _ in question_cells}.values()),
+            list({id(pair): pair for pair, _, _ in question_cells}.values()),
+            state["job_description"],
+            missing,
+            cells=question_cells,
+        )
+        generated = parsed_response.questions[:missing]
+
+    inc("lywo_question_bank_questions_total", len(reused), source="bank")
+    inc("lywo_question_bank_questions_total", len(generated), source="llm")
+    report = {
+        "cells_checked": len(checked),
+        "cells_covered": len(covered),
+        "reused_questions": len(reused),
+        "generated_questions": len(generated),
+    }
+    return QuestionSet(questions=reused + generated), report
+
+
+# Questions per round-robin pass over the pairs in chunked compilation, so that
+# high-priority pairs end up in more questions than the others
+PAIR_WEIGHTS = {"high": 2, "medium": 1, "low": 1}
+
+
+def plan_chunks(pairs: List[TopicPair], styles: List[QuestionStyle], num_questions: int,
+                chunk_size: int) -> List[Tuple[TopicPair, List[QuestionStyle], int]]:
+    """
+    Spreads `num_questions` over the topic-pair x style cells and returns
+    (pair, styles, count) chunks of at most `chunk_size` questions. Every pass
+    visits the pairs in priority order and rotates the styles, so the
+    high-priority pairs are covered first even when there are fewer questions
+    than pairs.
+    """
+    pairs = sorted(pairs, key=lambda pair: PAIR_PRIORITY_ORDER.get(_normalize_name(pair.priority), 1))
+    allocation = [{} for _ in pairs]
+    allocated = 0
+    rotation = 0
+    while allocated < num_questions and pairs:
+        for index, pair in enumerate(pairs):
+            for _ in range(PAIR_WEIGHTS.get(_normalize_name(pair.priority), 1)):
+                if allocated >= num_questions:
+                    break
+                style = styles[(index + rotation) % len(styles)]
+                allocation[index][style.style_name] = allocation[index].get(style.style_name, 0) + 1
+                allocated += 1
+                rotation += 1
+
+    styles_by_name = {style.style_name: style for style in styles}
+    chunks = []
+    for pair, style_counts in zip(pairs, allocation):
+        chunk_styles, count = [], 0
+        for name, style_count in style_counts.items():
+            while style_count:
+                taken = min(style_count, chunk_size - count)
+                if styles_by_name[name] not in chunk_styles:
+                    chunk_styles.append(styles_by_name[name])
+                count += taken
+                style_count -= taken
+                if count == chunk_size:
+                    chunks.append((pair, chunk_styles, count))
+                    chunk_styles, count = [], 0
+        if count:
+            chunks.append((pair, chunk_styles, count))
+    return chunks
+
+
+def dedupe_questions(questions: List[Question], kept: List[Question], threshold: float) -> List[Question]:
+    """
+    Returns the questions whose text is not a near-duplicate (Jaccard similarity
+    of terms >= threshold) of a kept question or of an earlier one in the list.
+    """
+    kept_terms = [terms(question.question) for question in kept]
+    unique = []
+    for question in questions:
+        question_terms = terms(question.question)
+        if any(similarity(question_terms, other) >= threshold for other in kept_terms):
+            continue
+        kept_terms.append(question_terms)
+        unique.append(question)
+    return unique
+
+
+def compile_chunked(state: StateType) -> Tuple[QuestionSet, Dict[str, Any]]:
+    """
+    Generates the assessment in topic-pair x liked-style chunks of at most
+    ASSESSMENT_CHUNK_SIZE (default 5) questions, ASSESSMENT_MAX_WORKERS calls at
+    a time. A failing chunk is retried on its own up to ASSESSMENT_CHUNK_RETRIES
+    times; near-duplicates across chunks are dropped, and up to
+    ASSESSMENT_TOP_UP_ROUNDS (default 2) top-up passes fill the questions that
+    were lost, uncovered high-priority pairs first.
+    """
+    num_questions = num_assessment_questions(state)
+    pairs = state["interlinking_questions"].topicPairs
+    styles = state["liked_question_styles"]
+    chunk_size = max(1, env_int("ASSESSMENT_CHUNK_SIZE", 5))
+    retries = env_int("ASSESSMENT_CHUNK_RETRIES", 2)
+    threshold = env_float("ASSESSMENT_DEDUP_SIMILARITY", 0.8)
+    report = {"chunks": 0, "retries": 0, "failed_chunks": 0, "duplicates_removed": 0, "top_up_questions": 0}
+
+    def generate_chunk(chunk):
+        pair, chunk_styles, count = chunk
+        for attempt in range(retries + 1):
+            try:
+                question_set, _ = generate_questions(chunk_styles, [pair], state["job_description"], count)
+                return question_set.questions[:count], attempt
+            except Exception as e:
+                log_event("assessment_chunk_failed", level=logging.WARNING, attempt=attempt + 1, error=repr(e))
+                if attempt == retries:
+                    raise
+
+    def run_chunks(chunks, kept):
+        max_workers = max(1, min(len(chunks), env_int("ASSESSMENT_MAX_WORKERS", 8)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, generate_chunk, chunk) for chunk in chunks]
+        added = []
+        for (pair, _, _), future in zip(chunks, futures):
+            report["chunks"] += 1
+            if future.exception() is not None:
+                report["failed_chunks"] += 1
+                inc("lywo_assessment_chunks_total", status="failed")
+                continue
+            questions, attempts = future.result()
+            report["retries"] += attempts
+            inc("lywo_assessment_chunks_total", status="retried" if attempts else "ok")
+            unique = dedupe_questions(questions, kept + added, threshold)
+            report["duplicates_removed"] += len(questions) - len(unique)
+            added += unique
+            if unique:
+                covered.add(id(pair))
+        return added
+
+    covered = set()
+    questions = run_chunks(plan_chunks(pairs, styles, num_questions, chunk_size), [])
+
+    high_priority = [pair for pair in pairs if _normalize_name(pair.priority) == "high"]
+    for _ in range(env_int("ASSESSMENT_TOP_UP_ROUNDS", 2)):
+        missing = num_questions - len(questions)
+        if missing <= 0:
+            break
+        uncovered_first = [pair for pair in high_priority if id(pair) not in covered]
+        uncovered_first += [pair for pair in pairs if pair not in uncovered_first]
+        top_up = run_chunks(plan_chunks(uncovered_first[:missing], styles, missing, chunk_size), questions)
+        report["top_up_questions"] += len(top_up)
+        questions += top_up
+        if not top_up:
+            break
+
+    if not questions:
+        raise ValueError("Every assessment chunk failed; no questions were generated.")
+    report["questions"] = len(questions[:num_questions])
+    report["high_priority_pairs_covered"] = f"{sum(id(pair) in covered for pair in high_priority)}/{len(high_priority)}"
+    return QuestionSet(questions=questions[:num_questions]), report
+
+
+def speculative_question_generation(state: StateType) -> StateType:
+    """
+    Pre-generates SPECULATIVE_QUESTIONS_PER_STYLE (default 3) candidate questions
+    for every generated style, one parallel call per style, while the reviewer
+    is still choosing styles.
+    """
+    question_styles = state["diversified_questions"].question_styles
+    pairs = state["interlinking_questions"].topicPairs
+    per_style = env_int("SPECULATIVE_QUESTIONS_PER_STYLE", 3)
+
+    def generate_for_style(style):
+        return generate_questions([style], pairs, state["job_description"], per_style)
+
+    max_workers = max(1, min(len(question_styles), env_int("SPECULATIVE_MAX_WORKERS", 8)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, generate_for_style, style)
+            for style in question_styles
+        ]
+        results = [future.result() for future in futures]
+
+    questions = []
+    tokens = {}
+    for style, (question_set, used_tokens) in zip(question_styles, results):
+        for question in question_set.questions:
+            question.style = style.style_name
+        questions += question_set.questions
+        tokens[style.style_name] = used_tokens
+
+    state["speculative_questions"] = QuestionSet(questions=questions)
+    state["speculative_tokens"] = tokens
+    return state
+
+
+def select_speculative_questions(state: StateType) -> Tuple[QuestionSet, Dict[str, Any]]:
+    """
+    Keeps the speculative questions of the liked styles, taken round-robin across
+    styles up to the assessment size, and generates the shortfall in the liked
+    styles when they have too few. Reports the tokens spent on styles that were
+    not liked.
+    """
+    liked_names = [_normalize_name(style.style_name) for style in state["liked_question_styles"]]
+    by_style = {name: [] for name in liked_names}
+    for question in state["speculative_questions"].questions:
+        if _normalize_name(question.style) in by_style:
+            by_style[_normalize_name(question.style)].append(question)
+
+    num_questions = num_assessment_questions(state)
+    selected = []
+    while len(selected) < num_questions and any(by_style.values()):
+        for name in liked_names:
+            if by_style[name] and len(selected) < num_questions:
+                selected.append(by_style[name].pop(0))
+
+    speculative_used = len(selected)
+    top_up_tokens = 0
+    if speculative_used < num_questions:
+        missing = num_questions - speculative_used
+        top_up, top_up_tokens = generate_questions(
+            state["liked_question_styles"],
+            state["interlinking_questions"].topicPairs,
+            state["job_description"],
+            missing,
+        )
+        selected += top_up.questions[:missing]
+
+    tokens = state.get("speculative_tokens", {})
+    used_tokens = sum(count for name, count in tokens.items() if _normalize_name(name) in by_style)
+    wasted_tokens = sum(tokens.values()) - used_tokens
+    inc("lywo_speculative_tokens_total", used_tokens, outcome="used")
+    inc("lywo_speculative_tokens_total", wasted_tokens, outcome="wasted")
+    report = {
+        "styles_generated": len(tokens),
+        "styles_liked": len(liked_names),
+        "questions_used": speculative_used,
+        "top_up_questions": len(selected) - speculative_used,
+        "top_up_tokens": top_up_tokens,
+        "tokens_total": sum(tokens.values()),
+        "tokens_wasted": wasted_tokens,
+        "wasted_ratio": wasted_tokens / sum(tokens.values()) if tokens and sum(tokens.values()) else 0.0,
+    }
+    return QuestionSet(questions=selected), report
+
+
+# Node name -> node function, shared by the linear graph and the parallel DAG runner
+NODE_FUNCTIONS = {
+    "job_description": job_description_analysis,
+    "topic_generation": topic_generation,
+    "topic_categorization": topic_categorization,
+    "question_style_diversification": question_style_diversification,
+    "collect_style_feedback": collect_style_feedback,
+    "interlinking_question_creation": interlinking_question_creation,
+    "assessment_compilation": assessment_compilation,
+}
+
+# Nodes that must finish before a node can start. topic_categorization,
+# question_style_diversification and interlinking_question_creation only read
+# job_description/topics, so they fan out together after topic_generation and
+# are joined again before the human feedback step.
+NODE_DEPENDENCIES = {
+    "job_description": [],
+    "topic_generation": ["job_description"],
+    "topic_categorization": ["topic_generation"],
+    "question_style_diversification": ["topic_generation"],
+    "interlinking_question_creation": ["topic_generation"],
+    "collect_style_feedback": [
+        "topic_categorization",
+        "question_style_diversification",
+        "interlinking_question_creation",
+    ],
+    "assessment_compilation": ["collect_style_feedback"],
+}
+
+# Speculative mode: the reviewer starts as soon as the styles exist, while
+# interlinking_question_creation and speculative_question_generation keep the
+# LLM busy; assessment_compilation then only filters the pre-generated questions.
+SPECULATIVE_NODE_FUNCTIONS = {
+    **NODE_FUNCTIONS,
+    "speculative_question_generation": speculative_question_generation,
+}
+
+SPECULATIVE_DEPENDENCIES = {
+    "job_description": [],
+    "topic_generation": ["job_description"],
+    "topic_categorization": ["topic_generation"],
+    "question_style_diversification": ["topic_generation"],
+    "interlinking_question_creation": ["topic_generation"],
+    "collect_style_feedback": ["question_style_diversification"],
+    "speculative_question_generation": ["question_style_diversification", "interlinking_question_creation"],
+    "assessment_compilation": [
+        "topic_categorization",
+        "collect_style_feedback",
+        "speculative_question_generation",
+    ],
+}
+
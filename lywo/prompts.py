@@ -0,0 +1,224 @@
+import json
+import logging
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+from lywo.config import env_flag, env_int
+from lywo.models import Subtopic, TopicSet
+from lywo.telemetry import current_node, inc, log_event
+from lywo.tokens import estimate_tokens
+
+T = TypeVar("T")
+
+# Input token budget of each node's prompt (0 = unlimited), overridden by
+# PROMPT_TOKEN_BUDGET_<NODE>. Over budget, low-priority inputs are trimmed first.
+NODE_TOKEN_BUDGETS = {
+    "question_style_diversification": 3000,
+    "interlinking_question_creation": 3000,
+    "speculative_question_generation": 4000,
+    "assessment_compilation": 6000,
+}
+
+# Trim order of subtopics and topic pairs: the highest rank goes first
+PRIORITY_RANKS = {"high": 0, "medium": 1, "low": 2}
+
+# Shortest prefix Bedrock caches for Claude 3.5/3.7 Sonnet; shorter ones are
+# silently sent uncached
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+
+def node_token_budget(node: str) -> int:
+    return env_int(f"PROMPT_TOKEN_BUDGET_{node.upper()}", NODE_TOKEN_BUDGETS.get(node, 0))
+
+
+def priority_rank(priority: str) -> int:
+    return PRIORITY_RANKS.get(str(priority).strip().lower(), PRIORITY_RANKS["medium"])
+
+
+@lru_cache(maxsize=None)
+def compact_text(text: str) -> str:
+    """
+    Strips the indentation and trailing spaces of an instruction block and
+    collapses runs of blank lines.
+    """
+    lines = [line.strip() for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def subtopics_view(subtopics: List[Tuple[str, Subtopic]]) -> str:
+    """
+    (broader topic, subtopic) pairs as compact JSON grouped by broader topic
+    and priority: {"Broader": {"high": ["Subtopic", ...], ...}}.
+    """
+    grouped: Dict[str, Dict[str, List[str]]] = {}
+    for broader, subtopic in subtopics:
+        priority = str(subtopic.priority).strip().lower() or "medium"
+        grouped.setdefault(broader, {}).setdefault(priority, []).append(subtopic.name)
+    return json.dumps(grouped, separators=(",", ":"))
+
+
+def flat_subtopics(topics: TopicSet) -> List[Tuple[str, Subtopic]]:
+    return [(broader.broaderTopic, subtopic) for broader in topics.broaderTopics for subtopic in broader.subtopics]
+
+
+_warned_short_prefix = set()
+
+
+def prompt_caching_enabled() -> bool:
+    return env_flag("PROMPT_CACHING")
+
+
+def prefix_cacheable(static_prefix: str) -> bool:
+    return estimate_tokens(static_prefix) >= PROMPT_CACHE_MIN_TOKENS
+
+
+class Prompt(str):
+    """
+    Prompt text that remembers its static prefix: the instructions every call
+    shares, which can be cached (see cache_marked). Anywhere else it is a
+    plain string.
+    """
+
+    static_prefix = ""
+
+    def __new__(cls, text: str, static_prefix: str = ""):
+        prompt = super().__new__(cls, text)
+        prompt.static_prefix = static_prefix
+        return prompt
+
+
+def cache_marked(prompt):
+    """
+    Turns a Prompt into a message whose static prefix is its own content block
+    marked with cache_control, for Bedrock prompt caching (FakeChatModel
+    simulates it). Prompts whose prefix is too short to be cached, and other
+    prompts, are returned unchanged.
+    """
+    if not isinstance(prompt, Prompt) or not prefix_cacheable(prompt.static_prefix):
+        return prompt
+    from langchain_core.messages import HumanMessage
+
+    return [HumanMessage(content=[
+        {"type": "text", "text": prompt.static_prefix, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": prompt[len(prompt.static_prefix):]},
+    ])]
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, Any]] = {}
+
+
+class PromptBuilder:
+    """
+    Assembles a node's prompt from named sections and counts the tokens of each.
+    Static sections (instructions) are placed before every dynamic one (inputs)
+    so that they form a prefix shared by every call of the node. Each section
+    can also be given the text it replaces, e.g. the pretty-printed JSON a
+    compact view stands in for, which build() reports as tokens saved.
+    """
+
+    def __init__(self, node: str = None):
+        self.node = node or current_node.get() or "unknown"
+        self.budget = node_token_budget(self.node)
+        self.static_sections: List[Tuple[str, str]] = []
+        self.dynamic_sections: List[Tuple[str, str]] = []
+        self.full_tokens = 0
+        self.trimmed = 0
+
+    def static(self, name: str, text: str) -> "PromptBuilder":
+        compact = compact_text(text)
+        self.static_sections.append((name, compact))
+        self.full_tokens += estimate_tokens(text)
+        return self
+
+    def dynamic(self, name: str, text: str, full_text: str = None) -> "PromptBuilder":
+        self.dynamic_sections.append((name, text))
+        self.full_tokens += estimate_tokens(text if full_text is None else full_text)
+        return self
+
+    def tokens(self) -> int:
+        return estimate_tokens(self._text())
+
+    def _text(self) -> str:
+        return "\n\n".join(text for _, text in self.static_sections + self.dynamic_sections)
+
+    def fit(self, name: str, items: List[T], render: Callable[[List[T]], str], rank: Callable[[T], int],
+            full_text: str = None) -> List[T]:
+        """
+        Adds `items` rendered as a dynamic section, dropping items from the
+        highest rank down (the last of equal rank first) until the prompt fits
+        the node's budget. Rank-0 items are always kept. Returns the kept items.
+        """
+        kept = list(items)
+        if self.budget:
+            base_tokens = self.tokens()
+            order = sorted(range(len(items)), key=lambda index: (rank(items[index]), index), reverse=True)
+            dropped = set()
+            for index in order:
+                if base_tokens + estimate_tokens(render(kept)) + 1 <= self.budget or rank(items[index]) == 0:
+                    break
+                dropped.add(index)
+                kept = [item for position, item in enumerate(items) if position not in dropped]
+            self.trimmed += len(dropped)
+        self.dynamic(name, render(kept), full_text)
+        return kept
+
+    def build(self) -> Prompt:
+        static_prefix = "\n\n".join(text for _, text in self.static_sections)
+        dynamic = "\n\n".join(text for _, text in self.dynamic_sections)
+        prompt = Prompt(f"{static_prefix}\n\n{dynamic}" if static_prefix else dynamic,
+                        f"{static_prefix}\n\n" if static_prefix else "")
+
+        sections = {name: estimate_tokens(text) for name, text in self.static_sections + self.dynamic_sections}
+        tokens = estimate_tokens(prompt)
+        for name, section_tokens in sections.items():
+            inc("lywo_prompt_tokens_total", section_tokens, node=self.node, section=name)
+        inc("lywo_prompt_tokens_saved_total", max(0, self.full_tokens - tokens), node=self.node)
+        if self.trimmed:
+            inc("lywo_prompt_trimmed_items_total", self.trimmed, node=self.node)
+        if self.budget and tokens > self.budget:
+            log_event("prompt_over_budget", node=self.node, tokens=tokens, budget=self.budget)
+        prefix_tokens = estimate_tokens(static_prefix)
+        cached = prompt_caching_enabled() and prefix_cacheable(prompt.static_prefix)
+        if prompt_caching_enabled() and not cached and self.node not in _warned_short_prefix:
+            # Sent uncached rather than padded with instructions the node does not need
+            _warned_short_prefix.add(self.node)
+            log_event("prompt_prefix_not_cacheable", level=logging.INFO, node=self.node,
+                      prefix_tokens=prefix_tokens, minimum=PROMPT_CACHE_MIN_TOKENS)
+
+        with _stats_lock:
+            stats = _stats.setdefault(self.node, {
+                "calls": 0, "tokens": 0, "full_tokens": 0, "static_prefix_tokens": 0, "cached_calls": 0, "trimmed": 0,
+                "sections": {},
+            })
+            stats["calls"] += 1
+            stats["tokens"] += tokens
+            stats["full_tokens"] += self.full_tokens
+            stats["static_prefix_tokens"] += prefix_tokens
+            stats["cached_calls"] += int(cached)
+            stats["trimmed"] += self.trimmed
+            for name, section_tokens in sections.items():
+                stats["sections"][name] = stats["sections"].get(name, 0) + section_tokens
+        return prompt
+
+
+def prompt_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Per node: prompts built, tokens sent, tokens the uncompacted prompts would
+    have used, the reduction, tokens in static prefixes, calls whose prefix was
+    sent for prompt caching, inputs trimmed to fit the budget and tokens per
+    section.
+    """
+    with _stats_lock:
+        report = {node: {**stats, "sections": dict(stats["sections"])} for node, stats in _stats.items()}
+    for stats in report.values():
+        stats["saved_tokens"] = max(0, stats["full_tokens"] - stats["tokens"])
+        stats["reduction"] = round(stats["saved_tokens"] / stats["full_tokens"], 3) if stats["full_tokens"] else 0.0
+    return report
+
+
+def reset_prompt_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from lywo.config import env_float, env_str
+from lywo.models import DifficultyCategories, Question, TopicPair, TopicSet
+
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = {"a", "an", "and", "the", "of", "for", "in", "on", "to", "with", "by", "or", "at", "as", "vs"}
+# Hardest first, so a question touching several topics gets its hardest difficulty
+DIFFICULTY_ORDER = ["veryHard", "hard", "medium", "easy"]
+
+
+def terms(text: str) -> set:
+    return {word for word in _WORD.findall(str(text).casefold()) if word not in STOPWORDS}
+
+
+def similarity(left: set, right: set) -> float:
+    """
+    Jaccard similarity of two term sets.
+    """
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def pair_topics(pair: TopicPair) -> List[str]:
+    if isinstance(pair.topics, list):
+        return pair.topics
+    return [topic.strip() for topic in re.split(r",|&|\band\b", pair.topics) if topic.strip()]
+
+
+def question_difficulty(question: Question, topics: Optional[TopicSet],
+                        categories: Optional[DifficultyCategories]) -> Optional[str]:
+    """
+    Maps the question's topics to their broader topics and returns the hardest
+    DifficultyCategories bucket among them.
+    """
+    if categories is None:
+        return None
+    broader_of = {}
+    if topics is not None:
+        for broader in topics.broaderTopics:
+            broader_of[broader.broaderTopic.casefold()] = broader.broaderTopic
+            for subtopic in broader.subtopics:
+                broader_of[subtopic.name.casefold()] = broader.broaderTopic
+    question_topics = question.topics if isinstance(question.topics, list) else [question.topics]
+    broader_names = {broader_of.get(str(topic).casefold(), str(topic)).casefold() for topic in question_topics}
+    for level in DIFFICULTY_ORDER:
+        if broader_names & {name.casefold() for name in getattr(categories, level)}:
+            return level
+    return None
+
+
+class QuestionBank:
+    """
+    SQLite store of generated questions with their topics, style, difficulty
+    and source job description.
+
+    Topic and style terms are kept in an inverted index (question_terms), which
+    narrows each lookup to questions sharing at least one topic term and one
+    style term; candidates are then ranked by Jaccard similarity of their topic
+    and style terms.
+    """
+
+    def __init__(self, path: str = ".question_bank.sqlite", min_similarity: float = 0.5):
+        self.path = path
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY,
+                fingerprint TEXT UNIQUE NOT NULL,
+                question TEXT NOT NULL,
+                options TEXT NOT NULL,
+                correct_answer TEXT NOT NULL,
+                style TEXT NOT NULL,
+                topics TEXT NOT NULL,
+                difficulty TEXT,
+                source_jd TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS question_terms (
+                field TEXT NOT NULL,
+                term TEXT NOT NULL,
+                question_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS question_terms_lookup ON question_terms (field, term);
+            CREATE TABLE IF NOT EXISTS job_descriptions (
+                jd_hash TEXT PRIMARY KEY,
+                job_description TEXT NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def add_questions(self, questions: Iterable[Question], job_description: str,
+                      topics: Optional[TopicSet] = None, categories: Optional[DifficultyCategories] = None) -> int:
+        """
+        Stores questions that are not in the bank yet and returns how many were added.
+        """
+        jd_hash = hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+        added = 0
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO job_descriptions (jd_hash, job_description) VALUES (?, ?)",
+                (jd_hash, job_description),
+            )
+            for question in questions:
+                question_topics = question.topics if isinstance(question.topics, list) else [question.topics]
+                fingerprint = hashlib.sha256(" ".join(sorted(terms(question.question))).encode("utf-8")).hexdigest()
+                cursor = self._conn.execute(
+                    """INSERT OR IGNORE INTO questions
+                    (fingerprint, question, options, correct_answer, style, topics, difficulty, source_jd, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        fingerprint,
+                        question.question,
+                        json.dumps(question.options),
+                        question.correct_answer,
+                        question.style,
+                        json.dumps(question_topics),
+                        question_difficulty(question, topics, categories),
+                        jd_hash,
+                        time.time(),
+                    ),
+                )
+                if cursor.rowcount == 0:
+                    continue
+                question_id = cursor.lastrowid
+                rows = [("topic", term, question_id) for term in terms(" ".join(map(str, question_topics)))]
+                rows += [("style", term, question_id) for term in terms(question.style)]
+                self._conn.executemany("INSERT INTO question_terms (field, term, question_id) VALUES (?, ?, ?)", rows)
+                added += 1
+            self._conn.commit()
+        return added
+
+    def find(self, topics: Sequence[str], style: str, limit: int = 5, exclude_ids: Iterable[int] = ()) -> List[Dict]:
+        """
+        Returns up to `limit` stored questions for the topic combination in the
+        given style, best match first. Both the topic and the style similarity
+        must reach min_similarity.
+        """
+        topic_terms = terms(" ".join(topics))
+        style_terms = terms(style)
+        if not topic_terms or not style_terms:
+            return []
+        excluded = set(exclude_ids)
+        with self._lock:
+            # Candidates share at least one topic term and at least one style term
+            candidate_ids = [row[0] for row in self._conn.execute(
+                f"""SELECT question_id FROM question_terms
+                WHERE field = 'topic' AND term IN ({",".join("?" * len(topic_terms))})
+                AND question_id IN (
+                    SELECT question_id FROM question_terms
+                    WHERE field = 'style' AND term IN ({",".join("?" * len(style_terms))})
+                )
+                GROUP BY question_id ORDER BY COUNT(*) DESC LIMIT 500""",
+                (*topic_terms, *style_terms),
+            )]
+            candidate_ids = [question_id for question_id in candidate_ids if question_id not in excluded]
+            if not candidate_ids:
+                return []
+            rows = self._conn.execute(
+                f"""SELECT id, question, options, correct_answer, style, topics, difficulty, source_jd
+                FROM questions WHERE id IN ({",".join("?" * len(candidate_ids))})""",
+                tuple(candidate_ids),
+            ).fetchall()
+
+        matches = []
+        for row in rows:
+            stored_topics = json.loads(row[5])
+            topic_score = similarity(topic_terms, terms(" ".join(map(str, stored_topics))))
+            style_score = 1.0 if row[4].casefold() == style.casefold() else similarity(style_terms, terms(row[4]))
+            if topic_score >= self.min_similarity and style_score >= self.min_similarity:
+                matches.append((topic_score + style_score, {
+                    "id": row[0],
+                    "question": row[1],
+                    "options": json.loads(row[2]),
+                    "correct_answer": row[3],
+                    "style": row[4],
+                    "topics": stored_topics,
+                    "difficulty": row[6],
+                    "source_jd": row[7],
+                }))
+        matches.sort(key=lambda match: match[0], reverse=True)
+        return [match for _, match in matches[:limit]]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (questions,) = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()
+            (sources,) = self._conn.execute("SELECT COUNT(*) FROM job_descriptions").fetchone()
+        return {"questions": questions, "job_descriptions": sources}
+
+
+@lru_cache(maxsize=None)
+def get_question_bank() -> QuestionBank:
+    return QuestionBank(
+        env_str("QUESTION_BANK_PATH", ".question_bank.sqlite"),
+        min_similarity=env_float("QUESTION_BANK_MIN_SIMILARITY", 0.5),
+    )
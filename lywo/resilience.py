@@ -0,0 +1,329 @@
+import collections
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from lywo.config import env_float, env_int
+from lywo.telemetry import inc, log_event
+from lywo.tokens import estimate_tokens
+
+# Error codes Bedrock (and botocore) use for throttling and for transient failures
+THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException", "Throttling", "RequestLimitExceeded"}
+TRANSIENT_CODES = {
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+    "RequestTimeout",
+}
+
+
+def _error_code(error: Exception) -> str:
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        return response.get("Error", {}).get("Code", "")
+    return type(error).__name__
+
+
+def is_throttle_error(error: Exception) -> bool:
+    code = _error_code(error)
+    return code in THROTTLE_CODES or "throttl" in str(error).lower() or "too many requests" in str(error).lower()
+
+
+def is_transient_error(error: Exception) -> bool:
+    return _error_code(error) in TRANSIENT_CODES or isinstance(error, (ConnectionError, TimeoutError))
+
+
+def chunk_text(chunk) -> str:
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, list):
+        # Some Bedrock models stream content blocks rather than plain text
+        return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return content
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `per_minute` tokens a minute, holding at most a
+    minute's worth. acquire() blocks until the tokens are available; debit()
+    takes tokens without waiting and may leave the bucket in debt.
+    A per_minute of 0 disables the limit.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Condition()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        Takes `amount` tokens (at most the bucket size) and returns the seconds waited.
+        """
+        if not self.per_minute:
+            return 0.0
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) * 60 / self.per_minute
+                self._lock.wait(delay)
+                waited += delay
+
+    def debit(self, amount: float) -> None:
+        if not self.per_minute:
+            return
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit adjusted from the observed throttle rate. A throttled call
+    that pushes the rate over the last `window` calls to throttle_threshold
+    multiplies the limit by decrease_factor, once per generation: calls that
+    started before the last decrease do not decrease it again. After `limit`
+    calls without reaching the threshold the limit grows by one.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 64, decrease_factor: float = 0.5,
+                 throttle_threshold: float = 0.05, window: int = 20):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.throttle_threshold = throttle_threshold
+        self.outcomes = collections.deque(maxlen=window)
+        self.in_flight = 0
+        self.generation = 0
+        self.since_change = 0
+        self.increases = 0
+        self.decreases = 0
+        self._lock = threading.Condition()
+
+    def acquire(self) -> int:
+        """
+        Waits for a free slot and returns the generation to pass to release().
+        """
+        with self._lock:
+            while self.in_flight >= self.limit:
+                self._lock.wait()
+            self.in_flight += 1
+            return self.generation
+
+    def release(self, generation: int, throttled: bool = False) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.outcomes.append(throttled)
+            self.since_change += 1
+            rate = sum(self.outcomes) / len(self.outcomes)
+            if throttled and rate >= self.throttle_threshold and generation == self.generation:
+                if self._set_limit(max(self.minimum, int(self.limit * self.decrease_factor)), rate):
+                    self.decreases += 1
+                    self.generation += 1
+            elif not throttled and rate < self.throttle_threshold and self.since_change >= self.limit:
+                if self._set_limit(min(self.maximum, self.limit + 1), rate):
+                    self.increases += 1
+            self._lock.notify_all()
+
+    def _set_limit(self, limit: int, rate: float) -> bool:
+        self.since_change = 0
+        if limit == self.limit:
+            return False
+        log_event("concurrency_limit", level=logging.DEBUG, limit=limit, previous=self.limit,
+                  throttle_rate=round(rate, 3))
+        self.limit = limit
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "throttle_rate": sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0,
+            }
+
+
+class RateLimits:
+    """
+    The request and token buckets and the concurrency limiter shared by every
+    client of one model.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, limiter: AIMDLimiter):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.limiter = limiter
+        self.retries = 0
+        self.throttles = 0
+        self.wait_s = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, retries: int = 0, throttles: int = 0, wait_s: float = 0.0) -> None:
+        with self._lock:
+            self.retries += retries
+            self.throttles += throttles
+            self.wait_s += wait_s
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {"retries": self.retries, "throttles": self.throttles, "rate_limit_wait_s": round(self.wait_s, 3)}
+        return {**counts, **self.limiter.stats()}
+
+
+_rate_limits: Dict[str, RateLimits] = {}
+_rate_limits_lock = threading.Lock()
+
+
+def get_rate_limits(model_id: str) -> RateLimits:
+    """
+    Rate limits of one model, from LLM_REQUESTS_PER_MINUTE and
+    LLM_TOKENS_PER_MINUTE (0 = unlimited) and the LLM_INITIAL_CONCURRENCY,
+    LLM_MIN_CONCURRENCY and LLM_MAX_CONCURRENCY bounds of its AIMD limiter.
+    """
+    with _rate_limits_lock:
+        if model_id not in _rate_limits:
+            maximum = env_int("LLM_MAX_CONCURRENCY", 32)
+            _rate_limits[model_id] = RateLimits(
+                env_float("LLM_REQUESTS_PER_MINUTE", 0),
+                env_float("LLM_TOKENS_PER_MINUTE", 0),
+                AIMDLimiter(
+                    initial=min(maximum, env_int("LLM_INITIAL_CONCURRENCY", 8)),
+                    minimum=env_int("LLM_MIN_CONCURRENCY", 1),
+                    maximum=maximum,
+                    throttle_threshold=env_float("LLM_THROTTLE_THRESHOLD", 0.05),
+                ),
+            )
+        return _rate_limits[model_id]
+
+
+def rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    with _rate_limits_lock:
+        limits = dict(_rate_limits)
+    return {model_id: model_limits.stats() for model_id, model_limits in limits.items()}
+
+
+def reset_rate_limits() -> None:
+    with _rate_limits_lock:
+        _rate_limits.clear()
+
+
+class ResilientLLM:
+    """
+    Chat model backed by clients built by `factory`. Every call waits for the
+    model's request and token buckets and for a slot under its AIMD concurrency
+    limit, and throttling or transient errors are retried up to max_retries
+    times with full-jitter exponential backoff. Each call in flight holds its
+    own client; clients are built as the limit allows more calls and are reused
+    afterwards, so the limiter is the only cap on concurrency.
+    """
+
+    def __init__(self, factory: Callable[[], Any], model_id: str, max_retries: int = 5,
+                 backoff_base_s: float = 0.5, backoff_max_s: float = 20.0):
+        self.model_id = model_id
+        self.limits = get_rate_limits(model_id)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._factory = factory
+        self._clients = [factory()]
+        self._idle = list(self._clients)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._clients[0], name)
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        client = self._factory()
+        with self._lock:
+            self._clients.append(client)
+        return client
+
+    def _checkin(self, client) -> None:
+        with self._lock:
+            self._idle.append(client)
+
+    def invoke(self, prompt):
+        prompt_tokens = estimate_tokens(str(prompt))
+        for attempt in range(self.max_retries + 1):
+            wait_s = self.limits.requests.acquire(1) + self.limits.tokens.acquire(prompt_tokens)
+            generation = self.limits.limiter.acquire()
+            client = self._checkout()
+            throttled = False
+            try:
+                response = client.invoke(prompt)
+            except Exception as e:
+                throttled = is_throttle_error(e)
+                if not (throttled or is_transient_error(e)) or attempt == self.max_retries:
+                    self.limits.record(throttles=int(throttled), wait_s=wait_s)
+                    raise
+                reason = "throttle" if throttled else "transient"
+            else:
+                usage = getattr(response, "usage_metadata", None) or {}
+                self.limits.tokens.debit(usage.get("output_tokens") or estimate_tokens(response.content))
+                self.limits.record(wait_s=wait_s)
+                return response
+            finally:
+                self._checkin(client)
+                self.limits.limiter.release(generation, throttled)
+            self._backoff(attempt, reason, wait_s)
+
+    def stream(self, prompt):
+        """
+        Yields the response as AIMessageChunks of text. Errors raised before the
+        first chunk are retried like in invoke(); later ones are raised, since
+        part of the response has already been consumed.
+        """
+        from langchain_core.messages import AIMessageChunk
+
+        prompt_tokens = estimate_tokens(str(prompt))
+        for attempt in range(self.max_retries + 1):
+            wait_s = self.limits.requests.acquire(1) + self.limits.tokens.acquire(prompt_tokens)
+            generation = self.limits.limiter.acquire()
+            client = self._checkout()
+            throttled = False
+            completion = []
+            try:
+                for chunk in client.stream(prompt):
+                    text = chunk_text(chunk)
+                    completion.append(text)
+                    yield AIMessageChunk(content=text)
+            except Exception as e:
+                throttled = is_throttle_error(e)
+                if completion or not (throttled or is_transient_error(e)) or attempt == self.max_retries:
+                    self.limits.record(throttles=int(throttled), wait_s=wait_s)
+                    raise
+                reason = "throttle" if throttled else "transient"
+            else:
+                self.limits.tokens.debit(estimate_tokens("".join(completion)))
+                self.limits.record(wait_s=wait_s)
+                return
+            finally:
+                self._checkin(client)
+                self.limits.limiter.release(generation, throttled)
+            self._backoff(attempt, reason, wait_s)
+
+    def _backoff(self, attempt: int, reason: str, wait_s: float) -> None:
+        delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+        self.limits.record(retries=1, throttles=int(reason == "throttle"), wait_s=wait_s + delay)
+        inc("lywo_llm_retries_total", model=self.model_id, reason=reason)
+        log_event("llm_retry", level=logging.DEBUG, model=self.model_id, reason=reason, attempt=attempt + 1,
+                  delay_s=round(delay, 3))
+        time.sleep(delay)
@@ -0,0 +1,30 @@
+# Sample job description used when no batch input is given
+SAMPLE_JOB_DESCRIPTION = """
+Job details-Chemical engineer
+Acharya Group
+Area: Ambernath, Maharashtra, India
+Experience: 4-8 Years
+Role: Manager-Design Engineering/Process Engineering
+Industry type: Specialty Chemicals, Pharmaceuticals, agro-chemicals, intermediates plants
+Employment: Fulltime/Contract
+Key Responsibilities
+Collecting plant data and providing design feedback to team
+Performing material balance, energy balance for the plant along with utility calculations.
+Determining sizes and specifications for equipment and instruments before procurement.
+Designing of equipment like agitator, condenser & heat exchanger, pumping system, batch reactor, distillation columns.
+Ability to setup or evaluate processes in product development lab (for studying or optimizing processes in small scale level before scaling the process upto plant level)
+Providing solutions for optimization/improvement of the process and energy consumptions
+Support operation team in improving plant performance in various fields (safety/environment, quality, capacity, costs)
+Performance testing and start up support at various plant sites
+Trouble shooting, debottlenecking experience in unit operations such as distillation, heat transfer, filtration, adsorption columns, autoclaves, gas sparged reactors etc.
+Preparation of process flow diagrams (PFD) development.
+Experience in running or understanding simulation software such as Aspen
+Basic knowledge in running codes in Matlab/python
+Should be an expert in using Excel
+Proficient written and spoken English and strong communication skills
+Experience and knowledge to effectively communicate issues and ideas
+Role: Manager-Design Engineering/Process Engineering
+Industry type: Specialty Chemicals, Pharmaceuticals, agro chemicals, pigments, intermediates plants
+Employment: Fulltime/Contract
+Education: B.Tech/B.E./M.Tech/M.E./M.S. in Chemical Engineering with experience of working in organic chemical manufacturing companies (such as bulk drugs, agro chemicals, specialty, pigments, intermediates plants)
+"""
@@ -0,0 +1,342 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from lywo.config import env_int, env_str
+from lywo.feedback import STYLE_SELECTORS, FeedbackPending, load_feedback_request, submit_feedback
+from lywo.graph import run_workflow
+from lywo.models import dump_state
+from lywo.telemetry import inc, log_event, observe, render_prometheus
+
+# Result fields copied into the stored metrics of a run
+RUN_METRIC_FIELDS = ("wall_time", "node_timings", "node_sources", "speculation_report", "question_bank_report",
+                     "compilation_report", "streaming_report")
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of workflow jobs, their results and per-run metrics.
+    Jobs survive a restart: any job a previous process left "running" is
+    queued again when the queue is opened, and resumes from its checkpoints.
+
+    A job moves through queued -> running -> completed | failed |
+    awaiting_feedback; submitting feedback puts it back in the queue.
+    """
+
+    def __init__(self, path: str = ".jobs.sqlite"):
+        self.path = path
+        self._lock = threading.Condition()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                job_description TEXT NOT NULL,
+                style_selection TEXT NOT NULL,
+                submitted_at REAL NOT NULL,
+                queued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                metrics TEXT,
+                error TEXT
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted_at)")
+        recovered = self._conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+        self._conn.commit()
+        if recovered:
+            log_event("jobs_recovered", count=recovered)
+
+    def submit(self, job_description: str, style_selection: str) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, job_description, style_selection, submitted_at, queued_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, job_description, style_selection, now, now),
+            )
+            self._conn.commit()
+            self._lock.notify()
+        return job_id
+
+    def claim(self, timeout: float = None) -> Optional[Dict[str, Any]]:
+        """
+        Marks the oldest queued job as running and returns it, waiting up to
+        `timeout` seconds for one to arrive.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY submitted_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        (time.time(), row["id"]),
+                    )
+                    self._conn.commit()
+                    return self._get(row["id"])
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._lock.wait(remaining)
+
+    def finish(self, job_id: str, status: str, result: Dict[str, Any] = None, metrics: Dict[str, Any] = None,
+               error: str = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, metrics = ?, error = ? WHERE id = ?",
+                (status, time.time(), json.dumps(result, default=str) if result is not None else None,
+                 json.dumps(metrics, default=str) if metrics is not None else None, error, job_id),
+            )
+            self._conn.commit()
+
+    def requeue(self, job_id: str) -> bool:
+        """
+        Queues a job that is waiting for feedback again. Returns False if the
+        job is not waiting for feedback.
+        """
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', queued_at = ? WHERE id = ? AND status = 'awaiting_feedback'",
+                (time.time(), job_id),
+            ).rowcount
+            self._conn.commit()
+            if updated:
+                self._lock.notify()
+        return bool(updated)
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ("result", "metrics"):
+            job[field] = json.loads(job[field]) if job[field] is not None else None
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._get(job_id)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+@lru_cache(maxsize=None)
+def get_job_queue() -> JobQueue:
+    return JobQueue(env_str("JOB_QUEUE_PATH", ".jobs.sqlite"))
+
+
+def run_job(job_queue: JobQueue, job: Dict[str, Any]) -> str:
+    """
+    Runs one claimed job through the workflow, with the job id as the
+    checkpoint run_id, and stores its outcome. Returns the job's new status.
+    """
+    initial_state = {
+        "job_description": job["job_description"],
+        "run_id": job["id"],
+        "style_selection": job["style_selection"],
+    }
+    start = time.perf_counter()
+    try:
+        final_state = run_workflow(initial_state)
+    except FeedbackPending:
+        status = "awaiting_feedback"
+        job_queue.finish(job["id"], status)
+    except Exception as e:
+        status = "failed"
+        log_event("job_failed", level=logging.ERROR, job_id=job["id"], error=repr(e))
+        job_queue.finish(job["id"], status, error=repr(e))
+    else:
+        status = "completed"
+        metrics = {field: final_state[field] for field in RUN_METRIC_FIELDS if field in final_state}
+        metrics.update({
+            "run_s": time.perf_counter() - start,
+            "queue_wait_s": job["started_at"] - job["queued_at"],
+            "total_s": time.time() - job["submitted_at"],
+            "attempts": job["attempts"],
+        })
+        job_queue.finish(job["id"], status, result=dump_state(final_state), metrics=metrics)
+        observe("lywo_service_job_seconds", metrics["total_s"])
+    observe("lywo_service_queue_wait_seconds", job["started_at"] - job["queued_at"])
+    inc("lywo_service_jobs_total", status=status)
+    return status
+
+
+class WorkerPool:
+    """
+    Threads that take jobs off the queue and run them. The workflow mostly
+    waits on the model, so threads share one process's LLM clients, caches
+    and rate limits instead of each worker process building its own.
+    """
+
+    def __init__(self, job_queue: JobQueue, workers: int = 4):
+        self.job_queue = job_queue
+        self.workers = workers
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            job = self.job_queue.claim(timeout=0.5)
+            if job is not None:
+                run_job(self.job_queue, job)
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"lywo-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """
+        Stops taking new jobs and waits for the running ones to finish.
+        """
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    HTTP API of the job service:
+
+        POST /jobs                  {"job_description": ..., "style_selection": ...} -> {"id": ...}
+        GET  /jobs/<id>             status, result and metrics of a job
+        GET  /jobs/<id>/feedback    the question styles a suspended job needs feedback on
+        POST /jobs/<id>/feedback    {"liked": [...], "disliked": [...]}, resumes the job
+        GET  /stats                 job counts by status
+        GET  /metrics               Prometheus text metrics
+    """
+
+    server_version = "lywo"
+
+    @property
+    def job_queue(self) -> JobQueue:
+        return self.server.job_queue
+
+    def log_message(self, format, *args) -> None:
+        log_event("http_request", level=logging.DEBUG, request=format % args)
+
+    def _send(self, status: int, body: Any, content_type: str = "application/json") -> None:
+        data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, {"error": message})
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object.")
+        return body
+
+    def _route(self):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        job = None
+        if len(parts) >= 2 and parts[0] == "jobs":
+            job = self.job_queue.get(parts[1])
+        return parts, job
+
+    def do_GET(self) -> None:
+        parts, job = self._route()
+        if parts == ["stats"]:
+            self._send(200, {"jobs": self.job_queue.counts(), "workers": self.server.workers})
+        elif parts == ["metrics"]:
+            self._send(200, render_prometheus(), content_type="text/plain; version=0.0.4")
+        elif len(parts) in (2, 3) and parts[0] == "jobs" and job is None:
+            self._error(404, f"Unknown job '{parts[1]}'")
+        elif len(parts) == 2 and parts[0] == "jobs":
+            self._send(200, job)
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "feedback":
+            if job["status"] != "awaiting_feedback":
+                self._error(409, f"Job '{job['id']}' is {job['status']}, not awaiting_feedback")
+            else:
+                try:
+                    self._send(200, load_feedback_request(job["id"]))
+                except (OSError, ValueError):
+                    self._error(404, f"No feedback request found for job '{job['id']}'")
+        else:
+            self._error(404, f"No route for GET {self.path}")
+
+    def do_POST(self) -> None:
+        parts, job = self._route()
+        try:
+            body = self._read_json()
+        except ValueError as e:
+            self._error(400, f"Invalid request body: {e}")
+            return
+
+        if parts == ["jobs"]:
+            job_description = body.get("job_description")
+            style_selection = body.get("style_selection") or env_str("SERVICE_STYLE_SELECTION", "queue")
+            if not isinstance(job_description, str) or not job_description.strip():
+                self._error(400, "'job_description' must be a non-empty string")
+            elif style_selection == "interactive":
+                self._error(400, "The 'interactive' style selection needs a terminal; use 'queue' instead")
+            elif not isinstance(style_selection, str) or style_selection not in STYLE_SELECTORS:
+                self._error(400, f"Unknown style selection '{style_selection}'. "
+                                 f"Expected one of: {', '.join(name for name in STYLE_SELECTORS if name != 'interactive')}")
+            else:
+                self._send(202, {"id": self.job_queue.submit(job_description, style_selection), "status": "queued"})
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "feedback":
+            if job is None:
+                self._error(404, f"Unknown job '{parts[1]}'")
+            elif job["status"] != "awaiting_feedback":
+                self._error(409, f"Job '{job['id']}' is {job['status']}, not awaiting_feedback")
+            elif not body.get("liked"):
+                self._error(400, "'liked' must list at least one style name")
+            else:
+                submit_feedback(job["id"], body["liked"], body.get("disliked", []))
+                self.job_queue.requeue(job["id"])
+                self._send(202, {"id": job["id"], "status": "queued"})
+        else:
+            self._error(404, f"No route for POST {self.path}")
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8080, workers: int = None,
+                job_queue: JobQueue = None) -> ThreadingHTTPServer:
+    """
+    Builds the HTTP server and starts its worker pool (SERVICE_WORKERS
+    threads by default). Port 0 picks a free port; call server.shutdown()
+    and server.pool.stop() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.job_queue = job_queue or get_job_queue()
+    server.workers = workers or env_int("SERVICE_WORKERS", 4)
+    server.pool = WorkerPool(server.job_queue, server.workers)
+    server.pool.start()
+    return server
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, workers: int = None) -> None:
+    server = make_server(host, port, workers)
+    log_event("service_started", host=host, port=server.server_address[1], workers=server.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.stop()
@@ -0,0 +1,190 @@
+import asyncio
+import contextlib
+import contextvars
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Type
+
+from pydantic import BaseModel, ValidationError
+
+from lywo.config import env_flag
+from lywo.llm import get_llm
+from lywo.models import StateType
+from lywo.structured import ModelT, parse_structured
+from lywo.telemetry import current_node, observe
+
+# Callback receiving each streamed item as {"node", "kind", "item"}
+StreamListener = Callable[[Dict[str, Any]], None]
+
+_listener: contextvars.ContextVar = contextvars.ContextVar("lywo_stream_listener", default=None)
+_timer: contextvars.ContextVar = contextvars.ContextVar("lywo_stream_timer", default=None)
+
+
+class JsonArrayStreamer:
+    """
+    Incremental parser for the array under `key` in a JSON object that arrives
+    in pieces. feed() returns the elements that were completed by the new text;
+    each character is scanned only once.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.buffer = ""
+        self.position = None  # Scan position once the array has been found
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.item_start = None
+        self.closed = False
+
+    def feed(self, text: str) -> List[Any]:
+        self.buffer += text
+        if self.position is None:
+            key_at = self.buffer.find(f'"{self.key}"')
+            array_at = self.buffer.find("[", key_at) if key_at != -1 else -1
+            if array_at == -1:
+                return []
+            self.position = array_at + 1
+
+        items = []
+        while self.position < len(self.buffer) and not self.closed:
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                if self.depth == 0:
+                    self.item_start = self.position
+                self.depth += 1
+            elif char in "}]":
+                if self.depth == 0:
+                    self.closed = True  # End of the array
+                else:
+                    self.depth -= 1
+                    if self.depth == 0:
+                        try:
+                            items.append(json.loads(self.buffer[self.item_start:self.position + 1]))
+                        except json.JSONDecodeError:
+                            pass  # Left to the repair of the full response
+            self.position += 1
+        return items
+
+
+class StreamTimer:
+    """
+    Collects the items streamed by one node: how many, and how long after the
+    timer started the first one arrived.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_item_s = None
+        self.items = 0
+        self._lock = threading.Lock()
+
+    def item(self) -> None:
+        with self._lock:
+            if self.first_item_s is None:
+                self.first_item_s = time.perf_counter() - self.start
+            self.items += 1
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "first_item_s": self.first_item_s,
+            "total_s": time.perf_counter() - self.start,
+        }
+
+
+@contextlib.contextmanager
+def streaming_to(listener: StreamListener):
+    """
+    Sends the items streamed by the nodes run inside the block to `listener`.
+    """
+    token = _listener.set(listener)
+    try:
+        yield
+    finally:
+        _listener.reset(token)
+
+
+@contextlib.contextmanager
+def stream_timer():
+    timer = StreamTimer()
+    token = _timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _timer.reset(token)
+        node = current_node.get()
+        if timer.first_item_s is not None:
+            observe("lywo_stream_first_item_seconds", timer.first_item_s, node=node)
+        observe("lywo_stream_total_seconds", time.perf_counter() - timer.start, node=node)
+
+
+def streaming_enabled() -> bool:
+    return env_flag("STREAMING") or _listener.get() is not None
+
+
+def emit(kind: str, item: BaseModel) -> None:
+    timer = _timer.get()
+    if timer is not None:
+        timer.item()
+    listener = _listener.get()
+    if listener is not None:
+        listener({"node": current_node.get(), "kind": kind, "item": item})
+
+
+def stream_structured(prompt: str, model: Type[ModelT], key: str, item_model: Type[BaseModel], kind: str) -> ModelT:
+    """
+    Streams the response to `prompt` and emits every element of its `key`
+    array as an `item_model` as soon as the element is complete. The full
+    response is then parsed into `model` as usual (with repair and re-ask),
+    so the returned object does not depend on what was emitted.
+    """
+    streamer = JsonArrayStreamer(key)
+    parts = []
+    for chunk in get_llm().stream(prompt):
+        parts.append(chunk.content)
+        for element in streamer.feed(chunk.content):
+            try:
+                emit(kind, item_model.model_validate(element))
+            except ValidationError:
+                pass  # Skipped here; the final parse decides what to keep
+    return parse_structured("".join(parts), model, prompt)
+
+
+async def stream_workflow(initial_state: StateType) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Runs the workflow in a worker thread and yields each streamed item event as
+    it arrives, followed by {"kind": "final_state", "state": ...}.
+    """
+    from lywo.graph import run_workflow
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def run() -> StateType:
+        with streaming_to(lambda event: loop.call_soon_threadsafe(events.put_nowait, event)):
+            return run_workflow(initial_state)
+
+    task = asyncio.ensure_future(asyncio.to_thread(run))
+    while True:
+        getter = asyncio.ensure_future(events.get())
+        done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+        if getter in done:
+            yield getter.result()
+            continue
+        getter.cancel()
+        while not events.empty():
+            yield events.get_nowait()
+        yield {"kind": "final_state", "state": task.result()}
+        return
+
@@ -0,0 +1,252 @@
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from lywo.llm import get_llm
+from lywo.telemetry import log_event, record_parse, record_retry
+from lywo.tokens import estimate_tokens
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+# Re-ask prompt: only the validation error, the schema and the broken fragment,
+# never the original (long) node prompt
+REASK_TEMPLATE = """The JSON below failed validation with this error:
+{error}
+
+It must match this JSON schema:
+{schema}
+
+Broken JSON:
+{fragment}
+
+Return only the corrected JSON, with no additional text, comments, or explanations."""
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "parses": 0,
+    "clean": 0,
+    "extracted": 0,
+    "repaired": 0,
+    "reasks": 0,
+    "reask_successes": 0,
+    "failures": 0,
+    "dropped_items": 0,
+    "calls_saved": 0,
+    "tokens_saved": 0,
+}
+
+
+def _count(**increments: int) -> None:
+    with _stats_lock:
+        for key, value in increments.items():
+            _stats[key] += value
+
+
+def structured_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def extract_json(text: str) -> str:
+    """
+    Strips code fences and any text around the JSON object or array. Each
+    opening bracket is tried in turn and the first span that parses, or can be
+    repaired, is returned, so that braces in surrounding prose are skipped. If
+    the JSON never closes (a truncated response), everything from its start is
+    returned so that repair_json can close it. When no span works the first
+    one is returned.
+    """
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [i for i, c in enumerate(text) if c in "{["]
+    if not starts:
+        return text.strip()
+
+    for start in starts:
+        span = _json_span(text, start)
+        try:
+            json.loads(span)
+            return span
+        except json.JSONDecodeError:
+            if repair_json(span) is not None:
+                return span
+    return _json_span(text, starts[0])
+
+
+def _json_span(text: str, start: int) -> str:
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            depth += 1
+        elif c in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:].strip()
+
+
+# Cut-backs tried per open container of a truncated document, last comma first
+REPAIR_MAX_CUTS = 3
+
+
+def _closers(stack) -> str:
+    return "".join("}" if opener == "{" else "]" for opener, _ in reversed(stack))
+
+
+def repair_candidates(text: str):
+    """
+    Yields (decoded value, dropped elements) for `text` after fixing trailing
+    commas and truncation, most complete first. A truncated document is closed
+    where it stops unless it ends inside a string; after that it is cut back to
+    the last REPAIR_MAX_CUTS complete elements of each container still open at
+    the end, innermost first, and the open brackets are closed. Dropped
+    elements counts the elements of the cut container that were lost: the
+    partial one at the end and any complete ones after the cut.
+    """
+    text = _TRAILING_COMMA.sub(r"\1", text)
+    stack = []  # (bracket, container id)
+    containers = 0
+    in_string = False
+    escape = False
+    commas = {}  # container id -> positions of its top-level commas
+    for i, c in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            continue
+        if c == '"':
+            in_string = True
+        elif c in "{[":
+            containers += 1
+            stack.append((c, containers))
+        elif c in "}]":
+            if stack:
+                stack.pop()
+        elif c == "," and stack:
+            commas.setdefault(stack[-1][1], []).append(i)
+
+    def candidates():
+        yield (text, 0) if in_string else (text + _closers(stack), 0)
+        # A container open at the end had the same enclosing brackets at each
+        # of its commas, so the stack up to it closes any cut inside it
+        for depth in range(len(stack) - 1, -1, -1):
+            positions = commas.get(stack[depth][1], [])
+            for later, i in enumerate(reversed(positions[-REPAIR_MAX_CUTS:])):
+                yield text[:i] + _closers(stack[:depth + 1]), later + 1
+
+    for candidate, dropped in candidates():
+        try:
+            yield json.loads(_TRAILING_COMMA.sub(r"\1", candidate)), dropped
+        except json.JSONDecodeError:
+            continue
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """
+    Returns the most complete repaired value for `text`, or None when it cannot
+    be repaired.
+    """
+    return next((value for value, _ in repair_candidates(text)), None)
+
+
+def _parse_locally(text: str, model: Type[ModelT]):
+    """
+    Returns (parsed model or None, how it was obtained, error message).
+    A repair that cut elements off a truncated response is counted under
+    "dropped_items" and logged.
+    """
+    try:
+        return model.model_validate_json(text), "clean", None
+    except ValidationError as e:
+        error = str(e)
+
+    fragment = extract_json(text)
+    try:
+        return model.model_validate(json.loads(fragment)), "extracted", None
+    except json.JSONDecodeError as e:
+        error = str(e)
+    except ValidationError as e:
+        return None, None, str(e)
+
+    # The most complete candidate's error is the one worth re-asking with
+    repair_error = None
+    for data, dropped in repair_candidates(fragment):
+        try:
+            parsed = model.model_validate(data)
+        except ValidationError as e:
+            repair_error = repair_error or str(e)
+            continue
+        if dropped:
+            _count(dropped_items=dropped)
+            log_event("structured_output_truncated", level=logging.WARNING, model=model.__name__,
+                      dropped_items=dropped)
+        return parsed, "repaired", None
+    return None, None, repair_error or error
+
+
+def parse_structured(text: str, model: Type[ModelT], prompt: str = None, max_reasks: int = 1) -> ModelT:
+    """
+    Parses an LLM response into `model`, shared by all nodes.
+
+    The response is parsed as is, then with code fences and surrounding text
+    stripped, then after local repair of trailing commas and truncation. If it
+    still does not validate and the original prompt is given, a short re-ask with
+    only the validation error and the whole broken fragment is sent, up to
+    max_reasks times. Raises ValueError when every step fails.
+    """
+    _count(parses=1)
+    parsed, how, error = _parse_locally(text, model)
+    # A full regeneration would have repeated the original prompt and response
+    regeneration_tokens = estimate_tokens(prompt or "") + estimate_tokens(text)
+    if parsed is not None:
+        _count(**{how: 1})
+        record_parse(model.__name__, how)
+        if how != "clean":
+            _count(calls_saved=1, tokens_saved=regeneration_tokens)
+        return parsed
+
+    fragment = extract_json(text)
+    for _ in range(max_reasks if prompt is not None else 0):
+        reask_prompt = REASK_TEMPLATE.format(
+            error=error,
+            schema=json.dumps(model.model_json_schema(), separators=(",", ":")),
+            fragment=fragment,
+        )
+        _count(reasks=1)
+        record_retry("reask")
+        reask_result = get_llm().invoke(reask_prompt).content
+        parsed, _, error = _parse_locally(reask_result, model)
+        if parsed is not None:
+            reask_tokens = estimate_tokens(reask_prompt) + estimate_tokens(reask_result)
+            _count(reask_successes=1, tokens_saved=max(0, regeneration_tokens - reask_tokens))
+            record_parse(model.__name__, "reasked")
+            return parsed
+        fragment = extract_json(reask_result)
+
+    _count(failures=1)
+    record_parse(model.__name__, "failed")
+    raise ValueError(f"Failed to parse response as {model.__name__}: {error}\nResponse: {text}")
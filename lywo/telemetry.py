@@ -0,0 +1,280 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from lywo.config import env_str
+from lywo.models import StateType
+from lywo.tokens import estimate_tokens
+
+logger = logging.getLogger("lywo")
+
+# Node and run the current thread is working for, attached to every event
+current_node = contextvars.ContextVar("current_node", default=None)
+current_run = contextvars.ContextVar("current_run", default=None)
+
+# USD per 1K (input, output) tokens on Bedrock
+MODEL_PRICES = {
+    "anthropic.claude-3-5-sonnet-20240620-v1:0": (0.003, 0.015),
+    "anthropic.claude-3-5-sonnet-20241022-v2:0": (0.003, 0.015),
+    "anthropic.claude-3-5-haiku-20241022-v1:0": (0.0008, 0.004),
+    "anthropic.claude-3-haiku-20240307-v1:0": (0.00025, 0.00125),
+}
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+_metric_types: Dict[str, str] = {}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        payload.update(getattr(record, "event", {}))
+        return json.dumps(payload, default=str)
+
+
+def configure_logging(level: str = None, fmt: str = None) -> None:
+    """
+    Sets up the "lywo" logger from LYWO_LOG_LEVEL (default INFO) and
+    LYWO_LOG_FORMAT ("text" or "json"). Raw LLM responses are logged at DEBUG.
+    """
+    level = (level or env_str("LYWO_LOG_LEVEL", "INFO")).upper()
+    fmt = fmt or env_str("LYWO_LOG_FORMAT", "text")
+    handler = logging.StreamHandler()
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def log_event(message: str, level: int = logging.INFO, **fields) -> None:
+    fields.setdefault("node", current_node.get())
+    fields.setdefault("run_id", current_run.get())
+    if logger.isEnabledFor(level):
+        text = " ".join(f"{key}={value}" for key, value in fields.items() if value is not None)
+        logger.log(level, f"{message} {text}", extra={"event": {"event": message, **fields}})
+
+
+def _labels(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    with _metrics_lock:
+        _metric_types.setdefault(name, "counter")
+        key = (name, _labels(labels))
+        _metrics[key] = _metrics.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """
+    Records one observation of a summary metric as <name>_sum and <name>_count.
+    """
+    with _metrics_lock:
+        _metric_types.setdefault(name, "summary")
+        for suffix, amount in (("_sum", value), ("_count", 1)):
+            key = (name + suffix, _labels(labels))
+            _metrics[key] = _metrics.get(key, 0) + amount
+
+
+def metrics_snapshot() -> Dict[str, float]:
+    with _metrics_lock:
+        return {
+            name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else ""): value
+            for (name, labels), value in sorted(_metrics.items())
+        }
+
+
+def render_prometheus() -> str:
+    """
+    Returns all metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    with _metrics_lock:
+        items = sorted(_metrics.items())
+        types = dict(_metric_types)
+    declared = set()
+    for (name, labels), value in items:
+        base = name[:-4] if name.endswith("_sum") else name[:-6] if name.endswith("_count") else name
+        family = base if base in types else name
+        if family not in declared:
+            lines.append(f"# TYPE {family} {types.get(family, 'untyped')}")
+            declared.add(family)
+        label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+        lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# LLM metrics summed per node by node_llm_report
+NODE_REPORT_FIELDS = {
+    "lywo_llm_requests_total": "calls",
+    "lywo_llm_duration_seconds_sum": "llm_seconds",
+    "lywo_llm_prompt_tokens_total": "prompt_tokens",
+    "lywo_llm_completion_tokens_total": "completion_tokens",
+    "lywo_llm_cost_usd_total": "cost_usd",
+}
+
+
+def node_llm_report() -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the LLM calls, time spent in them, tokens, estimated cost and models
+    used per node, from the metrics recorded so far.
+    """
+    with _metrics_lock:
+        items = list(_metrics.items())
+    report = {}
+    for (name, labels), value in items:
+        labels = dict(labels)
+        field = NODE_REPORT_FIELDS.get(name)
+        if field is None or "node" not in labels:
+            continue
+        entry = report.setdefault(labels["node"], {**{key: 0 for key in NODE_REPORT_FIELDS.values()}, "models": []})
+        entry[field] += value
+        if labels.get("model") and labels["model"] not in entry["models"]:
+            entry["models"].append(labels["model"])
+    return report
+
+
+def reset_metrics() -> None:
+    with _metrics_lock:
+        _metrics.clear()
+        _metric_types.clear()
+
+
+def record_parse(model_name: str, outcome: str) -> None:
+    inc("lywo_parse_total", model=model_name, outcome=outcome, node=current_node.get())
+    log_event("parse", level=logging.DEBUG, model=model_name, outcome=outcome)
+
+
+def record_retry(kind: str) -> None:
+    inc("lywo_retries_total", kind=kind, node=current_node.get())
+    log_event("retry", kind=kind)
+
+
+def estimate_cost(model_id: str, prompt_tokens: int, completion_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model_id, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1000
+
+
+def traced_node(name, node_fn):
+    """
+    Wraps a node so that its LLM calls are attributed to it and its wall time
+    is recorded as lywo_node_duration_seconds.
+    """
+    def wrapper(state: StateType) -> StateType:
+        node_token = current_node.set(name)
+        run_token = current_run.set(state.get("run_id"))
+        start = time.perf_counter()
+        status = "error"
+        try:
+            state = node_fn(state)
+            status = "ok"
+            return state
+        finally:
+            elapsed = time.perf_counter() - start
+            observe("lywo_node_duration_seconds", elapsed, node=name, status=status)
+            log_event("node_finished", node=name, status=status, duration_s=round(elapsed, 3))
+            current_run.reset(run_token)
+            current_node.reset(node_token)
+    return wrapper
+
+
+def cache_status(message) -> str:
+    metadata = getattr(message, "response_metadata", None) or {}
+    if metadata.get("cache_hit"):
+        return "hit"
+    return "coalesced" if metadata.get("coalesced") else "miss"
+
+
+class TracedLLM:
+    """
+    Wraps a chat model and records wall time, token counts and estimated cost
+    for every invoke or stream, attributed to the node that made the call.
+    Streams also record the time to their first chunk.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def _record_error(self, model_id: str, status: str, elapsed: float) -> None:
+        inc("lywo_llm_requests_total", node=current_node.get(), model=model_id, status=status)
+        log_event("llm_call", level=logging.WARNING, model=model_id, status=status, duration_s=round(elapsed, 3))
+
+    def _record(self, prompt, model_id: str, elapsed: float, content: str, usage: Dict[str, int],
+                cache: str, first_chunk_s: float = None) -> None:
+        prompt_tokens = usage.get("input_tokens") or estimate_tokens(str(prompt))
+        completion_tokens = usage.get("output_tokens") or estimate_tokens(content)
+        # Cache hits and calls coalesced into another caller's call cost nothing
+        cost = estimate_cost(model_id, prompt_tokens, completion_tokens) if cache == "miss" else 0.0
+
+        node = current_node.get()
+        inc("lywo_llm_requests_total", node=node, model=model_id, status="ok", cache=cache)
+        observe("lywo_llm_duration_seconds", elapsed, node=node, model=model_id, cache=cache)
+        if first_chunk_s is not None:
+            observe("lywo_llm_first_chunk_seconds", first_chunk_s, node=node, model=model_id, cache=cache)
+        inc("lywo_llm_prompt_tokens_total", prompt_tokens, node=node, model=model_id)
+        inc("lywo_llm_completion_tokens_total", completion_tokens, node=node, model=model_id)
+        # Prompt tokens served from, and written to, the model's prompt cache
+        details = usage.get("input_token_details") or {}
+        if details.get("cache_read"):
+            inc("lywo_llm_prompt_cache_read_tokens_total", details["cache_read"], node=node, model=model_id)
+        if details.get("cache_creation"):
+            inc("lywo_llm_prompt_cache_write_tokens_total", details["cache_creation"], node=node, model=model_id)
+        inc("lywo_llm_cost_usd_total", cost, node=node, model=model_id)
+        log_event(
+            "llm_call", model=model_id, cache=cache, duration_s=round(elapsed, 3),
+            first_chunk_s=round(first_chunk_s, 3) if first_chunk_s is not None else None,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost_usd=round(cost, 6),
+        )
+        logger.debug("%s response:\n%s", node or "llm", content)
+
+    def invoke(self, prompt):
+        model_id = getattr(self.llm, "model_id", None)
+        start = time.perf_counter()
+        try:
+            response = self.llm.invoke(prompt)
+        except Exception:
+            self._record_error(model_id, "error", time.perf_counter() - start)
+            raise
+
+        self._record(
+            prompt, model_id, time.perf_counter() - start, response.content,
+            getattr(response, "usage_metadata", None) or {},
+            cache_status(response),
+        )
+        return response
+
+    def stream(self, prompt):
+        model_id = getattr(self.llm, "model_id", None)
+        start = time.perf_counter()
+        first_chunk_s = None
+        cache = "miss"
+        parts = []
+        try:
+            for chunk in self.llm.stream(prompt):
+                if first_chunk_s is None:
+                    first_chunk_s = time.perf_counter() - start
+                    cache = cache_status(chunk)
+                parts.append(chunk.content)
+                yield chunk
+        except GeneratorExit:
+            # The consumer stopped reading before the end of the response
+            self._record_error(model_id, "cancelled", time.perf_counter() - start)
+            raise
+        except Exception:
+            self._record_error(model_id, "error", time.perf_counter() - start)
+            raise
+        self._record(prompt, model_id, time.perf_counter() - start, "".join(parts), {}, cache, first_chunk_s)
@@ -0,0 +1,6 @@
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for Claude models (about four characters per token),
+    used for accounting when the API does not report usage.
+    """
+    return (len(text) + 3) // 4 if text else 0
@@ -0,0 +1,45 @@
+import pytest
+
+# Settings that change how the workflow runs; each test starts without them
+RUN_SETTINGS = [
+    "PARALLEL_DAG", "SPECULATIVE", "QUESTION_BANK", "ASSESSMENT_MODE", "ASSESSMENT_NUM_QUESTIONS", "NODE_MEMO",
+    "PROMPT_CACHING", "LLM_COALESCE", "STREAMING", "MODEL_PROFILE", "MODEL_ROUTING_PATH",
+    "FAKE_LLM_THROTTLE_RATE", "FAKE_LLM_CAPACITY", "FAKE_LLM_LATENCY_JITTER_S", "LLM_REQUESTS_PER_MINUTE",
+    "LLM_TOKENS_PER_MINUTE",
+]
+
+
+def clear_cached_singletons() -> None:
+    from lywo.checkpoint import get_checkpoint_store
+    from lywo.llm import get_llm, load_routing
+    from lywo.memo import get_node_memo
+    from lywo.question_bank import get_question_bank
+    from lywo.resilience import reset_rate_limits
+    from lywo.service import get_job_queue
+
+    for getter in (get_llm, load_routing, get_checkpoint_store, get_node_memo, get_question_bank, get_job_queue):
+        getter.cache_clear()
+    reset_rate_limits()
+
+
+@pytest.fixture(autouse=True)
+def offline_env(tmp_path, monkeypatch):
+    """
+    Runs every test against the deterministic fake LLM without latency, in its
+    own working directory, so the SQLite stores, checkpoints and feedback files
+    start empty.
+    """
+    monkeypatch.chdir(tmp_path)
+    for name in RUN_SETTINGS:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("LYWO_LLM", "fake")
+    monkeypatch.setenv("FAKE_LLM_LATENCY_S", "0")
+    monkeypatch.setenv("FAKE_LLM_TOKENS_PER_S", "0")
+    monkeypatch.setenv("LLM_CACHE_BYPASS", "1")
+    monkeypatch.setenv("LLM_BACKOFF_BASE_S", "0")
+    monkeypatch.setenv("STYLE_SELECTION", "auto")
+    monkeypatch.setenv("CHECKPOINT_DIR", str(tmp_path / ".checkpoints"))
+    monkeypatch.setenv("FEEDBACK_DIR", str(tmp_path / ".feedback"))
+    clear_cached_singletons()
+    yield tmp_path
+    clear_cached_singletons()
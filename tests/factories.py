@@ -0,0 +1,15 @@
+"""
+Builders for the models the tests need, with every field they do not care
+about left empty.
+"""
+from typing import List
+
+from lywo.models import Question, QuestionStyle
+
+
+def style(name: str) -> QuestionStyle:
+    return QuestionStyle(style_name=name, definition="", example="", assessment_goal="", suitable_for_topics=[])
+
+
+def question(text: str, style_name: str = "", topics: List[str] = ()) -> Question:
+    return Question(question=text, options=["A", "B"], correct_answer="A", style=style_name, topics=list(topics))
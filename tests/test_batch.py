@@ -0,0 +1,49 @@
+import json
+
+from lywo.batch import run_batch
+from lywo.samples import SAMPLE_JOB_DESCRIPTION
+
+
+def write_jobs(path, lines):
+    with open(path, "w") as f:
+        for line in lines:
+            f.write((line if isinstance(line, str) else json.dumps(line)) + "\n")
+
+
+def read_records(path):
+    with open(path) as f:
+        return {record["id"]: record for record in map(json.loads, f)}
+
+
+def test_malformed_lines_are_recorded_and_skipped(tmp_path):
+    input_path, output_path = tmp_path / "jobs.jsonl", tmp_path / "out.jsonl"
+    write_jobs(input_path, [
+        {"id": "a", "job_description": SAMPLE_JOB_DESCRIPTION},
+        "{not json",
+        {"id": "c", "description": "wrong field"},
+        {"id": "d", "job_description": SAMPLE_JOB_DESCRIPTION},
+    ])
+
+    counts = run_batch(str(input_path), str(output_path), concurrency=2)
+
+    assert counts == {"completed": 2, "failed": 2, "awaiting_feedback": 0, "skipped": 0}
+    records = read_records(output_path)
+    assert set(records) == {"a", "2", "c", "d"}
+    assert "Invalid JSON on line 2" in records["2"]["error"]
+    assert records["c"]["error"] == "No job_description on line 3"
+    assert "final_state" in records["a"] and "final_state" in records["d"]
+
+
+def test_resumed_batch_skips_completed_ids(tmp_path):
+    input_path, output_path = tmp_path / "jobs.jsonl", tmp_path / "out.jsonl"
+    write_jobs(input_path, [{"id": "a", "job_description": SAMPLE_JOB_DESCRIPTION}])
+    run_batch(str(input_path), str(output_path))
+
+    write_jobs(input_path, [
+        {"id": "a", "job_description": SAMPLE_JOB_DESCRIPTION},
+        {"id": "b", "job_description": SAMPLE_JOB_DESCRIPTION},
+    ])
+    counts = run_batch(str(input_path), str(output_path))
+
+    assert counts == {"completed": 1, "failed": 0, "awaiting_feedback": 0, "skipped": 1}
+    assert set(read_records(output_path)) == {"a", "b"}
@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from lywo.cache import CachedLLM
+
+
+class CountingModel:
+    """
+    Answers with the prompt reversed and counts its calls. With `release` set,
+    every call blocks until the event is set, so concurrent calls overlap.
+    """
+
+    model_id = "counting-model"
+    temperature = 0.0
+    max_tokens = 100
+
+    def __init__(self, release: threading.Event = None, error: Exception = None):
+        self.release = release
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return AIMessage(content=str(prompt)[::-1])
+
+    def stream(self, prompt):
+        yield self.invoke(prompt)
+
+
+def concurrent_invokes(llm, prompts, release):
+    """
+    Invokes every prompt on its own thread and returns (responses, errors)
+    in prompt order once all calls are done.
+    """
+    results = [None] * len(prompts)
+
+    def call(index, prompt):
+        try:
+            results[index] = llm.invoke(prompt)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=call, args=(index, prompt)) for index, prompt in enumerate(prompts)]
+    for thread in threads:
+        thread.start()
+    # Let every caller reach the model or the flight before the model answers
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_repeated_prompt_is_served_from_cache(tmp_path):
+    model = CountingModel()
+    llm = CachedLLM(model, path=str(tmp_path / "cache.sqlite"))
+
+    first = llm.invoke("abc")
+    second = llm.invoke("abc")
+
+    assert first.content == second.content == "cba"
+    assert second.response_metadata["cache_hit"] is True
+    assert model.calls == 1
+    assert llm.stats()["hits"] == 1
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    CachedLLM(CountingModel(), path=path).invoke("abc")
+    model = CountingModel()
+
+    assert CachedLLM(model, path=path).invoke("abc").content == "cba"
+    assert model.calls == 0
+
+
+def test_bypass_skips_lookups_but_refreshes_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    model = CountingModel()
+    bypassed = CachedLLM(model, path=path, bypass=True)
+    bypassed.invoke("abc")
+    bypassed.invoke("abc")
+
+    assert model.calls == 2
+    assert CachedLLM(CountingModel(), path=path).stats()["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    llm = CachedLLM(CountingModel(), path=str(tmp_path / "cache.sqlite"), max_entries=2)
+    llm.invoke("a")
+    llm.invoke("b")
+    llm.invoke("a")
+    llm.invoke("c")
+
+    assert llm.stats()["entries"] == 2
+    assert llm.invoke("a").response_metadata.get("cache_hit") is True
+    assert llm.invoke("b").response_metadata.get("cache_hit") is None
+
+
+def test_identical_concurrent_calls_share_one_model_call(tmp_path):
+    release = threading.Event()
+    model = CountingModel(release)
+    llm = CachedLLM(model, path=str(tmp_path / "cache.sqlite"), bypass=True)
+
+    responses = concurrent_invokes(llm, ["same prompt"] * 5, release)
+
+    assert model.calls == 1
+    assert {response.content for response in responses} == {"tpmorp emas"}
+    assert sum(bool(response.response_metadata.get("coalesced")) for response in responses) == 4
+    assert llm.stats()["coalesced"] == 4
+
+
+def test_coalesced_callers_share_the_error(tmp_path):
+    release = threading.Event()
+    model = CountingModel(release, error=RuntimeError("model down"))
+    llm = CachedLLM(model, path=str(tmp_path / "cache.sqlite"), bypass=True)
+
+    results = concurrent_invokes(llm, ["same prompt"] * 4, release)
+
+    assert model.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # The failed flight is not left behind: the next call tries the model again
+    model.error = None
+    assert llm.invoke("same prompt").content == "tpmorp emas"
+    assert model.calls == 2
+
+
+def test_different_prompts_are_not_coalesced(tmp_path):
+    release = threading.Event()
+    model = CountingModel(release)
+    llm = CachedLLM(model, path=str(tmp_path / "cache.sqlite"), bypass=True)
+
+    concurrent_invokes(llm, ["one", "two", "three"], release)
+
+    assert model.calls == 3
+    assert llm.stats()["coalesced"] == 0
+
+
+@pytest.mark.parametrize("coalesce, expected_calls", [(True, 1), (False, 3)])
+def test_coalescing_can_be_turned_off(tmp_path, coalesce, expected_calls):
+    release = threading.Event()
+    model = CountingModel(release)
+    llm = CachedLLM(model, path=str(tmp_path / "cache.sqlite"), bypass=True, coalesce=coalesce)
+
+    concurrent_invokes(llm, ["same prompt"] * 3, release)
+
+    assert model.calls == expected_calls
@@ -0,0 +1,67 @@
+from factories import question, style
+from lywo.graph import run_workflow
+from lywo.models import TopicPair
+from lywo.nodes import dedupe_questions, plan_chunks
+from lywo.samples import SAMPLE_JOB_DESCRIPTION
+
+PAIRS = [
+    TopicPair(topics=["Pumps", "Piping"], priority="low"),
+    TopicPair(topics=["Reactors", "Heat Transfer"], priority="high"),
+    TopicPair(topics=["Distillation", "Control"], priority="medium"),
+]
+STYLES = [style("Calculation"), style("Troubleshooting")]
+
+
+def test_plan_chunks_allocates_every_question_within_chunk_size():
+    chunks = plan_chunks(PAIRS, STYLES, num_questions=23, chunk_size=4)
+
+    assert sum(count for _, _, count in chunks) == 23
+    assert all(0 < count <= 4 for _, _, count in chunks)
+    assert all(chunk_styles for _, chunk_styles, _ in chunks)
+
+
+def test_plan_chunks_covers_high_priority_pairs_first():
+    chunks = plan_chunks(PAIRS, STYLES, num_questions=2, chunk_size=5)
+
+    assert [pair.priority for pair, _, _ in chunks] == ["high"]
+    assert chunks[0][2] == 2
+
+
+def test_plan_chunks_weights_high_priority_pairs():
+    counts = {}
+    for pair, _, count in plan_chunks(PAIRS, STYLES, num_questions=40, chunk_size=5):
+        counts[pair.priority] = counts.get(pair.priority, 0) + count
+
+    assert counts["high"] > counts["medium"]
+    assert counts["high"] > counts["low"]
+
+
+def test_dedupe_drops_near_duplicates_of_kept_and_earlier_questions():
+    kept = [question("Which pump curve fits the piping system?")]
+    candidates = [
+        question("Which pump curve fits the piping system"),
+        question("How is reactor heat removed during runaway?"),
+        question("How is the reactor heat removed during a runaway?"),
+        question("What limits the distillation column capacity?"),
+    ]
+
+    unique = dedupe_questions(candidates, kept, threshold=0.8)
+
+    assert [q.question for q in unique] == [
+        "How is reactor heat removed during runaway?",
+        "What limits the distillation column capacity?",
+    ]
+
+
+def test_chunked_compilation_fills_the_assessment(monkeypatch):
+    monkeypatch.setenv("ASSESSMENT_MODE", "chunked")
+    monkeypatch.setenv("ASSESSMENT_NUM_QUESTIONS", "12")
+    monkeypatch.setenv("ASSESSMENT_CHUNK_SIZE", "3")
+
+    state = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+
+    report = state["compilation_report"]
+    assert len(state["final_assessment"].questions) == 12
+    assert report["questions"] == 12
+    assert report["failed_chunks"] == 0
+    assert report["chunks"] >= 4
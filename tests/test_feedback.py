@@ -0,0 +1,88 @@
+import json
+import os
+
+import pytest
+
+from lywo.feedback import (
+    FeedbackPending,
+    _feedback_paths,
+    load_feedback_request,
+    pending_feedback,
+    select_auto,
+    select_queue,
+    styles_hash,
+    submit_feedback,
+)
+from lywo.graph import run_workflow
+from lywo.models import BroaderTopic, Subtopic, TopicSet
+from lywo.samples import SAMPLE_JOB_DESCRIPTION
+
+STYLES = [{"style_name": "Calculation"}, {"style_name": "Troubleshooting"}]
+REGENERATED = [{"style_name": "Case Study"}, {"style_name": "Design Review"}]
+
+
+def suspend(styles, run_id="run-1"):
+    with pytest.raises(FeedbackPending) as pending:
+        select_queue(styles, {"run_id": run_id})
+    return pending.value
+
+
+def test_queue_suspends_until_feedback_is_submitted():
+    pending = suspend(STYLES)
+
+    assert pending_feedback() == ["run-1"]
+    assert load_feedback_request("run-1")["styles_hash"] == styles_hash(STYLES)
+    submit_feedback("run-1", ["calculation"], ["Troubleshooting"])
+    assert pending_feedback() == []
+    assert select_queue(STYLES, {"run_id": "run-1"}) == ([STYLES[0]], [STYLES[1]])
+    assert os.path.exists(pending.request_path)
+
+
+def test_feedback_on_other_styles_is_discarded_and_asked_again():
+    suspend(STYLES)
+    submit_feedback("run-1", ["Calculation"])
+
+    suspend(REGENERATED)
+
+    assert pending_feedback() == ["run-1"]
+    assert load_feedback_request("run-1")["question_styles"] == REGENERATED
+    submit_feedback("run-1", ["Design Review"])
+    assert select_queue(REGENERATED, {"run_id": "run-1"}) == ([REGENERATED[1]], [REGENERATED[0]])
+
+
+def test_feedback_without_a_request_is_not_applied():
+    submit_feedback("run-1", ["Calculation"])
+    suspend(STYLES)
+
+
+def test_queue_needs_a_run_id():
+    with pytest.raises(ValueError):
+        select_queue(STYLES, {})
+
+
+def test_auto_prefers_styles_for_high_priority_subtopics():
+    topics = TopicSet(broaderTopics=[BroaderTopic(broaderTopic="Design", subtopics=[
+        Subtopic(name="Reactor Design", priority="high"),
+        Subtopic(name="Piping", priority="low"),
+    ])])
+    styles = [
+        {"style_name": "A", "suitable_for_topics": ["piping"]},
+        {"style_name": "B", "suitable_for_topics": ["Reactor Design"]},
+    ]
+
+    assert select_auto(styles, {"topics": topics}) == ([styles[1]], [styles[0]])
+
+
+def test_resumed_run_with_stale_feedback_suspends_again():
+    initial_state = {"job_description": SAMPLE_JOB_DESCRIPTION, "run_id": "run-1", "style_selection": "queue"}
+    with pytest.raises(FeedbackPending):
+        run_workflow(initial_state)
+    # Feedback given for styles the run no longer has, e.g. before --recompute-from
+    response_path = _feedback_paths("run-1")[1]
+    with open(response_path, "w") as f:
+        json.dump({"run_id": "run-1", "styles_hash": styles_hash(REGENERATED), "liked": ["Design Review"]}, f)
+
+    with pytest.raises(FeedbackPending):
+        run_workflow(initial_state)
+    assert not os.path.exists(response_path)
+    assert pending_feedback() == ["run-1"]
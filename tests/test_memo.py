@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+import lywo.memo as memo
+from factories import question
+from lywo.cli import main
+from lywo.memo import NodeMemo, memoized
+from lywo.models import QuestionSet
+
+
+@pytest.fixture
+def memo_on(monkeypatch):
+    monkeypatch.delenv("LLM_CACHE_BYPASS", raising=False)
+    monkeypatch.setenv("NODE_MEMO", "1")
+
+
+def counting_compilation():
+    """
+    Stands in for assessment_compilation: records its calls and writes an
+    output alongside a run report.
+    """
+    calls = []
+
+    def node(state):
+        calls.append(state["job_description"])
+        state["final_assessment"] = QuestionSet(questions=[question(f"Question {len(calls)}?")])
+        state["question_bank_report"] = {"reused_questions": len(calls)}
+        return state
+
+    return memoized("assessment_compilation", node), calls
+
+
+def compilation_state():
+    return {"job_description": "jd", "liked_question_styles": [], "interlinking_questions": None}
+
+
+def test_memo_hit_reuses_outputs_without_the_run_report(memo_on):
+    node, calls = counting_compilation()
+    first = node(compilation_state())
+    second = node(compilation_state())
+
+    assert calls == ["jd"]
+    assert second["final_assessment"] == first["final_assessment"]
+    assert "question_bank_report" not in second
+    assert first["node_sources"] == {"assessment_compilation": "computed"}
+    assert second["node_sources"] == {"assessment_compilation": "memo"}
+
+
+def test_changed_setting_misses_the_memo(memo_on, monkeypatch):
+    node, calls = counting_compilation()
+    node(compilation_state())
+    monkeypatch.setenv("ASSESSMENT_DEDUP_SIMILARITY", "0.5")
+    node(compilation_state())
+
+    assert len(calls) == 2
+
+
+def test_code_changes_miss_the_memo(memo_on, monkeypatch):
+    node, calls = counting_compilation()
+    node(compilation_state())
+    monkeypatch.setattr(memo, "MEMO_VERSION", memo.MEMO_VERSION + 1)
+    memo.code_version.cache_clear()
+    try:
+        node(compilation_state())
+    finally:
+        memo.code_version.cache_clear()
+
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    store = NodeMemo(str(tmp_path / "memo.sqlite"), max_entries=2)
+    for key in ("a", "b"):
+        store.put(key, "node", {"num_questions": 1})
+    store.get("a")
+    store.put("c", "node", {"num_questions": 1})
+
+    assert store.get("a") == {"num_questions": 1}
+    assert store.get("b") is None
+    assert store.get("c") is not None
+
+
+def test_expired_entries_are_not_served(tmp_path):
+    store = NodeMemo(str(tmp_path / "memo.sqlite"), ttl_seconds=0.01)
+    store.put("a", "node", {"num_questions": 1})
+    time.sleep(0.05)
+
+    assert store.get("a") is None
+
+
+def test_cache_bypass_turns_the_memo_off():
+    node, calls = counting_compilation()
+    node(compilation_state())
+    node(compilation_state())
+
+    assert len(calls) == 2
+
+
+def test_cosmetic_edit_needs_the_memo(capsys):
+    with pytest.raises(SystemExit):
+        main(["--run-id", "run-1", "--cosmetic-edit"])
+    assert "--cosmetic-edit reuses memoized node outputs" in capsys.readouterr().err
@@ -0,0 +1,107 @@
+import pytest
+from langchain_core.messages import HumanMessage
+
+import lywo.fake_llm as fake_llm
+from lywo.graph import run_workflow
+from lywo.llm import PromptCachingChatModel, build_chat_model, get_llm
+from lywo.prompts import (
+    PROMPT_CACHE_MIN_TOKENS,
+    Prompt,
+    PromptBuilder,
+    cache_marked,
+    prompt_stats,
+    reset_prompt_stats,
+)
+from lywo.samples import SAMPLE_JOB_DESCRIPTION
+from lywo.telemetry import metrics_snapshot, reset_metrics
+from lywo.tokens import estimate_tokens
+
+
+@pytest.fixture(autouse=True)
+def fresh_prompt_cache():
+    fake_llm._prompt_cache.clear()
+    reset_prompt_stats()
+    reset_metrics()
+
+
+def metric_total(prefix: str) -> float:
+    return sum(value for key, value in metrics_snapshot().items() if key.startswith(prefix))
+
+
+def test_builder_puts_static_sections_first():
+    builder = PromptBuilder("test_node").dynamic("input", "the input").static("instructions", "  Do this.\n\n\n\n  Then that.")
+    prompt = builder.build()
+
+    assert prompt == "Do this.\n\nThen that.\n\nthe input"
+    assert prompt.static_prefix == "Do this.\n\nThen that.\n\n"
+
+
+def test_fit_trims_lowest_priority_items_to_the_budget(monkeypatch):
+    monkeypatch.setenv("PROMPT_TOKEN_BUDGET_TEST_NODE", "12")
+    builder = PromptBuilder("test_node")
+    items = [("keep", 0), ("medium", 1), ("low", 2)]
+
+    kept = builder.fit("items", items, lambda kept: " ".join(name * 10 for name, _ in kept), lambda item: item[1])
+
+    assert kept == [("keep", 0)]
+    builder.build()
+    assert prompt_stats()["test_node"]["trimmed"] == 2
+
+
+# A static prefix long enough to be cached
+LONG_PREFIX = "Follow these rules. " * 300 + "\n\n"
+
+
+def test_cache_marked_splits_a_long_static_prefix():
+    messages = cache_marked(Prompt(LONG_PREFIX + "dynamic part", LONG_PREFIX))
+
+    assert isinstance(messages[0], HumanMessage)
+    first, second = messages[0].content
+    assert first == {"type": "text", "text": LONG_PREFIX, "cache_control": {"type": "ephemeral"}}
+    assert second == {"type": "text", "text": "dynamic part"}
+
+
+def test_short_prefixes_and_plain_prompts_are_not_marked():
+    short = Prompt("static part\n\ndynamic part", "static part\n\n")
+
+    assert cache_marked(short) is short
+    assert cache_marked("plain prompt") == "plain prompt"
+
+
+def test_prompt_caching_wraps_the_fake_model(monkeypatch):
+    assert not isinstance(build_chat_model(), PromptCachingChatModel)
+    monkeypatch.setenv("PROMPT_CACHING", "1")
+    assert isinstance(build_chat_model(), PromptCachingChatModel)
+
+
+def test_fake_model_reads_a_cached_prefix_after_writing_it():
+    model = fake_llm.FakeChatModel(latency_s=0, tokens_per_second=0)
+    prompt = Prompt(LONG_PREFIX + 'Return "topicPairs" for these subtopics.', LONG_PREFIX)
+
+    first = model.invoke(cache_marked(prompt))
+    second = model.invoke(cache_marked(prompt))
+
+    assert first.content == model.invoke(str(prompt)).content
+    assert "topicPairs" in first.content
+    assert first.usage_metadata["input_token_details"] == {"cache_creation": estimate_tokens(LONG_PREFIX)}
+    assert second.usage_metadata["input_token_details"] == {"cache_read": estimate_tokens(LONG_PREFIX)}
+
+
+def test_nodes_keep_their_own_prefix_with_prompt_caching(monkeypatch):
+    uncached = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+    uncached_stats = prompt_stats()
+
+    monkeypatch.setenv("PROMPT_CACHING", "1")
+    get_llm.cache_clear()
+    reset_prompt_stats()
+    cached = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+
+    stats = prompt_stats()
+    assert len(stats) == 3
+    for node, node_stats in stats.items():
+        # No node's instructions reach the minimum, so none is padded or marked
+        assert node_stats["static_prefix_tokens"] == uncached_stats[node]["static_prefix_tokens"]
+        assert node_stats["static_prefix_tokens"] < PROMPT_CACHE_MIN_TOKENS * node_stats["calls"]
+        assert node_stats["cached_calls"] == 0
+    assert metric_total("lywo_llm_prompt_cache_write_tokens_total") == 0
+    assert cached["final_assessment"] == uncached["final_assessment"]
@@ -0,0 +1,109 @@
+import pytest
+
+import lywo.nodes as nodes
+from factories import question, style
+from lywo.models import TopicPair, TopicPairSet
+from lywo.nodes import compile_with_question_bank
+from lywo.question_bank import QuestionBank
+
+
+@pytest.fixture
+def bank(tmp_path, monkeypatch):
+    bank = QuestionBank(str(tmp_path / "bank.sqlite"))
+    monkeypatch.setattr(nodes, "get_question_bank", lambda: bank)
+    return bank
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """
+    Records the calls compile_with_question_bank makes to generate_questions.
+    """
+    calls = []
+
+    def fake_generate(styles, pairs, job_description, num_questions, cells=None):
+        calls.append({"styles": styles, "pairs": pairs, "num_questions": num_questions, "cells": cells})
+        questions = [
+            question(f"Generated {i} on {cell_pair.topics} in {cell_style.style_name}", cell_style.style_name,
+                     cell_pair.topics)
+            for cell_pair, cell_style, count in cells for i in range(count)
+        ]
+        return nodes.QuestionSet(questions=questions[:num_questions]), 0
+
+    monkeypatch.setattr(nodes, "generate_questions", fake_generate)
+    return calls
+
+
+def state(pairs, styles, num_questions):
+    return {
+        "interlinking_questions": TopicPairSet(topicPairs=pairs),
+        "liked_question_styles": styles,
+        "job_description": "jd",
+        "num_questions": num_questions,
+    }
+
+
+def test_find_matches_topics_and_style(bank):
+    bank.add_questions([
+        question("How is reactor heat removed?", "Calculation - Heat Transfer", ["Reactor Design", "Heat Transfer"]),
+        question("Why does the reactor run away?", "Troubleshooting - Safety", ["Reactor Design", "Heat Transfer"]),
+    ], "jd")
+
+    matches = bank.find(["Reactor Design", "Heat Transfer"], "Calculation - Heat Transfer")
+    assert [match["question"] for match in matches] == ["How is reactor heat removed?"]
+    assert bank.find(["Reactor Design", "Heat Transfer"], "Case Study Review") == []
+    assert bank.find(["Pump Selection"], "Calculation - Heat Transfer") == []
+
+
+def test_reused_questions_take_the_liked_style_name(bank, generated):
+    bank.add_questions(
+        [question("How is reactor heat removed?", "calculation - heat transfer", ["Reactor Design", "Heat Transfer"])],
+        "jd",
+    )
+    liked = style("Calculation - Heat Transfer")
+
+    question_set, report = compile_with_question_bank(
+        state([TopicPair(topics=["Reactor Design", "Heat Transfer"])], [liked], num_questions=1)
+    )
+
+    assert [q.style for q in question_set.questions] == ["Calculation - Heat Transfer"]
+    assert report["reused_questions"] == 1
+    assert generated == []
+
+
+def test_only_uncovered_cells_are_generated(bank, generated):
+    covered_pair = TopicPair(topics=["Reactor Design", "Heat Transfer"], priority="high")
+    other_pair = TopicPair(topics=["Pump Selection", "Piping"], priority="low")
+    calculation, troubleshooting = style("Calculation Problem"), style("Troubleshooting Scenario")
+    bank.add_questions(
+        [question("How is reactor heat removed?", "Calculation Problem", ["Reactor Design", "Heat Transfer"])], "jd"
+    )
+
+    question_set, report = compile_with_question_bank(
+        state([covered_pair, other_pair], [calculation, troubleshooting], num_questions=4)
+    )
+
+    assert len(generated) == 1
+    cells = {(tuple(pair.topics), cell_style.style_name) for pair, cell_style, _ in generated[0]["cells"]}
+    assert cells == {
+        (("Reactor Design", "Heat Transfer"), "Troubleshooting Scenario"),
+        (("Pump Selection", "Piping"), "Calculation Problem"),
+        (("Pump Selection", "Piping"), "Troubleshooting Scenario"),
+    }
+    assert sum(count for _, _, count in generated[0]["cells"]) == 3
+    assert len(question_set.questions) == 4
+    assert report == {"cells_checked": 4, "cells_covered": 1, "reused_questions": 1, "generated_questions": 3}
+
+
+def test_no_llm_call_when_the_bank_covers_the_assessment(bank, generated):
+    pair = TopicPair(topics=["Reactor Design", "Heat Transfer"])
+    bank.add_questions([
+        question(f"Reactor heat question {word}?", "Calculation Problem", ["Reactor Design", "Heat Transfer"])
+        for word in ("alpha", "beta", "gamma")
+    ], "jd")
+
+    question_set, report = compile_with_question_bank(state([pair], [style("Calculation Problem")], num_questions=3))
+
+    assert generated == []
+    assert len(question_set.questions) == 3
+    assert report["reused_questions"] == 3
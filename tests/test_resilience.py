@@ -0,0 +1,182 @@
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from lywo.fake_llm import ThrottlingException
+from lywo.resilience import AIMDLimiter, ResilientLLM, TokenBucket, chunk_text, is_throttle_error, is_transient_error
+
+
+class FlakyClient:
+    """
+    Raises the given errors on its first calls, then answers "ok".
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return AIMessage(content="ok", usage_metadata={"input_tokens": 1, "output_tokens": 1, "total_tokens": 2})
+
+    def stream(self, prompt):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        yield AIMessageChunk(content="o")
+        yield AIMessageChunk(content="k")
+
+
+class SlowClient:
+    """
+    Answers "ok" after `delay_s`, tracking how many calls overlap.
+    """
+
+    def __init__(self, delay_s: float):
+        self.delay_s = delay_s
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay_s)
+        with self._lock:
+            self.in_flight -= 1
+        return AIMessage(content="ok")
+
+
+def resilient(client, model_id, max_retries=3):
+    return ResilientLLM(lambda: client, model_id, max_retries=max_retries, backoff_base_s=0)
+
+
+def test_aimd_decreases_once_per_generation():
+    limiter = AIMDLimiter(initial=8, throttle_threshold=0.05, window=20)
+    generations = [limiter.acquire() for _ in range(3)]
+
+    for generation in generations:
+        limiter.release(generation, throttled=True)
+
+    # The calls started before the first decrease do not decrease it again
+    assert limiter.limit == 4
+    assert limiter.decreases == 1
+
+
+def test_aimd_never_goes_below_minimum():
+    limiter = AIMDLimiter(initial=2, minimum=1)
+    for _ in range(3):
+        limiter.release(limiter.acquire(), throttled=True)
+    assert limiter.limit == 1
+
+
+def test_aimd_increases_after_limit_clean_calls():
+    limiter = AIMDLimiter(initial=4, maximum=5)
+    for _ in range(4):
+        limiter.release(limiter.acquire())
+    assert limiter.limit == 5
+    for _ in range(10):
+        limiter.release(limiter.acquire())
+    assert limiter.limit == 5
+    assert limiter.increases == 1
+
+
+def test_token_bucket_without_limit_never_waits():
+    bucket = TokenBucket(0)
+    assert bucket.acquire(10 ** 9) == 0.0
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(6000)  # 100 tokens a second
+    assert bucket.acquire(6000) == 0.0
+
+    start = time.monotonic()
+    waited = bucket.acquire(10)
+    assert waited > 0
+    assert 0.05 <= time.monotonic() - start < 1.0
+
+
+def test_token_bucket_debit_leaves_debt():
+    bucket = TokenBucket(6000)
+    bucket.debit(6000 + 20)
+    assert bucket.acquire(1) >= 0.2
+
+
+def test_throttle_and_transient_errors_are_recognised():
+    class ClientError(Exception):
+        def __init__(self, code):
+            self.response = {"Error": {"Code": code}}
+
+    assert is_throttle_error(ClientError("ThrottlingException"))
+    assert is_throttle_error(ThrottlingException("Too many requests"))
+    assert is_transient_error(ClientError("ServiceUnavailableException"))
+    assert not is_throttle_error(ValueError("bad input"))
+    assert not is_transient_error(ValueError("bad input"))
+
+
+def test_chunk_text_joins_content_blocks():
+    assert chunk_text(AIMessageChunk(content=[{"type": "text", "text": "a"}, {"type": "text", "text": "b"}])) == "ab"
+    assert chunk_text(AIMessageChunk(content="plain")) == "plain"
+
+
+def test_throttled_calls_are_retried():
+    client = FlakyClient([ThrottlingException("Too many requests"), ThrottlingException("Too many requests")])
+    llm = resilient(client, "test-retry")
+
+    assert llm.invoke("prompt").content == "ok"
+    assert client.calls == 3
+    stats = llm.limits.stats()
+    assert stats["retries"] == 2
+    assert stats["throttles"] == 2
+
+
+def test_other_errors_are_not_retried():
+    client = FlakyClient([ValueError("bad request")])
+    llm = resilient(client, "test-no-retry")
+
+    with pytest.raises(ValueError):
+        llm.invoke("prompt")
+    assert client.calls == 1
+
+
+def test_retries_give_up_after_max_retries():
+    client = FlakyClient([ConnectionError("reset")] * 3)
+    llm = resilient(client, "test-give-up", max_retries=2)
+
+    with pytest.raises(ConnectionError):
+        llm.invoke("prompt")
+    assert client.calls == 3
+
+
+def test_stream_retries_before_the_first_chunk():
+    client = FlakyClient([ThrottlingException("Too many requests")])
+    llm = resilient(client, "test-stream")
+
+    assert "".join(chunk.content for chunk in llm.stream("prompt")) == "ok"
+    assert client.calls == 2
+
+
+def test_concurrent_calls_up_to_the_limit_overlap(monkeypatch):
+    monkeypatch.setenv("LLM_INITIAL_CONCURRENCY", "16")
+    client = SlowClient(0.2)
+    built = []
+    llm = ResilientLLM(lambda: built.append(1) or client, "test-overlap", backoff_base_s=0)
+
+    threads = [threading.Thread(target=llm.invoke, args=("prompt",)) for _ in range(16)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.monotonic() - start < 0.6
+    assert client.max_in_flight == 16
+    assert len(built) == 16
+    # Finished calls hand their clients back instead of building new ones
+    llm.invoke("prompt")
+    assert len(built) == 16
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from lywo.feedback import _feedback_paths
+from lywo.samples import SAMPLE_JOB_DESCRIPTION
+from lywo.service import JobQueue, WorkerPool, make_server
+
+
+def wait_for(predicate, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(0.02)
+    raise AssertionError("Timed out waiting for the job service")
+
+
+def http(method: str, url: str, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return response.status, json.loads(response.read())
+
+
+def job_with_status(job_url: str, status: str):
+    job = http("GET", job_url)[1]
+    return job if job["status"] == status else None
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"))
+
+
+@pytest.fixture
+def server(job_queue):
+    server = make_server("127.0.0.1", 0, workers=2, job_queue=job_queue)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    server.pool.stop()
+
+
+def test_jobs_are_claimed_oldest_first(job_queue):
+    first = job_queue.submit("first", "auto")
+    second = job_queue.submit("second", "auto")
+
+    assert job_queue.claim(timeout=0)["id"] == first
+    claimed = job_queue.claim(timeout=0)
+    assert claimed["id"] == second
+    assert claimed["status"] == "running"
+    assert claimed["attempts"] == 1
+    assert job_queue.claim(timeout=0.05) is None
+
+
+def test_finished_job_keeps_result_and_metrics(job_queue):
+    job_id = job_queue.submit("jd", "auto")
+    job_queue.claim(timeout=0)
+    job_queue.finish(job_id, "completed", result={"answer": 42}, metrics={"run_s": 1.5})
+
+    job = job_queue.get(job_id)
+    assert job["status"] == "completed"
+    assert job["result"] == {"answer": 42}
+    assert job["metrics"] == {"run_s": 1.5}
+    assert job_queue.counts() == {"completed": 1}
+
+
+def test_only_jobs_awaiting_feedback_are_requeued(job_queue):
+    job_id = job_queue.submit("jd", "queue")
+    assert not job_queue.requeue(job_id)
+
+    job_queue.claim(timeout=0)
+    job_queue.finish(job_id, "awaiting_feedback")
+    assert job_queue.requeue(job_id)
+    assert job_queue.claim(timeout=0)["attempts"] == 2
+
+
+def test_running_jobs_are_recovered_on_reopen(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    job_id = JobQueue(path).submit("jd", "auto")
+    JobQueue(path).claim(timeout=0)
+
+    reopened = JobQueue(path)
+    assert reopened.get(job_id)["status"] == "queued"
+    assert reopened.claim(timeout=0)["id"] == job_id
+
+
+def test_worker_pool_completes_jobs(job_queue):
+    job_ids = [job_queue.submit(SAMPLE_JOB_DESCRIPTION, "auto") for _ in range(3)]
+    pool = WorkerPool(job_queue, workers=2)
+    pool.start()
+    try:
+        wait_for(lambda: job_queue.counts().get("completed") == 3)
+    finally:
+        pool.stop()
+
+    for job_id in job_ids:
+        job = job_queue.get(job_id)
+        assert len(job["result"]["final_assessment"]["questions"]) == 10
+        assert job["metrics"]["queue_wait_s"] >= 0
+        assert "node_timings" in job["metrics"]
+
+
+def test_service_suspends_for_feedback_and_resumes(server):
+    status, submitted = http("POST", f"{server}/jobs",
+                             {"job_description": SAMPLE_JOB_DESCRIPTION, "style_selection": "queue"})
+    assert status == 202
+    job_url = f"{server}/jobs/{submitted['id']}"
+
+    wait_for(lambda: job_with_status(job_url, "awaiting_feedback"))
+    _, request = http("GET", f"{job_url}/feedback")
+    liked = [style["style_name"] for style in request["question_styles"][:2]]
+
+    status, _ = http("POST", f"{job_url}/feedback", {"liked": liked})
+    assert status == 202
+    job = wait_for(lambda: job_with_status(job_url, "completed"))
+
+    assert {question["style"] for question in job["result"]["final_assessment"]["questions"]} <= set(liked)
+    assert job["metrics"]["attempts"] == 2
+
+
+def test_service_rejects_feedback_for_jobs_not_waiting(server):
+    _, submitted = http("POST", f"{server}/jobs",
+                        {"job_description": SAMPLE_JOB_DESCRIPTION, "style_selection": "auto"})
+    job_url = f"{server}/jobs/{submitted['id']}"
+    wait_for(lambda: job_with_status(job_url, "completed"))
+
+    for url, code in ((f"{job_url}/feedback", 409), (f"{server}/jobs/unknown/feedback", 404)):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            http("POST", url, {"liked": ["x"]})
+        assert error.value.code == code
+
+
+@pytest.mark.parametrize("style_selection", ["interactive", "bogus", ["queue"]])
+def test_service_rejects_unusable_style_selections(server, style_selection):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        http("POST", f"{server}/jobs", {"job_description": SAMPLE_JOB_DESCRIPTION, "style_selection": style_selection})
+    assert error.value.code == 400
+    assert "error" in json.loads(error.value.read())
+
+
+def test_missing_feedback_request_is_a_404(server):
+    _, submitted = http("POST", f"{server}/jobs",
+                        {"job_description": SAMPLE_JOB_DESCRIPTION, "style_selection": "queue"})
+    job_url = f"{server}/jobs/{submitted['id']}"
+    wait_for(lambda: job_with_status(job_url, "awaiting_feedback"))
+    os.remove(_feedback_paths(submitted["id"])[0])
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        http("GET", f"{job_url}/feedback")
+    assert error.value.code == 404
+    assert "No feedback request" in json.loads(error.value.read())["error"]
@@ -0,0 +1,46 @@
+import pytest
+
+import lywo.feedback as feedback
+from lywo.graph import run_workflow
+from lywo.samples import SAMPLE_JOB_DESCRIPTION
+
+
+@pytest.fixture
+def speculative(monkeypatch):
+    monkeypatch.setenv("SPECULATIVE", "1")
+
+
+def like_first_styles(monkeypatch, count: int):
+    monkeypatch.setitem(
+        feedback.STYLE_SELECTORS, "auto", lambda styles, state: (styles[:count], styles[count:])
+    )
+
+
+def test_speculative_run_keeps_the_assessment_size(speculative, monkeypatch):
+    like_first_styles(monkeypatch, 1)
+
+    state = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+
+    liked = state["liked_question_styles"][0].style_name
+    questions = state["final_assessment"].questions
+    assert len(questions) == 10
+    assert {question.style for question in questions} == {liked}
+    report = state["speculation_report"]
+    assert report["questions_used"] == 3
+    assert report["top_up_questions"] == 7
+    assert report["top_up_tokens"] > 0
+
+
+def test_speculative_report_counts_tokens_of_unliked_styles(speculative, monkeypatch):
+    like_first_styles(monkeypatch, 4)
+
+    state = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+
+    report = state["speculation_report"]
+    tokens = state["speculative_tokens"]
+    liked = {style.style_name for style in state["liked_question_styles"]}
+    assert len(state["final_assessment"].questions) == 10
+    assert report["top_up_questions"] == 0
+    assert report["styles_generated"] == len(tokens) > report["styles_liked"] == 4
+    assert report["tokens_wasted"] == sum(count for name, count in tokens.items() if name not in liked)
+    assert report["wasted_ratio"] == pytest.approx(report["tokens_wasted"] / report["tokens_total"])
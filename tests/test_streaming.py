@@ -0,0 +1,110 @@
+import asyncio
+import json
+from typing import List
+
+from langchain_core.messages import AIMessageChunk
+from pydantic import BaseModel
+
+import lywo.streaming as streaming
+from lywo.graph import run_workflow
+from lywo.samples import SAMPLE_JOB_DESCRIPTION
+from lywo.streaming import JsonArrayStreamer, stream_structured, stream_timer, stream_workflow, streaming_to
+
+
+class Item(BaseModel):
+    name: str
+
+
+class ItemSet(BaseModel):
+    items: List[Item]
+
+
+class ChunkedLLM:
+    """
+    Streams a fixed response in chunks of `size` characters.
+    """
+
+    def __init__(self, response: str, size: int):
+        self.response = response
+        self.size = size
+
+    def stream(self, prompt):
+        for start in range(0, len(self.response), self.size):
+            yield AIMessageChunk(content=self.response[start:start + self.size])
+
+
+def feed_in_chunks(streamer, text, size):
+    """
+    Feeds `text` in chunks of `size` characters and returns, per chunk, the
+    items it completed.
+    """
+    return [streamer.feed(text[start:start + size]) for start in range(0, len(text), size)]
+
+
+def test_items_are_emitted_when_they_close():
+    text = '{"items": [{"name": "a"}, {"name": "b"}]}'
+    streamer = JsonArrayStreamer("items")
+
+    emitted = feed_in_chunks(streamer, text, 1)
+
+    # Each item arrives with the chunk holding its closing brace, and only then
+    assert emitted[text.index("}")] == [{"name": "a"}]
+    assert emitted[text.index("}", text.index("}") + 1)] == [{"name": "b"}]
+    assert sum(len(items) for items in emitted) == 2
+
+
+def test_key_and_strings_split_across_chunks():
+    text = '{"intro": "see [items] below", "items": [{"name": "split \\"quoted\\" {brace]"}, {"name": "x"}]}'
+
+    for size in (1, 2, 3, 7, len(text)):
+        streamer = JsonArrayStreamer("items")
+        items = [item for chunk_items in feed_in_chunks(streamer, text, size) for item in chunk_items]
+        assert items == [{"name": 'split "quoted" {brace]'}, {"name": "x"}]
+
+
+def test_nothing_is_emitted_after_the_array_ends():
+    streamer = JsonArrayStreamer("items")
+
+    assert streamer.feed('{"items": [{"name": "a"}], "other": [{"name": "b"}]}') == [{"name": "a"}]
+    assert streamer.closed
+    assert streamer.feed('{"name": "c"}') == []
+
+
+def test_stream_structured_emits_items_and_parses_the_full_response(monkeypatch):
+    response = "Here you go: " + json.dumps({"items": [{"name": "a"}, {"name": "b"}, {"name": "c"}]})
+    monkeypatch.setattr(streaming, "get_llm", lambda: ChunkedLLM(response, 5))
+    events = []
+
+    with streaming_to(events.append), stream_timer() as timer:
+        parsed = stream_structured("prompt", ItemSet, "items", Item, "item")
+
+    assert [event["item"] for event in events] == parsed.items
+    assert {event["kind"] for event in events} == {"item"}
+    report = timer.report()
+    assert report["items"] == 3
+    assert 0 <= report["first_item_s"] <= report["total_s"]
+
+
+def test_streaming_report_records_first_item_and_total_time(monkeypatch):
+    monkeypatch.setenv("STREAMING", "1")
+
+    state = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+
+    report = state["streaming_report"]
+    assert {"question_style_diversification", "assessment_compilation"} <= set(report)
+    for node_report in report.values():
+        assert node_report["items"] > 0
+        assert 0 <= node_report["first_item_s"] <= node_report["total_s"]
+    assert report["assessment_compilation"]["items"] == len(state["final_assessment"].questions)
+
+
+def test_stream_workflow_yields_items_then_the_final_state():
+    async def collect():
+        return [event async for event in stream_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})]
+
+    events = asyncio.run(collect())
+
+    assert events[-1]["kind"] == "final_state"
+    questions = [event["item"] for event in events if event["kind"] == "question"]
+    assert questions == events[-1]["state"]["final_assessment"].questions
+    assert {event["node"] for event in events[:-1]} >= {"question_style_diversification", "assessment_compilation"}
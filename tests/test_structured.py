@@ -0,0 +1,135 @@
+import json
+from typing import List
+
+import pytest
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+
+import lywo.structured as structured
+from lywo.structured import (
+    REPAIR_MAX_CUTS,
+    extract_json,
+    parse_structured,
+    repair_candidates,
+    repair_json,
+    structured_stats,
+)
+
+
+class Items(BaseModel):
+    items: List[str]
+
+
+class RecordingLLM:
+    """
+    Stands in for get_llm() in re-asks: records the prompts and answers with
+    the given responses in turn.
+    """
+
+    def __init__(self, *responses: str):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return AIMessage(content=self.responses.pop(0))
+
+
+@pytest.fixture
+def reask_llm(monkeypatch):
+    def install(*responses):
+        llm = RecordingLLM(*responses)
+        monkeypatch.setattr(structured, "get_llm", lambda: llm)
+        return llm
+    return install
+
+
+def test_extract_json_strips_fences():
+    assert extract_json('```json\n{"items": ["a"]}\n```') == '{"items": ["a"]}'
+
+
+def test_extract_json_skips_braces_in_prose():
+    text = 'Here is {my} answer: {"items": ["a", "b"]} thanks'
+    assert json.loads(extract_json(text)) == {"items": ["a", "b"]}
+
+
+def test_extract_json_keeps_truncated_json_for_repair():
+    assert extract_json('Sure: {"items": ["a", "b') == '{"items": ["a", "b'
+
+
+def test_repair_json_drops_trailing_commas():
+    assert repair_json('{"items": ["a", "b",],}') == {"items": ["a", "b"]}
+
+
+def test_repair_json_closes_truncated_document():
+    assert repair_json('{"items": ["a", "b"') == {"items": ["a", "b"]}
+
+
+def test_repair_candidates_count_dropped_elements():
+    # Cut inside the third string: it is the only element lost
+    value, dropped = next(repair_candidates('{"items": ["a", "b", "c'))
+    assert value == {"items": ["a", "b"]}
+    assert dropped == 1
+
+
+def test_repair_candidates_only_cut_back_the_last_elements():
+    # Truncated just before the last element closes
+    text = json.dumps({"items": [[str(i)] for i in range(5000)]})[:-3]
+    candidates = list(repair_candidates(text))
+
+    assert len(candidates) <= 1 + 2 * REPAIR_MAX_CUTS
+    value, dropped = candidates[0]
+    assert len(value["items"]) == 5000
+    assert dropped == 0
+
+
+def test_repair_json_gives_up_on_garbage():
+    assert repair_json("not json at all") is None
+
+
+def test_parse_structured_records_how_it_parsed():
+    before = structured_stats()
+    parse_structured('{"items": ["a"]}', Items)
+    parse_structured('Result:\n```json\n{"items": ["a"]}\n```', Items)
+    parse_structured('{"items": ["a", "b", "c', Items)
+    after = structured_stats()
+
+    assert after["clean"] - before["clean"] == 1
+    assert after["extracted"] - before["extracted"] == 1
+    assert after["repaired"] - before["repaired"] == 1
+    assert after["dropped_items"] - before["dropped_items"] == 1
+
+
+def test_reask_sends_the_whole_fragment(reask_llm):
+    llm = reask_llm('{"items": ["fixed"]}')
+    # Valid JSON that does not match the schema, longer than any old truncation limit
+    broken = json.dumps({"things": ["x" * 50] * 400})
+
+    parsed = parse_structured(broken, Items, prompt="original prompt")
+
+    assert parsed == Items(items=["fixed"])
+    assert len(llm.prompts) == 1
+    assert broken in llm.prompts[0]
+    assert "original prompt" not in llm.prompts[0]
+
+
+def test_reask_uses_the_error_of_the_most_complete_repair(reask_llm):
+    llm = reask_llm('{"items": ["fixed"]}')
+
+    parse_structured('{"items": [1, 2, 3, "d', Items, prompt="original prompt")
+
+    assert "3 validation errors" in llm.prompts[0]
+
+
+def test_reask_failure_raises_value_error(reask_llm):
+    llm = reask_llm('{"still": "wrong"}')
+    with pytest.raises(ValueError, match="Items"):
+        parse_structured('{"wrong": 1}', Items, prompt="original prompt")
+    assert len(llm.prompts) == 1
+
+
+def test_no_reask_without_prompt(reask_llm):
+    llm = reask_llm()
+    with pytest.raises(ValueError):
+        parse_structured('{"wrong": 1}', Items)
+    assert llm.prompts == []
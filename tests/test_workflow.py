@@ -0,0 +1,29 @@
+from lywo.graph import run_workflow
+from lywo.samples import SAMPLE_JOB_DESCRIPTION
+
+
+def test_fake_workflow_is_deterministic():
+    first = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+    second = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+
+    assert len(first["final_assessment"].questions) == 10
+    assert first["final_assessment"] == second["final_assessment"]
+
+
+def test_parallel_dag_matches_linear_graph(monkeypatch):
+    linear = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+    monkeypatch.setenv("PARALLEL_DAG", "1")
+    parallel = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+
+    assert parallel["final_assessment"] == linear["final_assessment"]
+    assert set(parallel["node_finish_times"]) == set(parallel["node_timings"])
+    assert "node_finish_times" not in linear
+
+
+def test_liked_styles_come_from_generated_styles():
+    state = run_workflow({"job_description": SAMPLE_JOB_DESCRIPTION})
+
+    generated = {style.style_name for style in state["diversified_questions"].question_styles}
+    liked = {style.style_name for style in state["liked_question_styles"]}
+    assert liked and liked <= generated
+    assert {question.style for question in state["final_assessment"].questions} <= liked